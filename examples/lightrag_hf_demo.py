@@ -1,9 +1,8 @@
 import os
 
 from lightrag import LightRAG, QueryParam
-from lightrag.llm.hf import hf_model_complete, hf_embed
+from lightrag.llm.hf import hf_model_complete, hf_embed, load_hf_embed_model
 from lightrag.utils import EmbeddingFunc
-from transformers import AutoModel, AutoTokenizer
 from lightrag.kg.shared_storage import initialize_pipeline_status
 
 import asyncio
@@ -17,6 +16,13 @@ if not os.path.exists(WORKING_DIR):
     os.mkdir(WORKING_DIR)
 
 
+# Load the embedding model once so it stays resident across calls.
+# On CPU-only hosts, backend="onnx" and/or quantize=True speed up embedding.
+embed_tokenizer, embed_model = load_hf_embed_model(
+    "sentence-transformers/all-MiniLM-L6-v2"
+)
+
+
 async def initialize_rag():
     rag = LightRAG(
         working_dir=WORKING_DIR,
@@ -27,12 +33,9 @@ async def initialize_rag():
             max_token_size=5000,
             func=lambda texts: hf_embed(
                 texts,
-                tokenizer=AutoTokenizer.from_pretrained(
-                    "sentence-transformers/all-MiniLM-L6-v2"
-                ),
-                embed_model=AutoModel.from_pretrained(
-                    "sentence-transformers/all-MiniLM-L6-v2"
-                ),
+                tokenizer=embed_tokenizer,
+                embed_model=embed_model,
+                normalize=True,
             ),
         ),
     )
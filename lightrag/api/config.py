@@ -304,6 +304,15 @@ def parse_args() -> argparse.Namespace:
     # Select Document loading tool (DOCLING, DEFAULT)
     args.document_loading_engine = get_env_value("DOCUMENT_LOADING_ENGINE", "DEFAULT")
 
+    # Process pool used to parse PDF/DOCX/PPTX/XLSX uploads off the event loop
+    args.parser_workers = get_env_value("PARSER_WORKERS", 2, int)
+    args.parser_timeout = get_env_value("PARSER_TIMEOUT", 300, int)
+    args.parser_memory_limit_mb = get_env_value("PARSER_MEMORY_LIMIT_MB", 0, int)
+
+    # Poll the input directory for changes every N seconds (0 = disabled)
+    args.input_watch_interval = get_env_value("INPUT_WATCH_INTERVAL", 0, int)
+    args.input_watch_workspace = get_env_value("INPUT_WATCH_WORKSPACE", "default")
+
     # Add environment variables that were previously read directly
     args.cors_origins = get_env_value("CORS_ORIGINS", "*")
     args.summary_language = get_env_value("SUMMARY_LANGUAGE", "en")
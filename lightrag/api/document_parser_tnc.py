@@ -0,0 +1,207 @@
+"""
+ * ┌─────────────────────────────────────────────┐
+ * │ TechNexusClarity Custom Module              │
+ * │ Not part of upstream open source repo       │
+ * └─────────────────────────────────────────────┘
+ *
+ * Description: Process-pool parsing stage for binary documents.
+ * Owner: TechNexusClarity
+
+PDF/DOCX/PPTX/XLSX extraction (PyPDF2, python-docx, python-pptx, openpyxl or
+docling) is CPU bound and used to run on the event loop, freezing the API
+worker for the whole parse. This module runs it in a pool of worker processes:
+  - each worker keeps its docling DocumentConverter (and its models) for reuse
+  - every file gets a timeout; a worker stuck past it is killed and replaced
+  - workers can be capped with an address-space limit (POSIX only)
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+from lightrag.utils import ensure_package, logger
+
+# Extensions handled by the worker processes; everything else is plain text
+PARSED_EXTENSIONS = (".pdf", ".docx", ".pptx", ".xlsx")
+
+
+class DocumentParseError(Exception):
+    """Raised when a document cannot be parsed in the worker pool."""
+
+
+# Per-worker docling converter, created on first use and reused for later files
+_docling_converter = None
+
+
+def _init_worker(memory_limit_mb: int) -> None:
+    """Worker initializer: apply the optional memory cap."""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not apply parser memory limit: {e}")
+
+
+def _get_docling_converter():
+    global _docling_converter
+    if _docling_converter is None:
+        ensure_package("docling")
+        from docling.document_converter import DocumentConverter  # type: ignore
+
+        _docling_converter = DocumentConverter()
+    return _docling_converter
+
+
+def extract_document_text(file_path: str, engine: str = "DEFAULT") -> str:
+    """Extract text from a PDF/DOCX/PPTX/XLSX file. Runs inside a worker process.
+
+    Args:
+        file_path: Path of the file to parse; the worker reads it itself so the
+            bytes are not pickled across the process boundary.
+        engine: "DOCLING" to convert with docling, anything else for the
+            lightweight per-format readers.
+
+    Returns:
+        str: The extracted text (markdown when using docling).
+    """
+    ext = Path(file_path).suffix.lower()
+    if ext not in PARSED_EXTENSIONS:
+        raise DocumentParseError(f"Unsupported file type for parsing: {ext}")
+
+    if engine == "DOCLING":
+        result = _get_docling_converter().convert(file_path)
+        return result.document.export_to_markdown()
+
+    content = ""
+    match ext:
+        case ".pdf":
+            ensure_package("pypdf2", "PyPDF2")
+            from PyPDF2 import PdfReader  # type: ignore
+
+            reader = PdfReader(file_path)
+            for page in reader.pages:
+                content += page.extract_text() + "\n"
+        case ".docx":
+            ensure_package("python-docx", "docx")
+            from docx import Document  # type: ignore
+
+            doc = Document(file_path)
+            content = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        case ".pptx":
+            ensure_package("python-pptx", "pptx")
+            from pptx import Presentation  # type: ignore
+
+            prs = Presentation(file_path)
+            for slide in prs.slides:
+                for shape in slide.shapes:
+                    if hasattr(shape, "text"):
+                        content += shape.text + "\n"
+        case ".xlsx":
+            ensure_package("openpyxl")
+            from openpyxl import load_workbook  # type: ignore
+
+            wb = load_workbook(file_path, read_only=True)
+            for sheet in wb:
+                content += f"Sheet: {sheet.title}\n"
+                for row in sheet.iter_rows(values_only=True):
+                    content += (
+                        "\t".join(str(cell) if cell is not None else "" for cell in row)
+                        + "\n"
+                    )
+                content += "\n"
+            wb.close()
+    return content
+
+
+class DocumentParser:
+    """Runs extract_document_text on a lazily started process pool."""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout: float = 300,
+        memory_limit_mb: int = 0,
+        engine: str = "DEFAULT",
+    ):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.memory_limit_mb = memory_limit_mb
+        self.engine = engine
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.memory_limit_mb,),
+            )
+            self._generation += 1
+        return self._pool
+
+    def _discard_pool(self, generation: int, kill: bool = False) -> None:
+        """Drop the pool if it is still the one a failed call ran on."""
+        pool = self._pool
+        if pool is None or generation != self._generation:
+            return
+        self._pool = None
+        if kill:
+            # A worker stuck in a parse never returns on its own; the executor
+            # has no public API for this, so terminate its processes directly
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def parse(self, file_path: Path) -> str:
+        """Parse one file in the pool.
+
+        Raises:
+            DocumentParseError: On timeout, worker crash (e.g. memory limit hit)
+                or any error raised by the parser.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self._get_pool()
+            generation = self._generation
+            future = loop.run_in_executor(
+                pool, extract_document_text, str(file_path), self.engine
+            )
+            try:
+                return await asyncio.wait_for(future, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self._discard_pool(generation, kill=True)
+                raise DocumentParseError(
+                    f"Parsing {file_path.name} exceeded {self.timeout}s"
+                )
+            except BrokenProcessPool:
+                self._discard_pool(generation)
+                # The pool may have been broken by another file (timeout kill or
+                # memory limit); retry once on a fresh pool before giving up
+                if attempt == 0:
+                    logger.warning(
+                        f"Parser pool broke while parsing {file_path.name}, retrying"
+                    )
+                    continue
+                raise DocumentParseError(
+                    f"Parser worker crashed on {file_path.name} (memory limit?)"
+                )
+            except DocumentParseError:
+                raise
+            except Exception as e:
+                raise DocumentParseError(f"Error parsing {file_path.name}: {e}") from e
+        raise DocumentParseError(f"Could not parse {file_path.name}")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,189 @@
+"""
+ * ┌─────────────────────────────────────────────┐
+ * │ TechNexusClarity Custom Module              │
+ * │ Not part of upstream open source repo       │
+ * └─────────────────────────────────────────────┘
+ *
+ * Description: Persistent manifest of indexed input files.
+ * Owner: TechNexusClarity
+
+Records (size, mtime, content hash, doc id) for every input file a workspace
+has processed, so a directory scan only has to stat files:
+  - one os.scandir walk for all supported extensions
+  - unchanged size/mtime means unchanged; otherwise the content hash decides
+  - files gone from disk are reported as deleted
+  - files that could not be enqueued are kept without a doc id and retried
+    only once they change
+  - the manifest lives in the workspace's working dir and survives restarts
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from lightrag.utils import logger
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    content_hash: str
+    doc_id: Optional[str] = None
+
+
+@dataclass
+class ScanChanges:
+    new: list[Path] = field(default_factory=list)
+    modified: list[Path] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    def __len__(self) -> int:
+        return len(self.new) + len(self.modified) + len(self.deleted)
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_input_files(
+    root: Path, extensions: Iterable[str], skip_prefix: str = ""
+) -> Iterator[os.DirEntry]:
+    """Walk ``root`` once, yielding regular files with a supported extension."""
+    extensions = {ext.lower() for ext in extensions}
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if skip_prefix and entry.name.startswith(skip_prefix):
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() in extensions:
+                        yield entry
+        except OSError as e:
+            logger.warning(f"Cannot scan directory: {e}")
+
+
+class InputManifest:
+    """Manifest of one workspace's indexed files under the input directory.
+
+    The synchronous methods touch the filesystem and are meant to run on the
+    blocking executor; ``lock`` serializes scans of the same workspace.
+    """
+
+    def __init__(self, root: Path, manifest_path: Path):
+        self.root = Path(root)
+        self.manifest_path = Path(manifest_path)
+        self.entries: dict[str, ManifestEntry] = {}
+        self.lock = asyncio.Lock()
+        self._loaded = False
+
+    def key(self, path: Path) -> str:
+        return Path(path).relative_to(self.root).as_posix()
+
+    def load(self) -> None:
+        self.entries = {}
+        self._loaded = True
+        if not self.manifest_path.exists():
+            return
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.manifest_path}: {e}")
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            logger.info(f"Discarding outdated manifest {self.manifest_path}")
+            return
+        self.entries = {
+            key: ManifestEntry(**value) for key, value in data["files"].items()
+        }
+
+    def save(self) -> None:
+        """Write the manifest atomically (temp file + rename)."""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": {key: asdict(entry) for key, entry in self.entries.items()},
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path)
+
+    def clear(self) -> None:
+        self.entries = {}
+        self._loaded = True
+        self.save()
+
+    def scan(self, extensions: Iterable[str], skip_prefix: str = "") -> ScanChanges:
+        """Compare the input directory against the manifest in a single walk."""
+        if not self._loaded:
+            self.load()
+        changes = ScanChanges()
+        seen: set[str] = set()
+        for dir_entry in iter_input_files(self.root, extensions, skip_prefix):
+            path = Path(dir_entry.path)
+            key = self.key(path)
+            seen.add(key)
+            entry = self.entries.get(key)
+            if entry is None:
+                changes.new.append(path)
+                continue
+            try:
+                stat = dir_entry.stat()
+                if (stat.st_size, stat.st_mtime_ns) == (entry.size, entry.mtime_ns):
+                    changes.unchanged += 1
+                    continue
+                content_hash = hash_file(path)
+            except OSError:
+                continue
+            if content_hash == entry.content_hash:
+                # Touched or copied over with identical bytes: refresh stat only
+                entry.size, entry.mtime_ns = stat.st_size, stat.st_mtime_ns
+                changes.unchanged += 1
+            else:
+                changes.modified.append(path)
+        changes.deleted = [key for key in self.entries if key not in seen]
+        return changes
+
+    def record(self, path: Path, doc_id: Optional[str]) -> Optional[ManifestEntry]:
+        """Record ``path`` as processed, with ``doc_id`` None if it could not be
+        enqueued; returns the entry it replaced, if any."""
+        stat = path.stat()
+        key = self.key(path)
+        previous = self.entries.get(key)
+        self.entries[key] = ManifestEntry(
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=hash_file(path),
+            doc_id=doc_id,
+        )
+        return previous
+
+    def forget(self, key: str) -> Optional[ManifestEntry]:
+        return self.entries.pop(key, None)
+
+    def doc_id_in_use(self, doc_id: str) -> bool:
+        """True if another file still maps to ``doc_id`` (identical content)."""
+        return any(entry.doc_id == doc_id for entry in self.entries.values())
@@ -9,7 +9,6 @@ import re
 import logging
 import logging.config
 import uvicorn
-import pipmaster as pm
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 from pathlib import Path
@@ -37,14 +36,25 @@ from lightrag.api.routers.document_routes import (
     DocumentManager,
     create_document_routes,
     run_scanning_process,
+    run_input_watcher, # TNC
+    document_parser, # TNC
 )
 from lightrag.api.routers.query_routes import create_query_routes
 from lightrag.api.routers.graph_routes import create_graph_routes
 from lightrag.api.routers.ollama_api import OllamaAPI
 
 from lightrag.api.routers.reply_routes_tnc import create_reply_routes #TNC addition
-
-from lightrag.utils import logger, set_verbose_debug
+from lightrag.api.workspace_manager_tnc import WorkspaceManager #TNC addition
+
+from lightrag.utils import (
+    logger,
+    set_verbose_debug,
+    get_blocking_executor,
+    get_single_flight,
+    get_llm_scheduler_metrics,
+    ensure_package,
+)
+from lightrag.llm.rate_control import rate_controllers
 from lightrag.kg.shared_storage import (
     get_namespace_data,
     get_pipeline_status_lock,
@@ -137,17 +147,27 @@ def create_app(args):
         except Exception as e:
             logger.error(f"Failed to initialize shared storage: {e}")
             raise
-        
+
+        sweeper = asyncio.create_task(app.state.workspace_manager.run_sweeper())
+        watcher = None
+        if args.input_watch_interval > 0:
+            watcher = asyncio.create_task(
+                run_input_watcher(
+                    app.state.workspace_manager,
+                    doc_manager,
+                    args.input_watch_workspace,
+                    args.input_watch_interval,
+                )
+            )
+
         yield
 
         # Shutdown
-        if hasattr(app.state, "rag_instances"):
-            for workspace, rag in app.state.rag_instances.items():
-                try:
-                    await rag.finalize_storages()
-                    logger.info(f"Finalized storages for namespace: {workspace}")
-                except Exception as e:
-                    logger.error(f"Error finalizing storages for {workspace}: {e}")
+        sweeper.cancel()
+        if watcher is not None:
+            watcher.cancel()
+        await app.state.workspace_manager.close()
+        document_parser.shutdown()
     # @asynccontextmanager
     # async def lifespan(app: FastAPI):
     #     """Lifespan context manager for startup and shutdown events"""
@@ -455,39 +475,26 @@ def create_app(args):
         addon_params={"language": args.summary_language},        
     )
     
-    # Async version includes initialization and eviction logic
-    async def async_rag_factory(workspace="default") -> LightRAG:
-        MAX_RAG_INSTANCES = int(os.getenv("MAX_RAG_INSTANCES", 2))
-        if not hasattr(app.state, "rag_instances"):
-            app.state.rag_instances = {}
-        if not hasattr(app.state, "rag_instance_order"):
-            app.state.rag_instance_order = []
-
-        if workspace in app.state.rag_instances:
-            return app.state.rag_instances[workspace]
-
-        # Create new instance
-        rag = app.state.rag_factory_sync(workspace=workspace)
-        await rag.initialize_storages()
+    # Workspace manager handles single-flight creation, LRU/TTL eviction and
+    # reference counting of the per-workspace instances
+    async def _on_rag_created(rag: LightRAG):
         await initialize_pipeline_status()
         pipeline_status = await get_namespace_data("pipeline_status")
-        logger.info(f"Creating RAG instance for workspace: {workspace}.  Pipeline status: {pipeline_status}")
-        # Enforce eviction if limit exceeded
-        if len(app.state.rag_instance_order) >= MAX_RAG_INSTANCES:
-            evicted_ns = app.state.rag_instance_order.pop(0)
-            evicted_rag = app.state.rag_instances.pop(evicted_ns, None)
-            if evicted_rag:
-                try:
-                    await evicted_rag.finalize_storages()
-                    logger.info(f"Evicted and finalized RAG instance for workspace: {evicted_ns}")
-                except Exception as e:
-                    logger.warning(f"Failed to finalize RAG instance for {evicted_ns}: {e}")
-
-        # Register new instance
-        app.state.rag_instances[workspace] = rag
-        app.state.rag_instance_order.append(workspace)
-
-        return rag
+        logger.info(
+            f"Created RAG instance for workspace: {rag.workspace}.  Pipeline status: {pipeline_status}"
+        )
+
+    app.state.workspace_manager = WorkspaceManager(
+        factory=lambda workspace: app.state.rag_factory_sync(workspace=workspace),
+        max_instances=int(os.getenv("MAX_RAG_INSTANCES", 2)),
+        idle_ttl=float(os.getenv("RAG_INSTANCE_IDLE_TTL", 1800)),
+        on_created=_on_rag_created,
+    )
+
+    # Kept for callers that expect a plain factory; route handlers lease
+    # instances through the manager instead
+    async def async_rag_factory(workspace="default") -> LightRAG:
+        return await app.state.workspace_manager.get(workspace)
 
     app.state.rag_factory = async_rag_factory
     # Add routes
@@ -610,6 +617,11 @@ def create_app(args):
                 },
                 "auth_mode": auth_mode,
                 "pipeline_busy": pipeline_status.get("busy", False),
+                "workspaces": app.state.workspace_manager.get_metrics(),
+                "blocking_executor": get_blocking_executor().get_metrics(),
+                "single_flight": get_single_flight().get_metrics(),
+                "llm_scheduler": get_llm_scheduler_metrics(),
+                "llm_rate_control": rate_controllers.get_metrics(),
                 "core_version": core_version,
                 "api_version": __api_version__,
                 "webui_title": webui_title,
@@ -741,10 +753,7 @@ def check_and_install_dependencies():
     ]
 
     for package in required_packages:
-        if not pm.is_installed(package):
-            print(f"Installing {package}...")
-            pm.install(package)
-            print(f"{package} installed successfully")
+        ensure_package(package)  # TNC: no pipmaster scan when already installed
 
 
 def main():
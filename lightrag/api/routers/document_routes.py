@@ -10,37 +10,53 @@
  Created by TechNexusClarity.
  Description: Inserts the Rag instance into the FastAPI app.
  """
-from ..utils_api_tnc import get_resolved_namespace, get_rag_from_app
+from ..utils_api_tnc import (
+    get_resolved_namespace,
+    lease_rag_from_app,
+    add_leased_background_task,
+)
 from fastapi import Request, Depends
 from lightrag.lightrag import LightRAG 
-from typing import Optional
+from typing import AsyncIterator, Optional
 # Creates or returns rag instance
 async def get_rag(
     request: Request,
     namespace: Optional[str] = Depends(get_resolved_namespace)
-) -> LightRAG:
-    return await get_rag_from_app(request, namespace)
+) -> AsyncIterator[LightRAG]:
+    async with lease_rag_from_app(request, namespace) as rag:
+        yield rag
 # --------------------------------------------------------------------
 """
 This module contains all document-related routes for the LightRAG API.
 """
 
 import asyncio
-from lightrag.utils import logger
+from lightrag.utils import logger, clean_text, compute_mdhash_id, run_blocking
 import aiofiles
-import shutil
+import codecs
+import hashlib
+import os
 import traceback
-import pipmaster as pm
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Literal
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from typing import Dict, List, Optional, Any, Literal, Tuple
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    UploadFile,
+)
 from pydantic import BaseModel, Field, field_validator
 
 from lightrag import LightRAG
 from lightrag.base import DocProcessingStatus, DocStatus
 from lightrag.api.utils_api import get_combined_auth_dependency
 from ..config import global_args
+from ..document_parser_tnc import DocumentParser, DocumentParseError # TNC
+from ..input_manifest_tnc import InputManifest, ManifestEntry, iter_input_files # TNC
 
 router = APIRouter(
     prefix="/documents",
@@ -50,6 +66,17 @@ router = APIRouter(
 # Temporary file prefix
 temp_prefix = "__tmp__"
 
+# Uploads are streamed to disk and text files decoded in chunks of this size
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# TNC: shared parsing stage for binary documents; the pool starts on first use
+document_parser = DocumentParser(
+    max_workers=global_args.parser_workers,
+    timeout=global_args.parser_timeout,
+    memory_limit_mb=global_args.parser_memory_limit_mb,
+    engine=global_args.document_loading_engine,
+)
+
 
 class ScanResponse(BaseModel):
     """Response model for document scanning operation
@@ -276,12 +303,22 @@ class DocsStatusesResponse(BaseModel):
 
     Attributes:
         statuses: Dictionary mapping document status to lists of document status responses
+        cursors: Next-page cursor per status, present only when more documents follow
+        status_counts: Total number of documents per status
     """
 
     statuses: Dict[DocStatus, List[DocStatusResponse]] = Field(
         default_factory=dict,
         description="Dictionary mapping document status to lists of document status responses",
     )
+    cursors: Dict[DocStatus, str] = Field(
+        default_factory=dict,
+        description="Cursor to pass back (with ?status=) for the next page of each status that has more documents",
+    )
+    status_counts: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Total number of documents in each status",
+    )
 
     class Config:
         json_schema_extra = {
@@ -395,19 +432,33 @@ class DocumentManager:
         self.input_dir = Path(input_dir)
         self.supported_extensions = supported_extensions
         self.indexed_files = set()
+        # TNC: persistent per-workspace manifests of indexed input files
+        self.manifests: Dict[str, InputManifest] = {}
 
         # Create input directory if it doesn't exist
         self.input_dir.mkdir(parents=True, exist_ok=True)
 
     def scan_directory_for_new_files(self) -> List[Path]:
         """Scan input directory for new files"""
-        new_files = []
-        for ext in self.supported_extensions:
-            logger.debug(f"Scanning for {ext} files in {self.input_dir}")
-            for file_path in self.input_dir.rglob(f"*{ext}"):
-                if file_path not in self.indexed_files:
-                    new_files.append(file_path)
-        return new_files
+        logger.debug(f"Scanning for new files in {self.input_dir}")
+        return [
+            Path(entry.path)
+            for entry in iter_input_files(
+                self.input_dir, self.supported_extensions, temp_prefix
+            )
+            if Path(entry.path) not in self.indexed_files
+        ]
+
+    def get_manifest(self, rag: LightRAG) -> InputManifest:
+        """Return the manifest of files indexed by the given workspace"""
+        manifest = self.manifests.get(rag.workspace)
+        if manifest is None:
+            manifest = InputManifest(
+                self.input_dir,
+                Path(rag.working_dir) / f"input_manifest_{rag.workspace}.json",
+            )
+            self.manifests[rag.workspace] = manifest
+        return manifest
 
     def mark_as_indexed(self, file_path: Path):
         self.indexed_files.add(file_path)
@@ -416,24 +467,65 @@ class DocumentManager:
         return any(filename.lower().endswith(ext) for ext in self.supported_extensions)
 
 
-async def pipeline_enqueue_file(rag: LightRAG, file_path: Path) -> bool:
+async def read_text_file(file_path: Path) -> Optional[str]:
+    """Read and validate a plain-text file
+
+    Args:
+        file_path: Path to the saved file
+    Returns:
+        Optional[str]: The decoded text, or None if the file is unusable
+    """
+    try:
+        # Decode as UTF-8 chunk by chunk so the raw bytes are never held whole
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parts = []
+        async with aiofiles.open(file_path, "rb") as f:
+            while chunk := await f.read(STREAM_CHUNK_SIZE):
+                parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+        content = "".join(parts)
+
+        # Validate content
+        if not content or len(content.strip()) == 0:
+            logger.error(f"Empty content in file: {file_path.name}")
+            return None
+
+        # Check if content looks like binary data string representation
+        if content.startswith("b'") or content.startswith('b"'):
+            logger.error(
+                f"File {file_path.name} appears to contain binary data representation instead of text"
+            )
+            return None
+
+    except UnicodeDecodeError:
+        logger.error(
+            f"File {file_path.name} is not valid UTF-8 encoded text. Please convert it to UTF-8 before processing."
+        )
+        return None
+    return content
+
+
+async def pipeline_enqueue_file(
+    rag: LightRAG, file_path: Path, content_hash: Optional[str] = None
+) -> Optional[str]:
     """Add a file to the queue for processing
 
+    Plain-text files are decoded in-process; PDF/DOCX/PPTX/XLSX files go
+    through the process-pool parsing stage so the event loop stays free.
+
     Args:
         rag: LightRAG instance
         file_path: Path to the saved file
+        content_hash: SHA-256 of the file, recorded for duplicate detection
     Returns:
-        bool: True if the file was successfully enqueued, False otherwise
+        Optional[str]: The document id if the file was successfully enqueued
+            (or its content is already known), None otherwise
     """
 
     try:
         content = ""
         ext = file_path.suffix.lower()
 
-        file = None
-        async with aiofiles.open(file_path, "rb") as f:
-            file = await f.read()
-
         # Process based on file type
         match ext:
             case (
@@ -471,129 +563,31 @@ async def pipeline_enqueue_file(rag: LightRAG, file_path: Path) -> bool:
                 | ".scss"
                 | ".less"
             ):
-                try:
-                    # Try to decode as UTF-8
-                    content = file.decode("utf-8")
-
-                    # Validate content
-                    if not content or len(content.strip()) == 0:
-                        logger.error(f"Empty content in file: {file_path.name}")
-                        return False
-
-                    # Check if content looks like binary data string representation
-                    if content.startswith("b'") or content.startswith('b"'):
-                        logger.error(
-                            f"File {file_path.name} appears to contain binary data representation instead of text"
-                        )
-                        return False
-
-                except UnicodeDecodeError:
-                    logger.error(
-                        f"File {file_path.name} is not valid UTF-8 encoded text. Please convert it to UTF-8 before processing."
-                    )
-                    return False
-            case ".pdf":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("pypdf2"):  # type: ignore
-                        pm.install("pypdf2")
-                    from PyPDF2 import PdfReader  # type: ignore
-                    from io import BytesIO
-
-                    pdf_file = BytesIO(file)
-                    reader = PdfReader(pdf_file)
-                    for page in reader.pages:
-                        content += page.extract_text() + "\n"
-            case ".docx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("python-docx"):  # type: ignore
-                        pm.install("docx")
-                    from docx import Document  # type: ignore
-                    from io import BytesIO
-
-                    docx_file = BytesIO(file)
-                    doc = Document(docx_file)
-                    content = "\n".join(
-                        [paragraph.text for paragraph in doc.paragraphs]
-                    )
-            case ".pptx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("python-pptx"):  # type: ignore
-                        pm.install("pptx")
-                    from pptx import Presentation  # type: ignore
-                    from io import BytesIO
-
-                    pptx_file = BytesIO(file)
-                    prs = Presentation(pptx_file)
-                    for slide in prs.slides:
-                        for shape in slide.shapes:
-                            if hasattr(shape, "text"):
-                                content += shape.text + "\n"
-            case ".xlsx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("openpyxl"):  # type: ignore
-                        pm.install("openpyxl")
-                    from openpyxl import load_workbook  # type: ignore
-                    from io import BytesIO
-
-                    xlsx_file = BytesIO(file)
-                    wb = load_workbook(xlsx_file)
-                    for sheet in wb:
-                        content += f"Sheet: {sheet.title}\n"
-                        for row in sheet.iter_rows(values_only=True):
-                            content += (
-                                "\t".join(
-                                    str(cell) if cell is not None else ""
-                                    for cell in row
-                                )
-                                + "\n"
-                            )
-                        content += "\n"
+                content = await read_text_file(file_path)
+                if content is None:
+                    return None
+            case ".pdf" | ".docx" | ".pptx" | ".xlsx":
+                # TNC: parse in a worker process instead of on the event loop
+                content = await document_parser.parse(file_path)
             case _:
                 logger.error(
                     f"Unsupported file type: {file_path.name} (extension {ext})"
                 )
-                return False
+                return None
 
         # Insert into the RAG queue
         if content:
-            await rag.apipeline_enqueue_documents(content, file_paths=file_path.name)
+            await rag.apipeline_enqueue_documents(
+                content, file_paths=file_path.name, content_hashes=content_hash
+            )
             logger.info(f"Successfully fetched and enqueued file: {file_path.name}")
-            return True
+            # Same id apipeline_enqueue_documents derives for the document
+            return compute_mdhash_id(clean_text(content), prefix="doc-")
         else:
             logger.error(f"No content could be extracted from file: {file_path.name}")
 
+    except DocumentParseError as e:
+        logger.error(str(e))
     except Exception as e:
         logger.error(f"Error processing or enqueueing file {file_path.name}: {str(e)}")
         logger.error(traceback.format_exc())
@@ -603,18 +597,21 @@ async def pipeline_enqueue_file(rag: LightRAG, file_path: Path) -> bool:
                 file_path.unlink()
             except Exception as e:
                 logger.error(f"Error deleting file {file_path}: {str(e)}")
-    return False
+    return None
 
 
-async def pipeline_index_file(rag: LightRAG, file_path: Path):
+async def pipeline_index_file(
+    rag: LightRAG, file_path: Path, content_hash: Optional[str] = None
+):
     """Index a file
 
     Args:
         rag: LightRAG instance
         file_path: Path to the saved file
+        content_hash: SHA-256 of the file, recorded for duplicate detection
     """
     try:
-        if await pipeline_enqueue_file(rag, file_path):
+        if await pipeline_enqueue_file(rag, file_path, content_hash):
             await rag.apipeline_process_enqueue_documents()
 
     except Exception as e:
@@ -622,31 +619,98 @@ async def pipeline_index_file(rag: LightRAG, file_path: Path):
         logger.error(traceback.format_exc())
 
 
-async def pipeline_index_files(rag: LightRAG, file_paths: List[Path]):
-    """Index multiple files sequentially to avoid high CPU load
+async def pipeline_index_files(
+    rag: LightRAG,
+    file_paths: List[Path],
+    manifest: Optional[InputManifest] = None,
+    content_hashes: Optional[Dict[Path, str]] = None,
+):
+    """Index multiple files
+
+    Files are read and parsed concurrently, at most twice as many as the
+    parser pool has workers (at least 4) at a time, so a large batch neither
+    creates a task per file up front nor holds every text file in memory at
+    once. Each file is enqueued as soon as its parse finishes; processing
+    starts with the first enqueued document instead of waiting for the whole
+    batch.
 
     Args:
         rag: LightRAG instance
         file_paths: Paths to the files to index
+        manifest: Input manifest to record processed files in (directory scans)
+        content_hashes: SHA-256 per file, recorded for duplicate detection
     """
     if not file_paths:
         return
+    processing = None
     try:
         enqueued = False
 
-        # Process files sequentially
-        for file_path in file_paths:
-            if await pipeline_enqueue_file(rag, file_path):
+        async def enqueue(file_path: Path):
+            content_hash = content_hashes.get(file_path) if content_hashes else None
+            return file_path, await pipeline_enqueue_file(rag, file_path, content_hash)
+
+        max_in_flight = max(4, 2 * document_parser.max_workers)
+        remaining = iter(file_paths)
+        pending = set()
+        while True:
+            for file_path in remaining:
+                pending.add(asyncio.create_task(enqueue(file_path)))
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                file_path, doc_id = task.result()
+                if manifest is not None:
+                    # Files that failed are recorded too (without a doc id), so
+                    # scans skip them until they change
+                    previous = await run_blocking(manifest.record, file_path, doc_id)
+                    if previous is not None and previous.doc_id != doc_id:
+                        # The file was modified: drop the document it used to produce
+                        await remove_manifest_doc(rag, manifest, previous)
+                if not doc_id:
+                    continue
                 enqueued = True
+                if processing is None:
+                    processing = asyncio.create_task(
+                        rag.apipeline_process_enqueue_documents()
+                    )
 
-        # Process the queue only if at least one file was successfully enqueued
+        # Process the queue only if at least one file was successfully enqueued.
+        # If the early run is still busy this only flags a pending request, which
+        # makes it pick up the documents enqueued after it started
         if enqueued:
             await rag.apipeline_process_enqueue_documents()
+        if processing is not None:
+            await processing
     except Exception as e:
         logger.error(f"Error indexing files: {str(e)}")
         logger.error(traceback.format_exc())
 
 
+async def remove_manifest_doc(
+    rag: LightRAG, manifest: InputManifest, entry: ManifestEntry
+):
+    """Delete the document a no longer present file version was indexed as
+
+    Args:
+        rag: LightRAG instance
+        manifest: Input manifest the entry was removed or replaced in
+        entry: The manifest entry of the old file version
+    """
+    # Another file with identical content still needs the document
+    if not entry.doc_id or manifest.doc_id_in_use(entry.doc_id):
+        return
+    try:
+        await rag.adelete_by_doc_id(entry.doc_id)
+    except Exception as e:
+        logger.error(f"Error deleting document {entry.doc_id}: {str(e)}")
+
+
 async def pipeline_index_texts(rag: LightRAG, texts: List[str]):
     """Index a list of texts
 
@@ -661,14 +725,51 @@ async def pipeline_index_texts(rag: LightRAG, texts: List[str]):
 
 
 # TODO: deprecate after /insert_file is removed
-async def save_temp_file(input_dir: Path, file: UploadFile = File(...)) -> Path:
+async def save_upload_file(file: UploadFile, file_path: Path) -> str:
+    """Stream an uploaded file to disk in chunks, hashing it on the way
+
+    Args:
+        file: The uploaded file
+        file_path: Destination path
+
+    Returns:
+        str: SHA-256 of the file content
+    """
+    digest = hashlib.sha256()
+    async with aiofiles.open(file_path, "wb") as buffer:
+        while chunk := await file.read(STREAM_CHUNK_SIZE):
+            digest.update(chunk)
+            await buffer.write(chunk)
+    return digest.hexdigest()
+
+
+async def find_duplicate_upload(rag: LightRAG, content_hash: str) -> Optional[str]:
+    """Return the id of an existing document built from identical file content
+
+    Args:
+        rag: LightRAG instance
+        content_hash: SHA-256 of the uploaded file
+
+    Returns:
+        Optional[str]: The document id, or None if the content is new
+    """
+    try:
+        return await rag.doc_status.get_doc_by_content_hash(content_hash)
+    except Exception as e:
+        logger.error(f"Error looking up document by content hash: {str(e)}")
+        return None
+
+
+async def save_temp_file(
+    input_dir: Path, file: UploadFile = File(...)
+) -> tuple[Path, str]:
     """Save the uploaded file to a temporary location
 
     Args:
         file: The uploaded file
 
     Returns:
-        Path: The path to the saved file
+        tuple[Path, str]: The path to the saved file and its SHA-256
     """
     # Generate unique filename to avoid conflicts
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -679,48 +780,94 @@ async def save_temp_file(input_dir: Path, file: UploadFile = File(...)) -> Path:
     temp_path.parent.mkdir(exist_ok=True)
 
     # Save the file
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    return temp_path
+    content_hash = await save_upload_file(file, temp_path)
+    return temp_path, content_hash
 
 
 async def run_scanning_process(rag: LightRAG, doc_manager: DocumentManager):
-    """Background task to scan and index documents"""
-    try:
-        new_files = doc_manager.scan_directory_for_new_files()
-        total_files = len(new_files)
-        logger.info(f"Found {total_files} new files to index.")
-
-        if not new_files:
-            return
-
-        # Get MAX_PARALLEL_INSERT from global_args
-        max_parallel = global_args.max_parallel_insert
-        # Calculate batch size as 2 * MAX_PARALLEL_INSERT
-        batch_size = 2 * max_parallel
-
-        # Process files in batches
-        for i in range(0, total_files, batch_size):
-            batch_files = new_files[i : i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total_files + batch_size - 1) // batch_size
+    """Background task to scan and index documents
 
-            logger.info(
-                f"Processing batch {batch_num}/{total_batches} with {len(batch_files)} files"
+    TNC: the input directory is compared against the workspace's persistent
+    manifest, so only new and modified files are indexed and documents of
+    deleted files are removed.
+    """
+    manifest = doc_manager.get_manifest(rag)
+    if manifest.lock.locked():
+        logger.info(f"Scan already running for workspace {rag.workspace}")
+        return
+    try:
+        async with manifest.lock:
+            changes = await run_blocking(
+                manifest.scan, doc_manager.supported_extensions, temp_prefix
             )
-            await pipeline_index_files(rag, batch_files)
-
-            # Log progress
-            processed = min(i + batch_size, total_files)
             logger.info(
-                f"Processed {processed}/{total_files} files ({processed/total_files*100:.1f}%)"
+                f"Scan found {len(changes.new)} new, {len(changes.modified)} modified, "
+                f"{len(changes.deleted)} deleted and {changes.unchanged} unchanged files."
             )
 
+            for key in changes.deleted:
+                entry = manifest.forget(key)
+                if entry is not None:
+                    await remove_manifest_doc(rag, manifest, entry)
+            if changes.deleted:
+                await run_blocking(manifest.save)
+
+            new_files = changes.new + changes.modified
+            total_files = len(new_files)
+            if not new_files:
+                return
+
+            # Get MAX_PARALLEL_INSERT from global_args
+            max_parallel = global_args.max_parallel_insert
+            # Calculate batch size as 2 * MAX_PARALLEL_INSERT
+            batch_size = 2 * max_parallel
+
+            # Process files in batches
+            for i in range(0, total_files, batch_size):
+                batch_files = new_files[i : i + batch_size]
+                batch_num = i // batch_size + 1
+                total_batches = (total_files + batch_size - 1) // batch_size
+
+                logger.info(
+                    f"Processing batch {batch_num}/{total_batches} with {len(batch_files)} files"
+                )
+                await pipeline_index_files(rag, batch_files, manifest)
+                # Persist progress so a restart resumes instead of rescanning
+                await run_blocking(manifest.save)
+
+                # Log progress
+                processed = min(i + batch_size, total_files)
+                logger.info(
+                    f"Processed {processed}/{total_files} files ({processed/total_files*100:.1f}%)"
+                )
+
     except Exception as e:
         logger.error(f"Error during scanning process: {str(e)}")
         logger.error(traceback.format_exc())
 
 
+async def run_input_watcher(
+    workspace_manager: Any,
+    doc_manager: DocumentManager,
+    workspace: str,
+    interval: float,
+):
+    """TNC: rescan the input directory every ``interval`` seconds
+
+    Each pass only stats files against the manifest, so polling stays cheap on
+    large trees and also works on network shares where inotify is unavailable.
+    """
+    while True:
+        try:
+            async with workspace_manager.lease(workspace) as rag:
+                await run_scanning_process(rag, doc_manager)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in input directory watcher: {str(e)}")
+        await asyncio.sleep(interval)
+
+
 def create_document_routes(
     doc_manager: DocumentManager, api_key: Optional[str] = None # TNC remove rag
 ):
@@ -732,6 +879,7 @@ def create_document_routes(
     )
     async def scan_for_new_documents(
         background_tasks: BackgroundTasks,
+        http_request: Request,
         rag: Any = Depends(get_rag) # TNC
         ):
         """
@@ -745,7 +893,9 @@ def create_document_routes(
             ScanResponse: A response object containing the scanning status
         """
         # Start the scanning process in the background
-        background_tasks.add_task(run_scanning_process, rag, doc_manager)
+        await add_leased_background_task(
+            http_request, background_tasks, run_scanning_process, rag, doc_manager
+        )
         return ScanResponse(
             status="scanning_started",
             message="Scanning process has been initiated in the background",
@@ -756,6 +906,7 @@ def create_document_routes(
     )
     async def upload_to_input_dir(
         background_tasks: BackgroundTasks,
+        http_request: Request,
         file: UploadFile = File(...),
         rag: Any = Depends(get_rag),  #TNC 
         namespace: Optional[str] = Depends(get_resolved_namespace), #TNC
@@ -797,11 +948,30 @@ def create_document_routes(
                     message=f"File '{file.filename}' already exists in the input directory.",
                 )
 
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
+            # TNC: stream to a temp name the scanner skips, hashing on the way
+            partial_path = file_path.with_name(f"{temp_prefix}{file_path.name}")
+            try:
+                content_hash = await save_upload_file(file, partial_path)
+                duplicate_id = await find_duplicate_upload(rag, content_hash)
+                if duplicate_id:
+                    return InsertResponse(
+                        status="duplicated",
+                        message=f"File '{file.filename}' has the same content as document {duplicate_id}.",
+                    )
+                os.replace(partial_path, file_path)
+            finally:
+                if partial_path.exists():
+                    partial_path.unlink()
 
             # Add to background tasks
-            background_tasks.add_task(pipeline_index_file, rag, file_path)
+            await add_leased_background_task(
+                http_request,
+                background_tasks,
+                pipeline_index_file,
+                rag,
+                file_path,
+                content_hash,
+            )
 
             return InsertResponse(
                 status="success",
@@ -817,7 +987,8 @@ def create_document_routes(
     )
     async def insert_text(
         request: InsertTextRequest, 
-        background_tasks: BackgroundTasks, 
+        background_tasks: BackgroundTasks,
+        http_request: Request, 
         rag: Any = Depends(get_rag)
     ):
         """
@@ -837,7 +1008,9 @@ def create_document_routes(
             HTTPException: If an error occurs during text processing (500).
         """
         try:
-            background_tasks.add_task(pipeline_index_texts, rag, [request.text])
+            await add_leased_background_task(
+                http_request, background_tasks, pipeline_index_texts, rag, [request.text]
+            )
             return InsertResponse(
                 status="success",
                 message="Text successfully received. Processing will continue in background.",
@@ -855,6 +1028,7 @@ def create_document_routes(
     async def insert_texts(
         request: InsertTextsRequest,
         background_tasks: BackgroundTasks,
+        http_request: Request,
         rag: Any = Depends(get_rag)
     ):
         """
@@ -874,7 +1048,9 @@ def create_document_routes(
             HTTPException: If an error occurs during text processing (500).
         """
         try:
-            background_tasks.add_task(pipeline_index_texts, rag, request.texts)
+            await add_leased_background_task(
+                http_request, background_tasks, pipeline_index_texts, rag, request.texts
+            )
             return InsertResponse(
                 status="success",
                 message="Text successfully received. Processing will continue in background.",
@@ -890,6 +1066,7 @@ def create_document_routes(
     )
     async def insert_file(
         background_tasks: BackgroundTasks,
+        http_request: Request,
         file: UploadFile = File(...),
         rag: Any = Depends(get_rag), #TNC
         namespace: Optional[str] = Depends(get_resolved_namespace), #TNC
@@ -921,10 +1098,24 @@ def create_document_routes(
                     detail=f"Unsupported file type. Supported types: {doc_manager.supported_extensions}",
                 )
 
-            temp_path = await save_temp_file(doc_manager.input_dir, file)
+            temp_path, content_hash = await save_temp_file(doc_manager.input_dir, file)
+            duplicate_id = await find_duplicate_upload(rag, content_hash)
+            if duplicate_id:
+                temp_path.unlink()
+                return InsertResponse(
+                    status="duplicated",
+                    message=f"File '{file.filename}' has the same content as document {duplicate_id}.",
+                )
 
             # Add to background tasks
-            background_tasks.add_task(pipeline_index_file, rag, temp_path)
+            await add_leased_background_task(
+                http_request,
+                background_tasks,
+                pipeline_index_file,
+                rag,
+                temp_path,
+                content_hash,
+            )
 
             return InsertResponse(
                 status="success",
@@ -943,6 +1134,7 @@ def create_document_routes(
     )
     async def insert_batch(
         background_tasks: BackgroundTasks,
+        http_request: Request,
         files: List[UploadFile] = File(...),
         rag: Any = Depends(get_rag), #TNC
         namespace: Optional[str] = Depends(get_resolved_namespace), #TNC
@@ -969,6 +1161,7 @@ def create_document_routes(
             inserted_count = 0
             failed_files = []
             temp_files = []
+            content_hashes = {}
 
             for file in files:
                 #-------------------------TNC-----------------------------
@@ -977,13 +1170,31 @@ def create_document_routes(
                 #------------------------------------------------------
                 if doc_manager.is_supported_file(file.filename):
                     # Create a temporary file to save the uploaded content
-                    temp_files.append(await save_temp_file(doc_manager.input_dir, file))
+                    temp_path, content_hash = await save_temp_file(
+                        doc_manager.input_dir, file
+                    )
+                    # Reject content already indexed or repeated within this batch
+                    if content_hash in content_hashes.values() or (
+                        await find_duplicate_upload(rag, content_hash)
+                    ):
+                        temp_path.unlink()
+                        failed_files.append(f"{file.filename} (duplicated)")
+                        continue
+                    temp_files.append(temp_path)
+                    content_hashes[temp_path] = content_hash
                     inserted_count += 1
                 else:
                     failed_files.append(f"{file.filename} (unsupported type)")
 
             if temp_files:
-                background_tasks.add_task(pipeline_index_files, rag, temp_files)
+                await add_leased_background_task(
+                    http_request,
+                    background_tasks,
+                    pipeline_index_files,
+                    rag,
+                    temp_files,
+                    content_hashes=content_hashes,
+                )
 
             # Prepare status message
             if inserted_count == len(files):
@@ -1035,6 +1246,7 @@ def create_document_routes(
         from lightrag.kg.shared_storage import (
             get_namespace_data,
             get_pipeline_status_lock,
+            pipeline_is_busy,  # TNC
         )
 
         # Get pipeline status and lock
@@ -1043,7 +1255,7 @@ def create_document_routes(
 
         # Check and set status with lock
         async with pipeline_status_lock:
-            if pipeline_status.get("busy", False):
+            if pipeline_is_busy(pipeline_status):  # TNC
                 return ClearDocumentsResponse(
                     status="busy",
                     message="Cannot clear documents while pipeline is busy",
@@ -1052,6 +1264,7 @@ def create_document_routes(
             pipeline_status.update(
                 {
                     "busy": True,
+                    "busy_pid": os.getpid(),  # TNC
                     "job_name": "Clearing Documents",
                     "job_start": datetime.now().isoformat(),
                     "docs": 0,
@@ -1147,6 +1360,9 @@ def create_document_routes(
                         logger.error(f"Error deleting file {file_path}: {str(e)}")
                         file_errors_count += 1
 
+            # TNC: storage was dropped, so nothing in the input dir is indexed anymore
+            await run_blocking(doc_manager.get_manifest(rag).clear)
+
             # Log file deletion results
             if "history_messages" in pipeline_status:
                 if file_errors_count > 0:
@@ -1265,13 +1481,30 @@ def create_document_routes(
         "", response_model=DocsStatusesResponse, dependencies=[Depends(combined_auth)]
     )
     async def documents(
-        rag: Any = Depends(get_rag) #TNC
+        rag: Any = Depends(get_rag), #TNC
+        status: Optional[DocStatus] = Query(
+            default=None, description="Only return documents with this status"
+        ),
+        limit: int = Query(
+            default=1000, ge=1, le=10000, description="Maximum documents per status"
+        ),
+        cursor: Optional[str] = Query(
+            default=None, description="Cursor from a previous response (with status)"
+        ),
         ) -> DocsStatusesResponse:
         """
-        Get the status of all documents in the system.
+        Get the status of documents in the system, one page per status.
+
+        This endpoint retrieves documents grouped by their processing status
+        (PENDING, PROCESSING, PROCESSED, FAILED), at most ``limit`` per status and
+        without their content. When a status has more documents, its cursor is
+        returned in ``cursors``; request ``?status=<status>&cursor=<cursor>`` for the
+        next page. ``status_counts`` always holds the totals.
 
-        This endpoint retrieves the current status of all documents, grouped by their
-        processing status (PENDING, PROCESSING, PROCESSED, FAILED).
+        Args:
+            status: Restrict the response to a single status.
+            limit: Maximum number of documents returned per status.
+            cursor: Paging cursor for ``status``, taken from a previous response.
 
         Returns:
             DocsStatusesResponse: A response object containing a dictionary where keys are
@@ -1282,20 +1515,36 @@ def create_document_routes(
             HTTPException: If an error occurs while retrieving document statuses (500).
         """
         try:
-            statuses = (
-                DocStatus.PENDING,
-                DocStatus.PROCESSING,
-                DocStatus.PROCESSED,
-                DocStatus.FAILED,
-            )
+            if status is not None:
+                statuses = (status,)
+            else:
+                if cursor is not None:
+                    raise HTTPException(
+                        status_code=400, detail="cursor requires a status filter"
+                    )
+                statuses = (
+                    DocStatus.PENDING,
+                    DocStatus.PROCESSING,
+                    DocStatus.PROCESSED,
+                    DocStatus.FAILED,
+                )
 
-            tasks = [rag.get_docs_by_status(status) for status in statuses]
-            results: List[Dict[str, DocProcessingStatus]] = await asyncio.gather(*tasks)
+            # TNC: keyset pages with a summary projection instead of every record
+            tasks = [
+                rag.doc_status.get_docs_page(doc_status, limit, cursor)
+                for doc_status in statuses
+            ]
+            results: List[Tuple[Dict[str, DocProcessingStatus], Optional[str]]]
+            *results, status_counts = await asyncio.gather(
+                *tasks, rag.doc_status.get_status_counts()
+            )
 
-            response = DocsStatusesResponse()
+            response = DocsStatusesResponse(status_counts=status_counts)
 
-            for idx, result in enumerate(results):
+            for idx, (result, next_cursor) in enumerate(results):
                 status = statuses[idx]
+                if next_cursor is not None:
+                    response.cursors[status] = next_cursor
                 for doc_id, doc_status in result.items():
                     if status not in response.statuses:
                         response.statuses[status] = []
@@ -1318,6 +1567,8 @@ def create_document_routes(
                         )
                     )
             return response
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error GET /documents: {str(e)}")
             logger.error(traceback.format_exc())
@@ -8,23 +8,24 @@
  Created by TechNexusClarity.
  Description: Inserts the Rag instance into the FastAPI app.
  """
-from ..utils_api_tnc import get_resolved_namespace, get_rag_from_app
+from ..utils_api_tnc import get_resolved_namespace, lease_rag_from_app
 from fastapi import Request, Depends
 from lightrag.lightrag import LightRAG 
-from typing import Optional
+from typing import AsyncIterator, Optional
 # Creates or returns rag instance
 async def get_rag(
     request: Request,
     namespace: Optional[str] = Depends(get_resolved_namespace)
-) -> LightRAG:
-    return await get_rag_from_app(request, namespace)
+) -> AsyncIterator[LightRAG]:
+    async with lease_rag_from_app(request, namespace) as rag:
+        yield rag
 # --------------------------------------------------------------------
 """
 This module contains all graph-related routes for the LightRAG API.
 """
 
-from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query, Response
 
 from ..utils_api import get_combined_auth_dependency
 
@@ -36,15 +37,39 @@ def create_graph_routes(api_key: Optional[str] = None):  # TNC remove rag
 
     @router.get("/graph/label/list", dependencies=[Depends(combined_auth)])
     async def get_graph_labels(
+        response: Response,
+        search: str = Query("", description="Case-insensitive label prefix"),
+        limit: Optional[int] = Query(
+            None, description="Maximum labels to return, all if omitted", ge=1, le=10000
+        ),
+        offset: int = Query(0, description="Number of matching labels to skip", ge=0),
+        order_by: Literal["name", "degree"] = Query(
+            "name", description="Sort by name, or by degree (most connected first)"
+        ),
+        fuzzy: bool = Query(
+            False, description="Also match labels containing the search text"
+        ),
         rag=Depends(get_rag) # TNC
     ):
         """
-        Get all graph labels
+        Get graph labels from the label index, optionally filtered and paged
+
+        Args:
+            search (str): Case-insensitive label prefix, empty for all labels
+            limit (int, optional): Maximum labels to return
+            offset (int): Number of matching labels to skip
+            order_by (str): "name" or "degree"
+            fuzzy (bool): Also match substrings and characters in order
 
         Returns:
-            List[str]: List of graph labels
+            List[str]: List of graph labels; the X-Total-Count header holds the
+            number of matching labels
         """
-        return await rag.get_graph_labels()
+        labels, total = await rag.search_graph_labels(
+            search, limit, offset, order_by, fuzzy
+        )
+        response.headers["X-Total-Count"] = str(total)
+        return labels
 
     @router.get("/graphs", dependencies=[Depends(combined_auth)])
     async def get_knowledge_graph(
@@ -8,16 +8,17 @@
  Created by TechNexusClarity.
  Description: Inserts the Rag instance into the FastAPI app.
  """
-from ..utils_api_tnc import get_resolved_namespace, get_rag_from_app
+from ..utils_api_tnc import get_resolved_namespace, lease_rag_from_app
 from fastapi import Request, Depends
 from lightrag.lightrag import LightRAG
-from typing import Optional, Any
+from typing import AsyncIterator, Optional, Any
 # Creates or returns rag instance
 async def get_rag(
     request: Request,
     namespace: Optional[str] = Depends(get_resolved_namespace)
-) -> Any:
-    return await get_rag_from_app(request, namespace)
+) -> AsyncIterator[Any]:
+    async with lease_rag_from_app(request, namespace) as rag:
+        yield rag
 # --------------------------------------------------------------------
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
@@ -8,16 +8,17 @@
  Created by TechNexusClarity.
  Description: Injects Rag instance into the FastAPI app.
  """
-from ..utils_api_tnc import get_resolved_namespace, get_rag_from_app
+from ..utils_api_tnc import get_resolved_namespace, lease_rag_from_app
 from fastapi import Request, Depends
 from lightrag.lightrag import LightRAG 
-from typing import Optional
+from typing import AsyncIterator, Optional
 # Creates or returns rag instance
 async def get_rag(
     request: Request,
     namespace: Optional[str] = Depends(get_resolved_namespace)
-) -> LightRAG:
-    return await get_rag_from_app(request, namespace)
+) -> AsyncIterator[LightRAG]:
+    async with lease_rag_from_app(request, namespace) as rag:
+        yield rag
 # --------------------------------------------------------------------
 """
 This module contains all query-related routes for the LightRAG API.
@@ -30,7 +31,6 @@ from typing import Any, Dict, List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from lightrag.base import QueryParam
 from ..utils_api import get_combined_auth_dependency
-from ..utils_api_tnc import get_rag_from_app
 from pydantic import BaseModel, Field, field_validator
 
 from ascii_colors import trace_exception
@@ -99,6 +99,19 @@ class QueryRequest(BaseModel):
         description="List of low-level keywords to refine retrieval focus.",
     )
 
+    # TNC
+    fast_keywords: Optional[bool] = Field(
+        default=None,
+        description="Derive keywords by matching the query against graph entity names and relation keywords instead of an LLM call.",
+    )
+
+    fast_keywords_min_coverage: Optional[float] = Field(
+        ge=0.0,
+        le=1.0,
+        default=None,
+        description="Share of query words the matches must cover for the fast keyword path, otherwise the LLM is used.",
+    )
+
     conversation_history: Optional[List[Dict[str, Any]]] = Field(
         default=None,
         description="Stores past conversation history to maintain context. Format: [{'role': 'user/assistant', 'content': 'message'}].",
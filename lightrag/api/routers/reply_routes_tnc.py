@@ -9,9 +9,9 @@
 """
 import json
 import logging
-from typing import Any, Dict, List, Optional, Literal
+from typing import Any, AsyncIterator, Dict, List, Optional, Literal
 from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
-from ..utils_api_tnc import get_resolved_namespace, get_rag_from_app
+from ..utils_api_tnc import get_resolved_namespace, lease_rag_from_app
 from pydantic import BaseModel, Field, field_validator
 from lightrag.base_tnc import ReplyParam, CoachMessage as BaseCoachMessage, AISuggestion as BaseAISuggestion
 from ascii_colors import trace_exception
@@ -26,8 +26,9 @@ router = APIRouter(tags=["reply"])
 async def get_rag(
     request: Request,
     namespace: Optional[str] = Depends(get_resolved_namespace)
-) -> LightRAG:
-    return await get_rag_from_app(request, namespace)
+) -> AsyncIterator[LightRAG]:
+    async with lease_rag_from_app(request, namespace) as rag:
+        yield rag
 
 # Reply Roles
 role_user = os.getenv("REPLY_ROLE_USER")
@@ -6,10 +6,10 @@ Start LightRAG server with Gunicorn
 import os
 import sys
 import signal
-import pipmaster as pm
 from lightrag.api.utils_api import display_splash_screen, check_env_file
 from lightrag.kg.shared_storage import initialize_share_data, finalize_share_data
 from .config import global_args
+from lightrag.utils import ensure_package  # TNC
 
 
 def check_and_install_dependencies():
@@ -22,10 +22,7 @@ def check_and_install_dependencies():
     ]
 
     for package in required_packages:
-        if not pm.is_installed(package):
-            print(f"Installing {package}...")
-            pm.install(package)
-            print(f"{package} installed successfully")
+        ensure_package(package)  # TNC: no pipmaster scan when already installed
 
 
 # Signal handler for graceful shutdown
@@ -10,10 +10,11 @@
 import re
 import os
 import argparse
-from typing import Optional, List, Tuple
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, List, Tuple
 import sys
 from ascii_colors import ASCIIColors
-from fastapi import HTTPException, Security, Header, Query, Request
+from fastapi import BackgroundTasks, HTTPException, Security, Header, Query, Request
 
 from lightrag.lightrag import LightRAG  
 async def get_rag_from_app(request: Request, workspace: Optional[str] = None) -> LightRAG:
@@ -35,6 +36,57 @@ async def get_rag_from_app(request: Request, workspace: Optional[str] = None) ->
     ASCIIColors.green("\nServer is ready to accept connections! 🚀\n")
     return rag_instance
 
+@asynccontextmanager
+async def lease_rag_from_app(request: Request, workspace: Optional[str] = None) -> AsyncIterator[LightRAG]:
+    """
+    Context manager that holds a reference on the workspace's LightRAG instance
+    for the lifetime of the request, so the workspace manager cannot finalize it
+    while the request is still using it.
+
+    Args:
+        request (Request): The FastAPI request object.
+        workspace (Optional[str]): Optional workspace for multi-tenant instantiation.
+
+    Yields:
+        LightRAG: An initialized LightRAG instance.
+    """
+    manager = getattr(request.app.state, "workspace_manager", None)
+    if manager is None:
+        yield await get_rag_from_app(request, workspace)
+        return
+
+    async with manager.lease(workspace or "default") as rag_instance:
+        yield rag_instance
+
+async def add_leased_background_task(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    func: Callable[..., Awaitable[Any]],
+    rag: LightRAG,
+    *args: Any,
+    **kwargs: Any,
+) -> None:
+    """
+    Schedule ``func(rag, *args, **kwargs)`` as a background task that keeps its own reference
+    on the workspace instance, so ingestion started by a request is not cut off
+    when the request's lease ends and the instance becomes eligible for eviction.
+    """
+    manager = getattr(request.app.state, "workspace_manager", None)
+    if manager is None:
+        background_tasks.add_task(func, rag, *args, **kwargs)
+        return
+
+    # The request still holds its lease, so this is a cache hit on the same instance
+    await manager.acquire(rag.workspace)
+
+    async def _run_leased():
+        try:
+            await func(rag, *args, **kwargs)
+        finally:
+            await manager.release(rag.workspace)
+
+    background_tasks.add_task(_run_leased)
+
 def get_resolved_namespace(
     namespace: Optional[str] = Query(default=None),
     x_namespace: Optional[str] = Header(default=None, alias="X-Namespace"),
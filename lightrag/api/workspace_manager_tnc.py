@@ -0,0 +1,254 @@
+"""
+ * ┌─────────────────────────────────────────────┐
+ * │ TechNexusClarity Custom Module              │
+ * │ Not part of upstream open source repo       │
+ * └─────────────────────────────────────────────┘
+ *
+ * Description: Multi-tenant LightRAG instance manager.
+ * Owner: TechNexusClarity
+
+Keeps one initialized LightRAG instance per workspace with:
+  - single-flight creation (concurrent first requests share one initialization)
+  - LRU eviction bounded by ``max_instances`` plus an idle TTL
+  - reference counting so instances in use are never finalized
+  - hit/miss/eviction metrics
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from lightrag.lightrag import LightRAG
+from lightrag.utils import logger
+
+
+@dataclass
+class _WorkspaceEntry:
+    rag: LightRAG
+    ref_count: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class WorkspaceManager:
+    """LRU/TTL cache of initialized LightRAG instances keyed by workspace."""
+
+    def __init__(
+        self,
+        factory: Callable[[str], LightRAG],
+        max_instances: int = 2,
+        idle_ttl: float = 0,
+        on_created: Optional[Callable[[LightRAG], Awaitable[Any]]] = None,
+    ):
+        """
+        Args:
+            factory: Builds an uninitialized LightRAG instance for a workspace.
+            max_instances: Soft limit of resident instances. Instances that are
+                still in use are never evicted, so the limit can be exceeded
+                temporarily under load.
+            idle_ttl: Seconds an unused instance may stay resident; 0 disables.
+            on_created: Optional coroutine run after storages are initialized.
+        """
+        self._factory = factory
+        self.max_instances = max(1, int(max_instances))
+        self.idle_ttl = float(idle_ttl or 0)
+        self._on_created = on_created
+        self._entries: "OrderedDict[str, _WorkspaceEntry]" = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "creation_failures": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    async def acquire(self, workspace: str) -> LightRAG:
+        """Return the instance for ``workspace`` and take a reference on it.
+
+        Every call must be paired with :meth:`release`; prefer :meth:`lease`.
+        """
+        while True:
+            async with self._lock:
+                if self._closed:
+                    raise RuntimeError("WorkspaceManager has been closed")
+                entry = self._entries.get(workspace)
+                if entry is not None:
+                    self._entries.move_to_end(workspace)
+                    entry.ref_count += 1
+                    entry.last_used = time.monotonic()
+                    self._metrics["hits"] += 1
+                    return entry.rag
+
+                pending = self._pending.get(workspace)
+                creator = pending is None
+                if creator:
+                    pending = asyncio.get_running_loop().create_future()
+                    self._pending[workspace] = pending
+                    self._metrics["misses"] += 1
+                else:
+                    self._metrics["coalesced"] += 1
+
+            if not creator:
+                # Wait for the in-flight creation, then retry the lookup so the
+                # reference is taken under the lock.
+                await asyncio.shield(pending)
+                continue
+
+            try:
+                rag = await self._create(workspace)
+            except BaseException as e:
+                async with self._lock:
+                    self._pending.pop(workspace, None)
+                    self._metrics["creation_failures"] += 1
+                if isinstance(e, Exception):
+                    pending.set_exception(e)
+                    # Mark the exception as retrieved when nobody else awaited it
+                    pending.exception()
+                else:
+                    # Creator was cancelled: let waiters retry the creation
+                    pending.set_result(None)
+                raise
+
+            async with self._lock:
+                self._pending.pop(workspace, None)
+                self._entries[workspace] = _WorkspaceEntry(rag=rag, ref_count=1)
+                evicted = self._collect_evictions()
+            pending.set_result(None)
+            await self._finalize(evicted)
+            return rag
+
+    async def release(self, workspace: str) -> None:
+        """Drop a reference taken by :meth:`acquire`."""
+        async with self._lock:
+            entry = self._entries.get(workspace)
+            if entry is None:
+                return
+            entry.ref_count = max(0, entry.ref_count - 1)
+            entry.last_used = time.monotonic()
+            evicted = self._collect_evictions()
+        await self._finalize(evicted)
+
+    @asynccontextmanager
+    async def lease(self, workspace: str) -> AsyncIterator[LightRAG]:
+        """Context manager holding a reference for the duration of the block."""
+        rag = await self.acquire(workspace)
+        try:
+            yield rag
+        finally:
+            await self.release(workspace)
+
+    async def get(self, workspace: str) -> LightRAG:
+        """Return the instance without holding a reference.
+
+        Kept for callers of the legacy ``rag_factory``; the instance may be
+        evicted once it is idle, so long-running work should use :meth:`lease`.
+        """
+        rag = await self.acquire(workspace)
+        await self.release(workspace)
+        return rag
+
+    async def evict_idle(self) -> int:
+        """Finalize instances idle for longer than ``idle_ttl``."""
+        async with self._lock:
+            evicted = self._collect_evictions()
+        await self._finalize(evicted)
+        return len(evicted)
+
+    async def run_sweeper(self, interval: Optional[float] = None) -> None:
+        """Background loop evicting idle instances until cancelled."""
+        if self.idle_ttl <= 0:
+            return
+        interval = interval or max(1.0, self.idle_ttl / 2)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.warning(f"Workspace sweeper failed: {e}")
+
+    async def close(self) -> None:
+        """Finalize every resident instance regardless of reference counts."""
+        async with self._lock:
+            self._closed = True
+            evicted = list(self._entries.items())
+            self._entries.clear()
+        await self._finalize(evicted)
+
+    def get_metrics(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self._metrics,
+            "max_instances": self.max_instances,
+            "idle_ttl": self.idle_ttl,
+            "resident": len(self._entries),
+            "pending": len(self._pending),
+            "workspaces": {
+                ws: {
+                    "ref_count": entry.ref_count,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                }
+                for ws, entry in self._entries.items()
+            },
+        }
+
+    @property
+    def instances(self) -> dict[str, LightRAG]:
+        return {ws: entry.rag for ws, entry in self._entries.items()}
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+    async def _create(self, workspace: str) -> LightRAG:
+        logger.info(f"Creating RAG instance for workspace: {workspace}")
+        rag = self._factory(workspace)
+        try:
+            await rag.initialize_storages()
+            if self._on_created is not None:
+                await self._on_created(rag)
+        except BaseException:
+            try:
+                await rag.finalize_storages()
+            except Exception as e:
+                logger.warning(f"Failed to clean up RAG instance for {workspace}: {e}")
+            raise
+        return rag
+
+    def _collect_evictions(self) -> list[tuple[str, _WorkspaceEntry]]:
+        """Pop idle and over-capacity entries; caller must hold ``_lock``."""
+        evicted: list[tuple[str, _WorkspaceEntry]] = []
+        now = time.monotonic()
+
+        if self.idle_ttl > 0:
+            for ws, entry in list(self._entries.items()):
+                if entry.ref_count == 0 and now - entry.last_used > self.idle_ttl:
+                    evicted.append((ws, self._entries.pop(ws)))
+                    self._metrics["expirations"] += 1
+
+        # OrderedDict iteration runs from least to most recently used
+        overflow = len(self._entries) - self.max_instances
+        if overflow > 0:
+            for ws, entry in list(self._entries.items()):
+                if overflow <= 0:
+                    break
+                if entry.ref_count == 0:
+                    evicted.append((ws, self._entries.pop(ws)))
+                    self._metrics["evictions"] += 1
+                    overflow -= 1
+        return evicted
+
+    async def _finalize(self, evicted: list[tuple[str, _WorkspaceEntry]]) -> None:
+        for ws, entry in evicted:
+            try:
+                await entry.rag.finalize_storages()
+                logger.info(f"Evicted and finalized RAG instance for workspace: {ws}")
+            except Exception as e:
+                logger.warning(f"Failed to finalize RAG instance for {ws}: {e}")
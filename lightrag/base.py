@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from enum import Enum
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import (
     Any,
     Literal,
@@ -15,6 +17,7 @@ from typing import (
 import numpy as np
 from .utils import EmbeddingFunc
 from .types import KnowledgeGraph
+from .kg.cache_policy_tnc import CachePolicy
 
 # use the .env that is inside the current folder
 # allows to use different .env file for each lightrag instance
@@ -77,6 +80,14 @@ class QueryParam:
     ll_keywords: list[str] = field(default_factory=list)
     """List of low-level keywords to refine retrieval focus."""
 
+    fast_keywords: bool = os.getenv("FAST_KEYWORDS", "false").lower() == "true"
+    """If True, derive keywords by matching the query against the graph's entity names and relation keywords instead of asking the LLM."""
+
+    fast_keywords_min_coverage: float = float(
+        os.getenv("FAST_KEYWORDS_MIN_COVERAGE", "0.5")
+    )
+    """Share of the query's content words the matches must cover for the fast keyword path; below it the LLM extracts the keywords."""
+
     conversation_history: list[dict[str, str]] = field(default_factory=list)
     """Stores past conversation history to maintain context.
     Format: [{"role": "user/assistant", "content": "message"}].
@@ -274,6 +285,58 @@ class BaseKVStorage(StorageNameSpace, ABC):
              False: if the cache drop failed, or the cache mode is not supported
         """
 
+    # TNC: LLM response cache entries keyed by (mode, args_hash). The defaults
+    # keep each mode's entries in one record (read and rewritten as a whole);
+    # the bundled backends store one record per entry.
+
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        """Get one LLM cache entry"""
+        bucket = await self.get_by_id(mode) or {}
+        return bucket.get(args_hash)
+
+    async def get_cache_entries(self, mode: str) -> dict[str, dict[str, Any]]:
+        """Get all LLM cache entries of a mode, keyed by args_hash"""
+        return await self.get_by_id(mode) or {}
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        """Insert or replace one LLM cache entry
+
+        Importance notes for in-memory storage:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. update flags to notify other processes that data persistence is needed
+        """
+        bucket = await self.get_by_id(mode) or {}
+        bucket[args_hash] = entry
+        await self.upsert({mode: bucket})
+
+    async def delete_cache_entries(self, mode: str, args_hashes: list[str]) -> None:
+        """Delete LLM cache entries of a mode"""
+        bucket = await self.get_by_id(mode)
+        if bucket:
+            for args_hash in args_hashes:
+                bucket.pop(args_hash, None)
+            await self.upsert({mode: bucket})
+
+    async def touch_cache_entries(self, hits: dict[tuple[str, str], float]) -> None:
+        """Record the last hit time of LLM cache entries, keyed by (mode, args_hash)
+
+        Storages that cannot evict by recency ignore hits.
+        """
+
+    async def evict_cache_entries(
+        self, cache_type: str, policy: CachePolicy, now: float
+    ) -> int:
+        """Delete LLM cache entries of a cache_type beyond the policy's limits
+
+        See cache_policy_tnc.select_evictions for the order of eviction.
+
+        Returns:
+            The number of entries deleted; 0 if the storage does not evict
+        """
+        return 0
+
 
 @dataclass
 class BaseGraphStorage(StorageNameSpace, ABC):
@@ -356,6 +419,315 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             indicating whether the graph was truncated due to max_nodes limit
         """
 
+    # TNC: shared subgraph engine used by get_knowledge_graph implementations
+    async def get_neighbors_batch(self, node_ids: list[str]) -> dict[str, list[str]]:
+        """Get the neighbor ids of several nodes, backends override this with one query."""
+        neighbors: dict[str, list[str]] = {}
+        for node_id in node_ids:
+            edges = await self.get_node_edges(node_id) or []
+            neighbors[node_id] = [tgt if src == node_id else src for src, tgt in edges]
+        return neighbors
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        """Get the degrees of several nodes, backends override this with one query."""
+        return {node_id: await self.node_degree(node_id) or 0 for node_id in node_ids}
+
+    async def bfs_subgraph_nodes(
+        self, start: str, max_depth: int, max_nodes: int
+    ) -> tuple[list[str], bool]:
+        """Select the nodes of a subgraph by level-by-level BFS with a node budget.
+
+        Each level is expanded with one get_neighbors_batch call. When a level
+        does not fit into the remaining budget, its nodes with the highest
+        degree are kept. The flag is True only if a node within max_depth was
+        left out.
+
+        Returns:
+            The selected node ids in BFS order (start first) and the truncation flag
+        """
+        selected = [start]
+        visited = {start}
+        frontier = [start]
+        depth = 0
+        while frontier and depth < max_depth:
+            neighbors = await self.get_neighbors_batch(frontier)
+            candidates: list[str] = []
+            for node_id in frontier:
+                for neighbor in neighbors.get(node_id, []):
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        candidates.append(neighbor)
+            if not candidates:
+                break
+
+            remaining = max_nodes - len(selected)
+            if len(candidates) > remaining:
+                if remaining > 0:
+                    degrees = await self.node_degrees_batch(candidates)
+                    candidates.sort(key=lambda n: degrees.get(n, 0), reverse=True)
+                    selected.extend(candidates[:remaining])
+                return selected, True
+
+            selected.extend(candidates)
+            frontier = candidates
+            depth += 1
+        return selected, False
+
+    # TNC: label index behind /graph/label/list, see kg/label_index_tnc.py
+    maintains_label_index = False
+    """True if the write methods keep the label index up to date. A stale index
+    (other backends, or a newer label version published by another process) is
+    rebuilt in the background at most every LABEL_INDEX_TTL seconds."""
+
+    _label_index = None
+    _label_index_task = None
+    _labels_changed = False
+
+    async def get_all_label_degrees(self) -> dict[str, int]:
+        """Get the degree of every node, backends override this with one query."""
+        labels = await self.get_all_labels()
+        degrees: dict[str, int] = {}
+        for i in range(0, len(labels), 1000):
+            degrees.update(await self.node_degrees_batch(labels[i : i + 1000]))
+        return degrees
+
+    async def search_labels(
+        self,
+        query: str = "",
+        limit: int | None = None,
+        offset: int = 0,
+        order_by: Literal["name", "degree"] = "name",
+        fuzzy: bool = False,
+    ) -> tuple[list[str], int]:
+        """Search node labels in this process's label index.
+
+        Args:
+            query: Case-insensitive label prefix, empty for all labels
+            limit: Page size, None for all matches
+            offset: Number of matches to skip
+            order_by: "name", or "degree" for the most connected nodes first
+            fuzzy: Also match labels containing the query or its characters in order
+
+        Returns:
+            The requested page of labels and the total number of matches
+        """
+        index = await self._get_label_index()
+        if order_by == "degree":
+            stale = index.take_stale_degrees()
+            if stale:
+                index.set_degrees(await self.node_degrees_batch(stale))
+        return index.search(query, limit, offset, order_by, fuzzy)
+
+    def _label_version(self) -> int:
+        from .kg.label_index_tnc import current_label_version, label_version_key
+
+        return current_label_version(
+            label_version_key(self.namespace, self.global_config.get("workspace"))
+        )
+
+    async def _get_label_index(self, wait: bool = True):
+        """Get this process's label index, possibly stale.
+
+        Only the first build is waited for (and shared by concurrent callers);
+        a stale index keeps being served while its replacement is built in the
+        background. With wait=False a missing index is only scheduled and None
+        is returned.
+        """
+        index = self._label_index
+        if index is None:
+            task = self._rebuild_label_index()
+            return await asyncio.shield(task) if wait else None
+        if not self.maintains_label_index or index.version < self._label_version():
+            ttl = float(os.getenv("LABEL_INDEX_TTL", "60"))
+            if time.monotonic() - index.built_at >= ttl:
+                self._rebuild_label_index()
+        return index
+
+    def _rebuild_label_index(self) -> asyncio.Task:
+        if self._label_index_task is None or self._label_index_task.done():
+            self._label_index_task = asyncio.create_task(self._build_label_index())
+            self._label_index_task.add_done_callback(self._label_index_built)
+        return self._label_index_task
+
+    async def _build_label_index(self):
+        from .kg.label_index_tnc import LabelIndex
+
+        # Read before the labels: a change published meanwhile makes it stale
+        version = self._label_version()
+        if self.maintains_label_index:
+            index = LabelIndex(await self.get_all_label_degrees(), version)
+        else:
+            # Per-node degree queries only when a degree-ordered page asks
+            index = LabelIndex(dict.fromkeys(await self.get_all_labels(), 0), version)
+            index.mark_degrees_stale(index.labels())
+        if self._label_index is not None:
+            index.inherit_scores(self._label_index)
+        self._label_index = index
+        return index
+
+    def _label_index_built(self, task: asyncio.Task) -> None:
+        from .utils import logger
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                f"Error building the label index of {self.namespace}: {task.exception()}"
+            )
+
+    _centrality_task = None
+
+    async def cached_node_degrees(self, node_ids: list[str]) -> dict[str, int]:
+        """Get node degrees from the label index instead of querying each node.
+
+        Used only when the backend maintains the index and it is current;
+        degrees of edges changed since the last call are refreshed in one
+        batch and nodes missing from the index are counted as 0. Otherwise
+        the degrees of just these nodes are queried with node_degrees_batch.
+        """
+        if self.maintains_label_index:
+            index = await self._get_label_index(wait=False)
+            if index is not None and index.version >= self._label_version():
+                stale = index.take_stale_degrees()
+                if stale:
+                    index.set_degrees(await self.node_degrees_batch(stale))
+                degrees = index.degrees(node_ids)
+                return {node_id: degrees.get(node_id, 0) for node_id in node_ids}
+        return await self.node_degrees_batch(node_ids)
+
+    async def node_centrality(self, node_ids: list[str]) -> dict[str, float]:
+        """Get PageRank scores of nodes, all 0 until the first computation.
+
+        With GRAPH_PAGERANK_INTERVAL > 0 the scores are recomputed in the
+        background at most that often, after the label index was rebuilt or
+        changed. With 0 (the default) PageRank is disabled.
+        """
+        interval = float(os.getenv("GRAPH_PAGERANK_INTERVAL", "0"))
+        if interval <= 0:
+            return {}
+        index = await self._get_label_index(wait=False)
+        if index is None:
+            return {}
+        due = (
+            index.scores_computed_at is None
+            or (self._labels_changed or index.version > index.scores_version)
+            and time.monotonic() - index.scores_computed_at >= interval
+        )
+        if due and (self._centrality_task is None or self._centrality_task.done()):
+            self._centrality_task = asyncio.create_task(self._compute_centrality(index))
+        return index.scores(node_ids)
+
+    async def _compute_centrality(self, index) -> None:
+        from .kg.label_index_tnc import pagerank
+        from .utils import logger, run_blocking
+
+        version = index.version
+        try:
+            edges = await self.get_all_edge_pairs()
+            index.set_scores(await run_blocking(pagerank, edges))
+            index.scores_version = version
+            logger.info(f"Computed PageRank of {len(edges)} edges for {self.namespace}")
+        except Exception as e:
+            logger.error(f"Error computing PageRank for {self.namespace}: {e}")
+            index.scores_computed_at = time.monotonic()
+
+    async def get_all_edge_pairs(self) -> list[tuple[str, str]]:
+        """Get every edge as a (source, target) pair, backends override this with one query."""
+        labels = await self.get_all_labels()
+        pairs = []
+        for i in range(0, len(labels), 1000):
+            neighbors = await self.get_neighbors_batch(labels[i : i + 1000])
+            for source, targets in neighbors.items():
+                pairs.extend((source, t) for t in targets if source < t)
+        return pairs
+
+    async def get_all_relation_keywords(self) -> list[str]:
+        """Get the keywords field of every edge; backends without an override
+        match entity names only."""
+        return []
+
+    async def match_keywords(self, text: str) -> tuple[list[str], list[str], float]:
+        """Match a text against the entity names and relation keywords of the graph.
+
+        The phrase trie is built in the background on first use (on the
+        blocking executor) and then maintained with the label index. Until
+        both exist nothing matches, so the caller asks the LLM instead.
+
+        Returns:
+            Matched entity names, matched relation keywords, and the share of
+            the text's content words they cover
+        """
+        index = await self._get_label_index(wait=False)
+        if index is None:
+            # Not built yet: let the LLM extract the keywords meanwhile
+            return [], [], 0.0
+        if index.trie is None:
+            # One build per index, started but not waited for
+            if self._trie_task is None or self._trie_index is not index:
+                self._trie_index = index
+                self._trie_task = asyncio.create_task(self._build_trie(index))
+                self._trie_task.add_done_callback(self._trie_built)
+            return [], [], 0.0
+        return index.trie.match(text)
+
+    _trie_task = None
+    _trie_index = None
+
+    async def _build_trie(self, index) -> None:
+        from .kg.label_index_tnc import build_phrase_trie
+        from .utils import run_blocking
+
+        # Labels and keywords changed from here on are applied by set_trie
+        labels = index.begin_trie()
+        try:
+            relation_keywords = await self.get_all_relation_keywords()
+            index.set_trie(
+                await run_blocking(build_phrase_trie, labels, relation_keywords)
+            )
+        finally:
+            if index.trie is None:
+                # Failed: let the next query try again
+                index.abandon_trie()
+                self._trie_task = None
+
+    def _trie_built(self, task: asyncio.Task) -> None:
+        from .utils import logger
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                f"Error building the keyword trie of {self.namespace}: {task.exception()}"
+            )
+
+    def _labels_upserted(self, node_id: str) -> None:
+        self._labels_changed = True
+        if self._label_index is not None:
+            self._label_index.add(node_id)
+
+    def _label_edges_changed(
+        self, node_ids: list[str], keywords: str | None = None
+    ) -> None:
+        self._labels_changed = True
+        if self._label_index is not None:
+            self._label_index.mark_degrees_stale(node_ids)
+            if keywords:
+                self._label_index.add_relation_keywords(keywords)
+
+    def _labels_removed(self) -> None:
+        # The degrees of the removed nodes' neighbors are unknown: rebuild lazily
+        self._labels_changed = True
+        self._label_index = None
+
+    async def _publish_label_changes(self) -> None:
+        """Let other processes rebuild their label index; call in index_done_callback."""
+        from .kg.label_index_tnc import label_version_key, publish_label_version
+
+        if not self._labels_changed:
+            return
+        self._labels_changed = False
+        version = await publish_label_version(
+            label_version_key(self.namespace, self.global_config.get("workspace"))
+        )
+        if self._label_index is not None:
+            self._label_index.version = version
+
 
 class DocStatus(str, Enum):
     """Document processing status"""
@@ -370,8 +742,6 @@ class DocStatus(str, Enum):
 class DocProcessingStatus:
     """Document processing status data structure"""
 
-    content: str
-    """Original content of the document"""
     content_summary: str
     """First 100 chars of document content, used for preview"""
     content_length: int
@@ -390,6 +760,11 @@ class DocProcessingStatus:
     """Error message if failed"""
     metadata: dict[str, Any] = field(default_factory=dict)
     """Additional metadata"""
+    content_hash: str | None = None
+    """SHA-256 of the source file bytes, used to reject duplicate uploads"""
+    content: str | None = None
+    """Inline document content; only set on records written before document
+    bodies moved to the full_docs store"""
 
 
 @dataclass
@@ -406,6 +781,56 @@ class DocStatusStorage(BaseKVStorage, ABC):
     ) -> dict[str, DocProcessingStatus]:
         """Get all documents with a specific status"""
 
+    async def get_docs_page(
+        self, status: DocStatus, limit: int, cursor: str | None = None
+    ) -> tuple[dict[str, DocProcessingStatus], str | None]:
+        """Get one page of documents with a specific status, ordered by id
+
+        Records are returned without inline content (summary projection).
+        The default pages over get_docs_by_status; storages that can filter
+        and order server-side should override it.
+
+        Args:
+            status: Status to filter on
+            limit: Maximum number of documents to return
+            cursor: Id of the last document of the previous page, None to start
+
+        Returns:
+            The page, and the cursor for the next page (None when exhausted)
+        """
+        docs = await self.get_docs_by_status(status)
+        ids = sorted(doc_id for doc_id in docs if cursor is None or doc_id > cursor)
+        page_ids = ids[:limit]
+        page = {doc_id: replace(docs[doc_id], content=None) for doc_id in page_ids}
+        next_cursor = page_ids[-1] if len(ids) > limit else None
+        return page, next_cursor
+
+    async def patch(self, data: dict[str, dict[str, Any]]) -> None:
+        """Update only the given fields of existing status records
+
+        The default reads each record and upserts the merged result; storages
+        that can update fields in place should override it.
+
+        Args:
+            data: dictionary of document IDs and the fields to change
+        """
+        if not data:
+            return
+        merged = {}
+        for doc_id, fields in data.items():
+            record = await self.get_by_id(doc_id)
+            if record is not None:
+                merged[doc_id] = {**record, **fields}
+        await self.upsert(merged)
+
+    async def get_doc_by_content_hash(self, content_hash: str) -> str | None:
+        """Return the id of a document whose source file has this hash
+
+        Storages without a hash lookup return None, which disables early
+        duplicate detection.
+        """
+        return None
+
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
         """Drop cache is not supported for Doc Status storage"""
         return False
@@ -7,7 +7,7 @@ from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from typing import Any, Dict, List, NamedTuple, Optional, Union, final
 import numpy as np
-import pipmaster as pm
+from lightrag.utils import ensure_package
 from lightrag.types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
 
 from tenacity import (
@@ -27,12 +27,9 @@ if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 
-if not pm.is_installed("psycopg-pool"):
-    pm.install("psycopg-pool")
-    pm.install("psycopg[binary,pool]")
+ensure_package("psycopg-pool", install=["psycopg-pool", "psycopg[binary,pool]"])
 
-if not pm.is_installed("asyncpg"):
-    pm.install("asyncpg")
+ensure_package("asyncpg")
 
 import psycopg  # type: ignore
 from psycopg.rows import namedtuple_row  # type: ignore
@@ -0,0 +1,202 @@
+"""
+ * ┌─────────────────────────────────────────────┐
+ * │ TechNexusClarity Custom Module              │
+ * │ Not part of upstream open source repo       │
+ * └─────────────────────────────────────────────┘
+ *
+ * Description: Size, age and LRU limits of the LLM response cache.
+ * Owner: TechNexusClarity
+
+Limits are set per cache_type ("extract", "query", "keywords", "context")
+from the environment: LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_BYTES and
+LLM_CACHE_TTL apply to every type, LLM_CACHE_<TYPE>_MAX_ENTRIES (etc.)
+override them for one type. Unset or 0 means unlimited.
+
+Each LLM cache storage gets a CacheJanitor (get_cache_janitor). Cache hits
+are only recorded in memory and written to the entries' last_hit in one batch
+before each enforcement. A type is enforced once 5% of its entry or byte
+limit has been written since its last enforcement, and every type at most
+every LLM_CACHE_SWEEP_INTERVAL seconds while the cache is in use. Storages
+evict through BaseKVStorage.evict_cache_entries: expired entries first, then
+the least recently hit ones until the type fits its limits.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+CACHE_TYPES = ("extract", "query", "keywords", "context")
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_entries: int = 0
+    max_bytes: int = 0
+    ttl: float = 0
+
+    @property
+    def bounded(self) -> bool:
+        return bool(self.max_entries or self.max_bytes or self.ttl)
+
+
+def _env_number(names: Iterable[str], cast) -> Any:
+    for name in names:
+        value = os.getenv(name)
+        if value:
+            return cast(value)
+    return cast(0)
+
+
+def load_cache_policies() -> dict[str, CachePolicy]:
+    """Read the cache limits of every cache_type from the environment"""
+    policies = {}
+    for cache_type in CACHE_TYPES:
+        prefix = f"LLM_CACHE_{cache_type.upper()}_"
+        policies[cache_type] = CachePolicy(
+            max_entries=_env_number(
+                [f"{prefix}MAX_ENTRIES", "LLM_CACHE_MAX_ENTRIES"], int
+            ),
+            max_bytes=_env_number([f"{prefix}MAX_BYTES", "LLM_CACHE_MAX_BYTES"], int),
+            ttl=_env_number([f"{prefix}TTL", "LLM_CACHE_TTL"], float),
+        )
+    return policies
+
+
+def entry_size(entry: dict[str, Any]) -> int:
+    """Approximate stored size of a cache entry in bytes"""
+    size = 0
+    for field_name in ("return", "original_prompt", "embedding"):
+        value = entry.get(field_name)
+        if isinstance(value, str):
+            size += len(value.encode("utf-8"))
+    return size
+
+
+def last_used(entry: dict[str, Any]) -> float:
+    return entry.get("last_hit") or entry.get("create_time") or 0
+
+
+def select_evictions(
+    entries: Iterable[tuple[str, dict[str, Any]]], policy: CachePolicy, now: float
+) -> list[str]:
+    """Keys to evict so that the given entries of one cache_type fit the policy
+
+    Entries older than the TTL go first, then the least recently hit entries
+    beyond the entry or byte limit. Entries without a create_time (written
+    before it was recorded) never expire; the limits treat them as least
+    recently used.
+    """
+    evict = []
+    kept = []
+    for key, entry in entries:
+        created = entry.get("create_time")
+        if policy.ttl and created and now - created > policy.ttl:
+            evict.append(key)
+        else:
+            kept.append((last_used(entry), key, entry))
+
+    if policy.max_entries or policy.max_bytes:
+        kept.sort(key=lambda item: item[0], reverse=True)
+        total_bytes = 0
+        for count, (_, key, entry) in enumerate(kept, start=1):
+            total_bytes += entry_size(entry)
+            if (policy.max_entries and count > policy.max_entries) or (
+                policy.max_bytes and total_bytes > policy.max_bytes
+            ):
+                evict.append(key)
+    return evict
+
+
+class CacheJanitor:
+    """Hit tracking and limit enforcement for one LLM cache storage"""
+
+    def __init__(self, storage, policies: dict[str, CachePolicy] | None = None):
+        self.storage = storage
+        self.policies = policies if policies is not None else load_cache_policies()
+        self.sweep_interval = float(os.getenv("LLM_CACHE_SWEEP_INTERVAL", "600"))
+        self._hits: dict[tuple[str, str], float] = {}
+        self._entries_written = dict.fromkeys(self.policies, 0)
+        self._bytes_written = dict.fromkeys(self.policies, 0)
+        self._pending: set[str] = set()
+        self._last_sweep: float | None = None
+        self._task: asyncio.Task | None = None
+        self.evicted = 0
+
+    @property
+    def bounded(self) -> bool:
+        return any(policy.bounded for policy in self.policies.values())
+
+    def record_hit(self, mode: str, args_hash: str) -> None:
+        if self.bounded:
+            self._hits[(mode, args_hash)] = time.time()
+            self._maybe_sweep()
+
+    def record_write(self, cache_type: str, entry: dict[str, Any]) -> None:
+        policy = self.policies.get(cache_type)
+        if policy is None or not policy.bounded:
+            return
+        self._entries_written[cache_type] += 1
+        self._bytes_written[cache_type] += entry_size(entry)
+        if (
+            policy.max_entries
+            and self._entries_written[cache_type] >= max(1, policy.max_entries // 20)
+        ) or (
+            policy.max_bytes
+            and self._bytes_written[cache_type] >= max(1, policy.max_bytes // 20)
+        ):
+            self._pending.add(cache_type)
+        self._maybe_sweep()
+
+    def _maybe_sweep(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        now = time.monotonic()
+        if self._last_sweep is None or now - self._last_sweep >= self.sweep_interval:
+            self._pending.update(
+                cache_type
+                for cache_type, policy in self.policies.items()
+                if policy.bounded
+            )
+        if self._pending:
+            cache_types, self._pending = self._pending, set()
+            self._task = asyncio.create_task(self.enforce(cache_types))
+
+    async def enforce(self, cache_types: Iterable[str] | None = None) -> int:
+        """Write recorded hits, then evict entries beyond the limits"""
+        from lightrag.utils import logger
+
+        self._last_sweep = time.monotonic()
+        evicted = 0
+        try:
+            if self._hits:
+                hits, self._hits = self._hits, {}
+                await self.storage.touch_cache_entries(hits)
+            for cache_type in cache_types or self.policies:
+                policy = self.policies[cache_type]
+                if not policy.bounded:
+                    continue
+                self._entries_written[cache_type] = 0
+                self._bytes_written[cache_type] = 0
+                evicted += await self.storage.evict_cache_entries(
+                    cache_type, policy, time.time()
+                )
+        except Exception as e:
+            logger.error(
+                f"Error enforcing LLM cache limits of {self.storage.namespace}: {e}"
+            )
+        if evicted:
+            self.evicted += evicted
+            logger.info(
+                f"Evicted {evicted} LLM cache entries from {self.storage.namespace}"
+            )
+        return evicted
+
+
+def get_cache_janitor(storage) -> CacheJanitor:
+    janitor = getattr(storage, "_cache_janitor", None)
+    if janitor is None:
+        janitor = CacheJanitor(storage)
+        storage._cache_janitor = janitor
+    return janitor
@@ -5,11 +5,10 @@ from typing import Any, final
 import numpy as np
 
 from lightrag.base import BaseVectorStorage
-from lightrag.utils import logger
-import pipmaster as pm
+from lightrag.utils import logger, run_blocking
+from lightrag.utils import ensure_package
 
-if not pm.is_installed("chromadb"):
-    pm.install("chromadb")
+ensure_package("chromadb")
 
 from chromadb import HttpClient, PersistentClient  # type: ignore
 from chromadb.config import Settings  # type: ignore
@@ -144,7 +143,8 @@ class ChromaVectorDBStorage(BaseVectorStorage):
             for i in range(0, len(ids), self._max_batch_size):
                 batch_slice = slice(i, i + self._max_batch_size)
 
-                self._collection.upsert(
+                await run_blocking(
+                    self._collection.upsert,
                     ids=ids[batch_slice],
                     embeddings=embeddings[batch_slice].tolist(),
                     documents=documents[batch_slice],
@@ -163,7 +163,8 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         try:
             embedding = await self.embedding_func([query])
 
-            results = self._collection.query(
+            results = await run_blocking(
+                self._collection.query,
                 query_embeddings=embedding.tolist()
                 if not isinstance(embedding, list)
                 else embedding,
@@ -203,7 +204,7 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         """
         try:
             logger.info(f"Deleting entity with ID {entity_name} from {self.namespace}")
-            self._collection.delete(ids=[entity_name])
+            await run_blocking(self._collection.delete, ids=[entity_name])
         except Exception as e:
             logger.error(f"Error during entity deletion: {str(e)}")
             raise
@@ -225,7 +226,7 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         """
         try:
             logger.info(f"Deleting {len(ids)} vectors from {self.namespace}")
-            self._collection.delete(ids=ids)
+            await run_blocking(self._collection.delete, ids=ids)
             logger.debug(
                 f"Successfully deleted {len(ids)} vectors from {self.namespace}"
             )
@@ -246,8 +247,8 @@ class ChromaVectorDBStorage(BaseVectorStorage):
             # Get all records from the collection
             # Since ChromaDB doesn't directly support prefix search on IDs,
             # we'll get all records and filter in Python
-            results = self._collection.get(
-                include=["metadatas", "documents", "embeddings"]
+            results = await run_blocking(
+                self._collection.get, include=["metadatas", "documents", "embeddings"]
             )
 
             matching_records = []
@@ -284,8 +285,10 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Query the collection for a single vector by ID
-            result = self._collection.get(
-                ids=[id], include=["metadatas", "embeddings", "documents"]
+            result = await run_blocking(
+                self._collection.get,
+                ids=[id],
+                include=["metadatas", "embeddings", "documents"],
             )
 
             if not result or not result["ids"] or len(result["ids"]) == 0:
@@ -316,8 +319,10 @@ class ChromaVectorDBStorage(BaseVectorStorage):
 
         try:
             # Query the collection for multiple vectors by IDs
-            result = self._collection.get(
-                ids=ids, include=["metadatas", "embeddings", "documents"]
+            result = await run_blocking(
+                self._collection.get,
+                ids=ids,
+                include=["metadatas", "embeddings", "documents"],
             )
 
             if not result or not result["ids"] or len(result["ids"]) == 0:
@@ -349,10 +354,10 @@ class ChromaVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Get all IDs in the collection
-            result = self._collection.get(include=[])
+            result = await run_blocking(self._collection.get, include=[])
             if result and result["ids"] and len(result["ids"]) > 0:
                 # Delete all documents
-                self._collection.delete(ids=result["ids"])
+                await run_blocking(self._collection.delete, ids=result["ids"])
 
             logger.info(
                 f"Process {os.getpid()} drop ChromaDB collection {self.namespace}"
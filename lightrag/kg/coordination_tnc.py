@@ -0,0 +1,566 @@
+"""
+ * ┌─────────────────────────────────────────────┐
+ * │ TechNexusClarity Custom Module              │
+ * │ Not part of upstream open source repo       │
+ * └─────────────────────────────────────────────┘
+ *
+ * Description: Pluggable coordination backends for shared_storage.
+ * Owner: TechNexusClarity
+
+shared_storage holds the locks, update flags and namespace data (pipeline
+status, JSON storages) that all workers share. With workers > 1 all of it used
+to live on a multiprocessing.Manager, so every lock acquisition and update-flag
+check was an IPC round trip to the manager process. COORDINATION_BACKEND
+selects where it lives instead:
+  - manager   Manager proxies, as before (default)
+  - local     fcntl file locks and update flags in shared memory; namespace
+              data stays on the Manager when workers > 1 (single host)
+  - redis     locks and update flags in Redis (multiple hosts); namespace
+              data as with local, so dict access never waits for the network
+  - postgres  pg_advisory_lock locks across hosts; flags and data as with local
+
+Update flags are per-namespace counters: set_all bumps a version and clear_all
+records the version as cleared, so checking a flag is a single read and
+setting every worker's flag a single write. The version doubles as the
+namespace's change feed (shared_storage.get_namespace_version).
+"""
+
+import asyncio
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import uuid
+from collections.abc import MutableMapping
+from multiprocessing import Manager
+from typing import Any, Optional
+
+from .shared_storage import direct_log
+
+COORDINATION_BACKENDS = ("manager", "local", "redis", "postgres")
+
+
+def _lock_backoff(delay: float) -> float:
+    return min(delay * 2, 0.05)
+
+
+def _hash64(value: str) -> int:
+    """Stable signed 64-bit hash (also a valid pg_advisory_lock key)"""
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class FileLock:
+    """Cross-process lock on a file (fcntl.flock), acquired without blocking the event loop"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._fd: Optional[int] = None
+        self._fd_pid: Optional[int] = None
+
+    def _fileno(self) -> int:
+        # flock locks belong to the open file description, which a forked worker
+        # would share with its parent, so every process opens the file itself
+        if self._fd is None or self._fd_pid != os.getpid():
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    async def acquire(self) -> None:
+        import fcntl
+
+        fd = self._fileno()
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                await asyncio.sleep(delay)
+                delay = _lock_backoff(delay)
+
+    def release(self) -> None:
+        import fcntl
+
+        fcntl.flock(self._fileno(), fcntl.LOCK_UN)
+
+
+class RedisLock:
+    """Lock on a Redis key (SET NX PX) with a token so only the holder releases it
+
+    The key expires after COORDINATION_LOCK_TTL so a dead holder cannot block
+    the others forever; while held, a task renews it every third of the TTL,
+    so long holds (e.g. a large index_done_callback write) keep it.
+    """
+
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+    _RENEW_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+
+    def __init__(self, backend: "RedisCoordination", key: str, ttl_ms: int):
+        self._backend = backend
+        self._key = key
+        self._ttl_ms = ttl_ms
+        self._token: Optional[str] = None
+        self._renewal: Optional[asyncio.Task] = None
+
+    async def acquire(self) -> None:
+        client = self._backend.async_client()
+        token = uuid.uuid4().hex
+        delay = 0.001
+        while not await client.set(self._key, token, nx=True, px=self._ttl_ms):
+            await asyncio.sleep(delay)
+            delay = _lock_backoff(delay)
+        self._token = token
+        self._renewal = asyncio.create_task(self._renew(token))
+
+    async def _renew(self, token: str) -> None:
+        client = self._backend.async_client()
+        while True:
+            await asyncio.sleep(self._ttl_ms / 3000)
+            try:
+                renewed = await client.eval(
+                    self._RENEW_SCRIPT, 1, self._key, token, self._ttl_ms
+                )
+            except Exception as e:
+                direct_log(f"Renewing Redis lock {self._key} failed: {e}", "WARNING")
+                continue
+            if not renewed:
+                direct_log(
+                    f"Process {os.getpid()} lost Redis lock {self._key}: it expired "
+                    "and may be held by another process",
+                    "ERROR",
+                )
+                return
+
+    async def release(self) -> None:
+        token, self._token = self._token, None
+        renewal, self._renewal = self._renewal, None
+        if renewal is not None:
+            renewal.cancel()
+        if token is not None:
+            released = await self._backend.async_client().eval(
+                self._RELEASE_SCRIPT, 1, self._key, token
+            )
+            if not released:
+                direct_log(
+                    f"Process {os.getpid()} released Redis lock {self._key} after it "
+                    "had expired; another process may have held it meanwhile",
+                    "ERROR",
+                )
+
+
+class PGAdvisoryLock:
+    """Session-level pg_advisory_lock held on a dedicated pooled connection
+
+    The lock is released by PostgreSQL itself if the holding process dies.
+    """
+
+    def __init__(self, backend: "PostgresCoordination", name: str):
+        self._backend = backend
+        self._key = _hash64(name)
+        self._conn = None
+
+    async def acquire(self) -> None:
+        pool = await self._backend.pool()
+        conn = await pool.acquire()
+        try:
+            await conn.execute("SELECT pg_advisory_lock($1)", self._key)
+        except BaseException:
+            await pool.release(conn)
+            raise
+        self._conn = conn
+
+    async def release(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        pool = await self._backend.pool()
+        try:
+            await conn.execute("SELECT pg_advisory_unlock($1)", self._key)
+        finally:
+            await pool.release(conn)
+
+
+class VersionFlag:
+    """A worker's update flag, derived from its namespace's shared counters"""
+
+    def __init__(self, counters: Any, namespace: str):
+        self._counters = counters
+        self._slot = counters.slot(namespace)
+        self._seen = counters.read(self._slot)[0]
+
+    @property
+    def value(self) -> bool:
+        version, cleared = self._counters.read(self._slot)
+        return version > max(self._seen, cleared)
+
+    @value.setter
+    def value(self, flag: bool) -> None:
+        # False acknowledges every update so far; True keeps the flag raised
+        # until the namespace is cleared or acknowledged again
+        self._seen = -1 if flag else self._counters.read(self._slot)[0]
+
+
+class SharedMemoryCounters:
+    """(version, cleared) counters per namespace in a shared memory table
+
+    Created before the workers are forked, so they inherit the mapping. Slots
+    are assigned by open addressing on a hash of the namespace; inserts, bumps
+    and clears happen under the internal lock, reads take no lock.
+    """
+
+    _KEY = struct.Struct("q")  # namespace hash, 0 for a free slot
+    _COUNTERS = struct.Struct("qq")  # version, cleared
+    _SLOT_SIZE = _KEY.size + _COUNTERS.size
+
+    def __init__(self, slots: int):
+        from multiprocessing import shared_memory
+
+        self._slots = slots
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=slots * self._SLOT_SIZE
+        )
+        self._shm.buf[:] = bytes(len(self._shm.buf))
+        self._owner_pid = os.getpid()
+        self._slot_cache: dict[str, int] = {}
+
+    def slot(self, namespace: str) -> int:
+        if namespace in self._slot_cache:
+            return self._slot_cache[namespace]
+        key = _hash64(namespace) or 1
+        start = key % self._slots
+        for i in range(self._slots):
+            index = (start + i) % self._slots
+            (slot_key,) = self._KEY.unpack_from(self._shm.buf, index * self._SLOT_SIZE)
+            if slot_key == 0:
+                self._KEY.pack_into(self._shm.buf, index * self._SLOT_SIZE, key)
+            elif slot_key != key:
+                continue
+            self._slot_cache[namespace] = index
+            return index
+        raise RuntimeError(
+            "Update flag table is full, increase COORDINATION_FLAG_SLOTS"
+        )
+
+    def version(self, namespace: str) -> int:
+        """Current version of a namespace, without claiming a slot for it"""
+        index = self._slot_cache.get(namespace)
+        if index is None:
+            key = _hash64(namespace) or 1
+            start = key % self._slots
+            for i in range(self._slots):
+                probe = (start + i) % self._slots
+                (slot_key,) = self._KEY.unpack_from(
+                    self._shm.buf, probe * self._SLOT_SIZE
+                )
+                if slot_key == 0:
+                    return 0
+                if slot_key == key:
+                    index = self._slot_cache[namespace] = probe
+                    break
+            else:
+                return 0
+        return self.read(index)[0]
+
+    def read(self, index: int) -> tuple[int, int]:
+        return self._COUNTERS.unpack_from(
+            self._shm.buf, index * self._SLOT_SIZE + self._KEY.size
+        )
+
+    def _write(self, index: int, version: int, cleared: int) -> None:
+        self._COUNTERS.pack_into(
+            self._shm.buf, index * self._SLOT_SIZE + self._KEY.size, version, cleared
+        )
+
+    def bump(self, namespace: str) -> None:
+        index = self.slot(namespace)
+        version, cleared = self.read(index)
+        self._write(index, version + 1, cleared)
+
+    def clear(self, namespace: str) -> None:
+        index = self.slot(namespace)
+        version, _ = self.read(index)
+        self._write(index, version, version)
+
+    def close(self) -> None:
+        self._shm.close()
+        if os.getpid() == self._owner_pid:
+            self._shm.unlink()
+
+
+class RedisCounters:
+    """(version, cleared) counters per namespace in Redis hashes
+
+    Versions are shared by every host. Cleared marks acknowledge that this
+    host's namespace data was persisted, so they are kept per boot of the
+    host (RedisCoordination.boot_id) and expire after CLEARED_TTL seconds
+    without a clear, instead of outliving the data they describe.
+
+    Namespace versions are read on every query, so reads are served from a
+    process-local copy of the hashes instead of a blocking Redis round trip
+    on the event loop. A daemon thread refreshes the copy every
+    COORDINATION_REFRESH_INTERVAL seconds; this process's own bumps and
+    clears are applied to it at once.
+    """
+
+    CLEARED_TTL = 7 * 24 * 3600
+
+    def __init__(self, backend: "RedisCoordination"):
+        self._backend = backend
+        self._key = f"{backend.prefix}:flags"
+        self._cleared_key = f"{backend.prefix}:cleared:{backend.boot_id}"
+        self._interval = float(os.getenv("COORDINATION_REFRESH_INTERVAL", "0.5"))
+        self._values: dict[str, int] = {}
+        # Local writes since the running refresh started reading the hash
+        self._written: dict[str, int] = {}
+        self._refresher_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    def _fetch(self) -> dict[str, int]:
+        pipe = self._backend.client().pipeline()
+        pipe.hgetall(self._key)
+        pipe.hgetall(self._cleared_key)
+        versions, cleared = pipe.execute()
+        values = {
+            field: int(value)
+            for field, value in versions.items()
+            if field.endswith(":version")
+        }
+        values.update(
+            (f"{namespace}:cleared", int(value)) for namespace, value in cleared.items()
+        )
+        return values
+
+    def _refresh(self) -> None:
+        self._written = {}
+        values = self._fetch()
+        for field, value in self._written.items():
+            values[field] = max(values.get(field, 0), value)
+        self._values = values
+
+    def _refresh_loop(self, pid: int) -> None:
+        while not self._stop.wait(self._interval) and self._refresher_pid == pid:
+            try:
+                self._refresh()
+            except Exception as e:
+                direct_log(f"Refreshing update flags from Redis failed: {e}", "WARNING")
+
+    def _cached(self) -> dict[str, int]:
+        # Threads do not survive a fork: each worker starts its own refresher
+        if self._refresher_pid != os.getpid():
+            self._refresher_pid = os.getpid()
+            self._refresh()
+            threading.Thread(
+                target=self._refresh_loop,
+                args=(self._refresher_pid,),
+                name="lightrag-flag-refresh",
+                daemon=True,
+            ).start()
+        return self._values
+
+    def _written_locally(self, field: str, value: int) -> None:
+        self._cached()[field] = max(self._values.get(field, 0), value)
+        self._written[field] = value
+
+    def slot(self, namespace: str) -> str:
+        return namespace
+
+    def read(self, namespace: str) -> tuple[int, int]:
+        values = self._cached()
+        return (
+            values.get(f"{namespace}:version", 0),
+            values.get(f"{namespace}:cleared", 0),
+        )
+
+    def version(self, namespace: str) -> int:
+        return self._cached().get(f"{namespace}:version", 0)
+
+    def bump(self, namespace: str) -> None:
+        field = f"{namespace}:version"
+        self._written_locally(
+            field, self._backend.client().hincrby(self._key, field, 1)
+        )
+
+    def clear(self, namespace: str) -> None:
+        # The version to clear is read from Redis, not from the local copy
+        version = int(
+            self._backend.client().hget(self._key, f"{namespace}:version") or 0
+        )
+        pipe = self._backend.client().pipeline()
+        pipe.hset(self._cleared_key, namespace, version)
+        pipe.expire(self._cleared_key, self.CLEARED_TTL)
+        pipe.execute()
+        self._written_locally(f"{namespace}:cleared", version)
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+class CoordinationBackend:
+    """Locks, update-flag counters and namespace data for one deployment"""
+
+    name = "base"
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.prefix = os.getenv("COORDINATION_PREFIX", "lightrag")
+        self.manager = None
+        self.counters: Any = None
+
+    @property
+    def is_multiprocess(self) -> bool:
+        return self.workers > 1
+
+    def create_lock(self, name: str) -> Any:
+        raise NotImplementedError
+
+    def create_dict(self, namespace: str) -> MutableMapping:
+        return self.manager.dict() if self.manager is not None else {}
+
+    def create_list(self) -> list:
+        return self.manager.list() if self.manager is not None else []
+
+    def try_initialize(self, namespace: str, init_flags: MutableMapping) -> bool:
+        if namespace in init_flags:
+            return False
+        init_flags[namespace] = True
+        return True
+
+    def finalize(self) -> None:
+        if self.counters is not None:
+            self.counters.close()
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
+
+
+class LocalCoordination(CoordinationBackend):
+    """File locks and shared memory flags for the workers of one host"""
+
+    name = "local"
+
+    def __init__(self, workers: int):
+        super().__init__(workers)
+        self.lock_dir = os.getenv(
+            "COORDINATION_LOCK_DIR", os.path.join(tempfile.gettempdir(), "lightrag")
+        )
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self.counters = SharedMemoryCounters(
+            int(os.getenv("COORDINATION_FLAG_SLOTS", 4096))
+        )
+        if workers > 1:
+            # Namespace data holds arbitrary objects and stays on the Manager
+            self.manager = Manager()
+
+    def create_lock(self, name: str) -> Any:
+        return FileLock(os.path.join(self.lock_dir, f"{self.prefix}_{name}.lock"))
+
+
+class PostgresCoordination(LocalCoordination):
+    """Advisory locks shared by every host using the same database"""
+
+    name = "postgres"
+
+    def __init__(self, workers: int):
+        super().__init__(workers)
+        self._pool = None
+        self._pool_pid: Optional[int] = None
+
+    def create_lock(self, name: str) -> Any:
+        return PGAdvisoryLock(self, f"{self.prefix}:{name}")
+
+    async def pool(self):
+        if self._pool is None or self._pool_pid != os.getpid():
+            import asyncpg  # type: ignore
+
+            from .postgres_impl import ClientManager as PGClientManager
+
+            config = PGClientManager.get_config()
+            self._pool = await asyncpg.create_pool(
+                user=config["user"],
+                password=config["password"],
+                database=config["database"],
+                host=config["host"],
+                port=config["port"],
+                min_size=1,
+                # One connection per lock that can be held at the same time
+                max_size=8,
+            )
+            self._pool_pid = os.getpid()
+        return self._pool
+
+
+class RedisCoordination(CoordinationBackend):
+    """Locks and update flags in Redis, so several API hosts coordinate
+
+    Namespace data (JSON storages, pipeline status) is read and written
+    through synchronous dict access all over the code base, so it stays on
+    this host's Manager like with the local backend instead of turning every
+    access into a blocking Redis round trip on the event loop.
+    """
+
+    name = "redis"
+
+    def __init__(self, workers: int):
+        super().__init__(workers)
+        from lightrag.utils import ensure_package
+
+        ensure_package("redis")
+        self.url = os.getenv("REDIS_URI", "redis://localhost:6379")
+        self.lock_ttl_ms = int(os.getenv("COORDINATION_LOCK_TTL", 300)) * 1000
+        # Created before the workers are forked, so they share it
+        self.boot_id = uuid.uuid4().hex
+        self.counters = RedisCounters(self)
+        self._client = None
+        self._async_client = None
+        self._client_pid: Optional[int] = None
+        if workers > 1:
+            # Namespace data holds arbitrary objects and stays on the Manager
+            self.manager = Manager()
+
+    def _check_pid(self) -> None:
+        # Connections must not be shared with forked workers
+        if self._client_pid != os.getpid():
+            self._client = self._async_client = None
+            self._client_pid = os.getpid()
+
+    def client(self):
+        self._check_pid()
+        if self._client is None:
+            from redis import Redis  # type: ignore
+
+            self._client = Redis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    def async_client(self):
+        self._check_pid()
+        if self._async_client is None:
+            from redis.asyncio import Redis  # type: ignore
+
+            self._async_client = Redis.from_url(self.url, decode_responses=True)
+        return self._async_client
+
+    def create_lock(self, name: str) -> Any:
+        return RedisLock(self, f"{self.prefix}:lock:{name}", self.lock_ttl_ms)
+
+
+def create_coordination_backend(name: str, workers: int) -> CoordinationBackend:
+    backends = {
+        "local": LocalCoordination,
+        "redis": RedisCoordination,
+        "postgres": PostgresCoordination,
+    }
+    if name not in backends:
+        raise ValueError(
+            f"Unknown COORDINATION_BACKEND '{name}', expected one of {COORDINATION_BACKENDS}"
+        )
+    backend = backends[name](workers)
+    direct_log(f"Process {os.getpid()} using '{name}' coordination backend")
+    return backend
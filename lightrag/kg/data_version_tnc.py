@@ -0,0 +1,99 @@
+"""
+ * ┌─────────────────────────────────────────────┐
+ * │ TechNexusClarity Custom Module              │
+ * │ Not part of upstream open source repo       │
+ * └─────────────────────────────────────────────┘
+ *
+ * Description: Per-workspace version of the indexed data.
+ * Owner: TechNexusClarity
+
+LightRAG publishes a new version after every insert, delete, edit or merge
+(_insert_done and the other *_done callbacks). Query answers and built
+retrieval contexts are cached under keys that include the version current
+when the query ran, so a change to the data makes their cached entries
+unreachable instead of serving stale answers; the unreachable entries age
+out under the LLM cache limits (cache_policy_tnc).
+
+The version is stored as an entry of the LLM response cache itself, so it
+survives restarts together with the answers keyed by it, and each published
+version is a microsecond timestamp: a version is never issued twice, also
+not after a restart or by two workers publishing at the same time. The
+shared-storage update counter of data_version_key() only tells the other
+workers to re-read the stored version; between changes a query reads its
+process-local copy.
+"""
+
+import time
+from typing import Any
+
+VERSION_MODE = "data_version"
+VERSION_HASH = "current"
+
+# data_version_key -> (update counter seen, stored version)
+_versions: dict[str, tuple[int, int]] = {}
+_last_issued = 0
+
+
+def data_version_key(workspace: str | None) -> str:
+    """Shared-storage namespace whose version tracks a workspace's data"""
+    return f"{workspace or ''}:data"
+
+
+def _update_counter(key: str) -> int:
+    from .shared_storage import get_namespace_version
+
+    try:
+        return get_namespace_version(key)
+    except ValueError:
+        # Shared data not initialized: single process, only local publishes
+        return 0
+
+
+def _workspace(cache_kv: Any) -> str | None:
+    return cache_kv.global_config.get("workspace")
+
+
+async def current_data_version(cache_kv: Any) -> int:
+    """Data version of the LLM cache's workspace (0 before the first publish)"""
+    if cache_kv is None:
+        return 0
+    key = data_version_key(_workspace(cache_kv))
+    counter = _update_counter(key)
+    seen = _versions.get(key)
+    if seen is not None and seen[0] == counter:
+        return seen[1]
+    entry = await cache_kv.get_cache_entry(VERSION_MODE, VERSION_HASH)
+    version = int(entry["return"]) if entry else 0
+    _versions[key] = (counter, version)
+    return version
+
+
+async def publish_data_version(cache_kv: Any) -> int:
+    """Store a new, never before issued data version and notify the workers"""
+    from .shared_storage import set_all_update_flags
+
+    global _last_issued
+    if cache_kv is None:
+        return 0
+    _last_issued = max(time.time_ns() // 1000, _last_issued + 1)
+    version = _last_issued
+    await cache_kv.upsert_cache_entry(
+        VERSION_MODE,
+        VERSION_HASH,
+        {
+            "return": str(version),
+            "original_prompt": "",
+            "cache_type": "version",
+            "create_time": int(time.time()),
+        },
+    )
+    await cache_kv.index_done_callback()
+    key = data_version_key(_workspace(cache_kv))
+    try:
+        await set_all_update_flags(key)
+    except ValueError:
+        pass
+    # Re-read on the next query: a concurrent publish may have stored its
+    # version after this one
+    _versions.pop(key, None)
+    return version
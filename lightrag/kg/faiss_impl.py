@@ -6,24 +6,23 @@ import json
 import numpy as np
 
 from dataclasses import dataclass
-import pipmaster as pm
+from lightrag.utils import ensure_package
 
 from lightrag.utils import logger, compute_mdhash_id
 from lightrag.base import BaseVectorStorage
 
 from .shared_storage import (
+    SnapshotReloader,
     get_storage_lock,
-    get_update_flag,
     set_all_update_flags,
 )
 
-import faiss  # type: ignore
-
 USE_GPU = os.getenv("FAISS_USE_GPU", "0") == "1"
 FAISS_PACKAGE = "faiss-gpu" if USE_GPU else "faiss-cpu"
 
-if not pm.is_installed(FAISS_PACKAGE):
-    pm.install(FAISS_PACKAGE)
+ensure_package(FAISS_PACKAGE, "faiss")
+
+import faiss  # type: ignore
 
 
 @final
@@ -66,25 +65,20 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
     async def initialize(self):
         """Initialize storage data"""
-        # Get the update flag for cross-process update notification
-        self.storage_updated = await get_update_flag(self.namespace)
+        # Follow the versions other processes publish
+        self._reloader = SnapshotReloader(
+            self.namespace, self._read_faiss_index, self._set_faiss_index
+        )
         # Get the storage lock for use in other methods
         self._storage_lock = get_storage_lock()
 
-    async def _get_index(self):
-        """Check if the shtorage should be reloaded"""
-        # Acquire lock to prevent concurrent read and write
-        async with self._storage_lock:
-            # Check if storage was updated by another process
-            if self.storage_updated.value:
-                logger.info(
-                    f"Process {os.getpid()} FAISS reloading {self.namespace} due to update by another process"
-                )
-                # Reload data
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
-                self._load_faiss_index()
-                self.storage_updated.value = False
+    def _set_faiss_index(self, snapshot: tuple[Any, dict]) -> None:
+        self._index, self._id_to_meta = snapshot
+
+    async def _get_index(self, for_write: bool = False):
+        """Return the index; a newer version saved by another process is loaded
+        in the background and swapped in, so queries never wait for it"""
+        await self._reloader.check(wait=for_write)
         return self._index
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
@@ -141,6 +135,9 @@ class FaissVectorDBStorage(BaseVectorStorage):
         embeddings = embeddings.astype(np.float32)
         faiss.normalize_L2(embeddings)
 
+        # Changes must apply to the latest version
+        await self._get_index(for_write=True)
+
         # Upsert logic:
         # 1. Identify which vectors to remove if they exist
         # 2. Remove them
@@ -155,7 +152,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
             await self._remove_faiss_ids(existing_ids_to_remove)
 
         # Step 2: Add new vectors
-        index = await self._get_index()
+        index = self._index
         start_idx = index.ntotal
         index.add(embeddings)
 
@@ -228,6 +225,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.info(f"Deleting {len(ids)} vectors from {self.namespace}")
+        await self._get_index(for_write=True)
         to_remove = []
         for cid in ids:
             fid = self._find_faiss_id_by_custom_id(cid)
@@ -259,6 +257,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.debug(f"Searching relations for entity {entity_name}")
+        await self._get_index(for_write=True)
         relations = []
         for fid, meta in self._id_to_meta.items():
             if meta.get("src_id") == entity_name or meta.get("tgt_id") == entity_name:
@@ -311,7 +310,8 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         Save the current Faiss index + metadata to disk so it can persist across runs.
         """
-        faiss.write_index(self._index, self._faiss_index_file)
+        # Write to temp files and rename, so readers never load a partial file
+        faiss.write_index(self._index, self._faiss_index_file + ".tmp")
 
         # Save metadata dict to JSON. Convert all keys to strings for JSON storage.
         # _id_to_meta is { int: { '__id__': doc_id, '__vector__': [float,...], ... } }
@@ -320,53 +320,56 @@ class FaissVectorDBStorage(BaseVectorStorage):
         for fid, meta in self._id_to_meta.items():
             serializable_dict[str(fid)] = meta
 
-        with open(self._meta_file, "w", encoding="utf-8") as f:
+        with open(self._meta_file + ".tmp", "w", encoding="utf-8") as f:
             json.dump(serializable_dict, f)
 
+        os.replace(self._faiss_index_file + ".tmp", self._faiss_index_file)
+        os.replace(self._meta_file + ".tmp", self._meta_file)
+
     def _load_faiss_index(self):
         """
         Load the Faiss index + metadata from disk if it exists,
         and rebuild in-memory structures so we can query.
         """
+        self._index, self._id_to_meta = self._read_faiss_index()
+
+    def _read_faiss_index(self) -> tuple[Any, dict]:
+        """Read the Faiss index + metadata from disk, or return an empty index."""
         if not os.path.exists(self._faiss_index_file):
             logger.warning("No existing Faiss index file found. Starting fresh.")
-            return
+            return faiss.IndexFlatIP(self._dim), {}
 
         try:
             # Load the Faiss index
-            self._index = faiss.read_index(self._faiss_index_file)
+            index = faiss.read_index(self._faiss_index_file)
             # Load metadata
             with open(self._meta_file, "r", encoding="utf-8") as f:
                 stored_dict = json.load(f)
 
             # Convert string keys back to int
-            self._id_to_meta = {}
+            id_to_meta = {}
             for fid_str, meta in stored_dict.items():
                 fid = int(fid_str)
-                self._id_to_meta[fid] = meta
+                id_to_meta[fid] = meta
 
             logger.info(
-                f"Faiss index loaded with {self._index.ntotal} vectors from {self._faiss_index_file}"
+                f"Faiss index loaded with {index.ntotal} vectors from {self._faiss_index_file}"
             )
+            return index, id_to_meta
         except Exception as e:
             logger.error(f"Failed to load Faiss index or metadata: {e}")
             logger.warning("Starting with an empty Faiss index.")
-            self._index = faiss.IndexFlatIP(self._dim)
-            self._id_to_meta = {}
+            return faiss.IndexFlatIP(self._dim), {}
 
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
             # Check if storage was updated by another process
-            if self.storage_updated.value:
+            if self._reloader.is_stale():
                 # Storage was updated by another process, reload data instead of saving
                 logger.warning(
                     f"Storage for FAISS {self.namespace} was updated by another process, reloading..."
                 )
-                async with self._storage_lock:
-                    self._index = faiss.IndexFlatIP(self._dim)
-                    self._id_to_meta = {}
-                    self._load_faiss_index()
-                    self.storage_updated.value = False
+                await self._reloader.reload_now()
                 return False  # Return error
 
         # Acquire lock and perform persistence
@@ -374,10 +377,10 @@ class FaissVectorDBStorage(BaseVectorStorage):
             try:
                 # Save data to disk
                 self._save_faiss_index()
-                # Notify other processes that data has been updated
-                await set_all_update_flags(self.namespace)
-                # Reset own update flag to avoid self-reloading
-                self.storage_updated.value = False
+                # Publish the new version; this process already holds it
+                self._reloader.loaded_version = await set_all_update_flags(
+                    self.namespace
+                )
             except Exception as e:
                 logger.error(f"Error saving FAISS index for {self.namespace}: {e}")
                 return False  # Return error
@@ -479,9 +482,10 @@ class FaissVectorDBStorage(BaseVectorStorage):
                 self._id_to_meta = {}
                 self._load_faiss_index()
 
-                # Notify other processes
-                await set_all_update_flags(self.namespace)
-                self.storage_updated.value = False
+                # Publish the new version; this process already holds it
+                self._reloader.loaded_version = await set_all_update_flags(
+                    self.namespace
+                )
 
                 logger.info(f"Process {os.getpid()} drop FAISS index {self.namespace}")
             return {"status": "success", "message": "data dropped"}
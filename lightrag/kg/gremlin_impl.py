@@ -2,7 +2,7 @@ import asyncio
 import inspect
 import json
 import os
-import pipmaster as pm
+from lightrag.utils import ensure_package
 from dataclasses import dataclass
 from typing import Any, Dict, List, final
 
@@ -21,8 +21,7 @@ from lightrag.utils import logger
 
 from ..base import BaseGraphStorage
 
-if not pm.is_installed("gremlinpython"):
-    pm.install("gremlinpython")
+ensure_package("gremlinpython", "gremlin_python")
 
 from gremlin_python.driver import client, serializer  # type: ignore
 from gremlin_python.driver.aiohttp.transport import AiohttpTransport  # type: ignore
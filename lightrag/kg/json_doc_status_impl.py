@@ -84,9 +84,6 @@ class JsonDocStatusStorage(DocStatusStorage):
                     try:
                         # Make a copy of the data to avoid modifying the original
                         data = v.copy()
-                        # If content is missing, use content_summary as content
-                        if "content" not in data and "content_summary" in data:
-                            data["content"] = data["content_summary"]
                         # If file_path is not in data, use document id as file path
                         if "file_path" not in data:
                             data["file_path"] = "no-file-path"
@@ -96,11 +93,47 @@ class JsonDocStatusStorage(DocStatusStorage):
                         continue
         return result
 
+    async def get_docs_page(
+        self, status: DocStatus, limit: int, cursor: str | None = None
+    ) -> tuple[dict[str, DocProcessingStatus], str | None]:
+        """Get one page of documents with a specific status, ordered by id"""
+        async with self._storage_lock:
+            ids = sorted(
+                k
+                for k, v in self._data.items()
+                if v["status"] == status.value and (cursor is None or k > cursor)
+            )
+            page_ids = ids[:limit]
+            result = {}
+            for k in page_ids:
+                data = {
+                    key: value
+                    for key, value in self._data[k].items()
+                    if key != "content"
+                }
+                data.setdefault("file_path", "no-file-path")
+                try:
+                    result[k] = DocProcessingStatus(**data)
+                except (KeyError, TypeError) as e:
+                    logger.error(f"Missing required field for document {k}: {e}")
+        next_cursor = page_ids[-1] if len(ids) > limit else None
+        return result, next_cursor
+
+    async def get_doc_by_content_hash(self, content_hash: str) -> str | None:
+        """Return the id of a document whose source file has this hash"""
+        async with self._storage_lock:
+            for k, v in self._data.items():
+                if v.get("content_hash") == content_hash:
+                    return k
+        return None
+
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
             if self.storage_updated.value:
                 data_dict = (
-                    dict(self._data) if hasattr(self._data, "_getvalue") else self._data
+                    self._data._getvalue()
+                    if hasattr(self._data, "_getvalue")
+                    else self._data
                 )
                 logger.info(
                     f"Process {os.getpid()} doc status writting {len(data_dict)} records to {self.namespace}"
@@ -123,6 +156,23 @@ class JsonDocStatusStorage(DocStatusStorage):
 
         await self.index_done_callback()
 
+    async def patch(self, data: dict[str, dict[str, Any]]) -> None:
+        """Update only the given fields of existing records"""
+        if not data:
+            return
+        async with self._storage_lock:
+            any_updated = False
+            for k, fields in data.items():
+                record = self._data.get(k)
+                if record is not None:
+                    # Reassign so the change propagates through shared dict proxies
+                    self._data[k] = {**record, **fields}
+                    any_updated = True
+            if any_updated:
+                await set_all_update_flags(self.namespace)
+
+        await self.index_done_callback()
+
     async def get_by_id(self, id: str) -> Union[dict[str, Any], None]:
         async with self._storage_lock:
             return self._data.get(id)
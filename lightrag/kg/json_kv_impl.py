@@ -1,10 +1,12 @@
 import os
+import time
 from dataclasses import dataclass
 from typing import Any, final
 
 from lightrag.base import (
     BaseKVStorage,
 )
+from .cache_policy_tnc import CachePolicy, select_evictions
 from lightrag.utils import (
     load_json,
     logger,
@@ -21,6 +23,45 @@ from .shared_storage import (
 )
 
 
+def _flatten_cache_modes(data: dict[str, Any]) -> int:
+    """Move legacy {mode: {args_hash: entry}} cache records to "mode:args_hash" keys
+
+    Returns:
+        The number of mode records converted
+    """
+    migrated = 0
+    for key, value in list(data.items()):
+        if (
+            isinstance(value, dict)
+            and "return" not in value
+            and all(isinstance(entry, dict) for entry in value.values())
+        ):
+            del data[key]
+            for args_hash, entry in value.items():
+                data.setdefault(f"{key}:{args_hash}", entry)
+            migrated += 1
+    return migrated
+
+
+def _stamp_create_time(data: dict[str, Any], now: int) -> int:
+    """Give cache entries written without a create_time the load time as one,
+    so the TTL counts from now instead of treating them as expired
+
+    Returns:
+        The number of entries stamped
+    """
+    stamped = 0
+    for key, entry in data.items():
+        if (
+            isinstance(entry, dict)
+            and "return" in entry
+            and not entry.get("create_time")
+        ):
+            data[key] = {**entry, "create_time": now}
+            stamped += 1
+    return stamped
+
+
 @final
 @dataclass
 class JsonKVStorage(BaseKVStorage):
@@ -41,43 +82,39 @@ class JsonKVStorage(BaseKVStorage):
             self._data = await get_namespace_data(self.namespace)
             if need_init:
                 loaded_data = load_json(self._file_name) or {}
+                # TNC: cache entries are stored flat, one key per (mode, args_hash)
+                migrated = 0
+                stamped = 0
+                if self.namespace.endswith("cache"):
+                    migrated = _flatten_cache_modes(loaded_data)
+                    stamped = _stamp_create_time(loaded_data, int(time.time()))
                 async with self._storage_lock:
                     self._data.update(loaded_data)
-
-                    # Calculate data count based on namespace
-                    if self.namespace.endswith("cache"):
-                        # For cache namespaces, sum the cache entries across all cache types
-                        data_count = sum(
-                            len(first_level_dict)
-                            for first_level_dict in loaded_data.values()
-                            if isinstance(first_level_dict, dict)
+                    if migrated:
+                        logger.info(
+                            f"Migrated {migrated} cache modes of {self.namespace} to per-entry keys"
+                        )
+                    if stamped:
+                        logger.info(
+                            f"Set create_time of {stamped} legacy entries of {self.namespace}"
                         )
-                    else:
-                        # For non-cache namespaces, use the original count method
-                        data_count = len(loaded_data)
+                    if migrated or stamped:
+                        await set_all_update_flags(self.namespace)
 
                     logger.info(
-                        f"Process {os.getpid()} KV load {self.namespace} with {data_count} records"
+                        f"Process {os.getpid()} KV load {self.namespace} with {len(loaded_data)} records"
                     )
 
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
             if self.storage_updated.value:
                 data_dict = (
-                    dict(self._data) if hasattr(self._data, "_getvalue") else self._data
+                    self._data._getvalue()
+                    if hasattr(self._data, "_getvalue")
+                    else self._data
                 )
 
-                # Calculate data count based on namespace
-                if self.namespace.endswith("cache"):
-                    # # For cache namespaces, sum the cache entries across all cache types
-                    data_count = sum(
-                        len(first_level_dict)
-                        for first_level_dict in data_dict.values()
-                        if isinstance(first_level_dict, dict)
-                    )
-                else:
-                    # For non-cache namespaces, use the original count method
-                    data_count = len(data_dict)
+                data_count = len(data_dict)
 
                 logger.info(
                     f"Process {os.getpid()} KV writting {data_count} records to {self.namespace}"
@@ -126,6 +163,58 @@ class JsonKVStorage(BaseKVStorage):
             self._data.update(data)
             await set_all_update_flags(self.namespace)
 
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        async with self._storage_lock:
+            return self._data.get(f"{mode}:{args_hash}")
+
+    async def get_cache_entries(self, mode: str) -> dict[str, dict[str, Any]]:
+        prefix = f"{mode}:"
+        async with self._storage_lock:
+            return {
+                key[len(prefix) :]: entry
+                for key, entry in self._data.items()
+                if key.startswith(prefix)
+            }
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        async with self._storage_lock:
+            self._data[f"{mode}:{args_hash}"] = entry
+            await set_all_update_flags(self.namespace)
+
+    async def delete_cache_entries(self, mode: str, args_hashes: list[str]) -> None:
+        await self.delete([f"{mode}:{args_hash}" for args_hash in args_hashes])
+
+    async def touch_cache_entries(self, hits: dict[tuple[str, str], float]) -> None:
+        async with self._storage_lock:
+            touched = False
+            for (mode, args_hash), hit_time in hits.items():
+                key = f"{mode}:{args_hash}"
+                entry = self._data.get(key)
+                if entry is not None:
+                    # Reassign rather than mutate: the data may be a Manager proxy
+                    self._data[key] = {**entry, "last_hit": hit_time}
+                    touched = True
+            if touched:
+                await set_all_update_flags(self.namespace)
+
+    async def evict_cache_entries(
+        self, cache_type: str, policy: CachePolicy, now: float
+    ) -> int:
+        async with self._storage_lock:
+            entries = [
+                (key, entry)
+                for key, entry in self._data.items()
+                if isinstance(entry, dict) and entry.get("cache_type") == cache_type
+            ]
+            evict = select_evictions(entries, policy, now)
+            for key in evict:
+                self._data.pop(key, None)
+            if evict:
+                await set_all_update_flags(self.namespace)
+        return len(evict)
+
     async def delete(self, ids: list[str]) -> None:
         """Delete specific records from storage by their IDs
 
@@ -167,7 +256,10 @@ class JsonKVStorage(BaseKVStorage):
             return False
 
         try:
-            await self.delete(modes)
+            prefixes = tuple(f"{mode}:" for mode in modes)
+            async with self._storage_lock:
+                keys = [key for key in self._data.keys() if key.startswith(prefixes)]
+            await self.delete(keys)
             return True
         except Exception:
             return False
@@ -0,0 +1,341 @@
+"""
+ * ┌─────────────────────────────────────────────┐
+ * │ TechNexusClarity Custom Module              │
+ * │ Not part of upstream open source repo       │
+ * └─────────────────────────────────────────────┘
+ *
+ * Description: In-memory label, degree and centrality table of a graph.
+ * Owner: TechNexusClarity
+
+Each graph storage keeps one LabelIndex per process (BaseGraphStorage.
+search_labels). It is built once from get_all_label_degrees and then updated
+by the storage's write methods, so listing or searching labels no longer scans
+the graph. A storage that changed labels publishes a new version of
+label_version_key() in index_done_callback; other processes rebuild their
+index when they see a newer version.
+
+The degrees double as the rank column of query contexts (no per-query degree
+queries), and with GRAPH_PAGERANK_INTERVAL > 0 PageRank scores computed in the
+background are kept next to them to order relations.
+
+PhraseTrie indexes entity names and relation keywords word by word; it backs
+the LLM-free keyword path of queries (QueryParam.fast_keywords).
+"""
+
+import bisect
+import heapq
+import re
+import time
+from typing import Iterable, Literal
+
+LabelOrder = Literal["name", "degree"]
+
+
+def label_version_key(namespace: str, workspace: str | None) -> str:
+    """Shared-storage namespace whose version tracks the labels of a graph"""
+    return f"{workspace or ''}:{namespace}:labels"
+
+
+def current_label_version(key: str) -> int:
+    from .shared_storage import get_namespace_version
+
+    try:
+        return get_namespace_version(key)
+    except ValueError:
+        # Shared data not initialized: single process, nothing to follow
+        return 0
+
+
+async def publish_label_version(key: str) -> int:
+    from .shared_storage import set_all_update_flags
+
+    try:
+        return await set_all_update_flags(key)
+    except ValueError:
+        return 0
+
+
+ENTITY = "entity"
+RELATION = "relation"
+_WORD = re.compile(r"\w+")
+_KEYWORD_SEPARATORS = re.compile(r"<SEP>|[,;\n]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its "
+    "me my of on or our should that the their them there these they this to "
+    "was we were what when where which who whom why will with would you your "
+    "about between tell explain describe give list show".split()
+)
+
+
+def split_relation_keywords(keywords: str) -> list[str]:
+    """Split an edge's keywords field into single keywords"""
+    return [k.strip() for k in _KEYWORD_SEPARATORS.split(keywords) if k.strip()]
+
+
+class PhraseTrie:
+    """Word-level trie of entity names and relation keywords
+
+    A query is tokenized into words once and matched leftmost-longest from each
+    position, so matching costs O(words x longest phrase) regardless of how many
+    phrases are indexed, and phrases can be added or removed at any time.
+    """
+
+    _END = ""  # never a word, marks the phrases ending at a node
+
+    def __init__(self):
+        self._root: dict = {}
+
+    def add(self, phrase: str, kind: str) -> None:
+        words = _WORD.findall(phrase.casefold())
+        if not words:
+            return
+        node = self._root
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(self._END, set()).add((kind, phrase))
+
+    def remove(self, phrase: str, kind: str) -> None:
+        node = self._root
+        for word in _WORD.findall(phrase.casefold()):
+            node = node.get(word)
+            if node is None:
+                return
+        node.get(self._END, set()).discard((kind, phrase))
+
+    def match(self, text: str) -> tuple[list[str], list[str], float]:
+        """Find the indexed phrases in a text
+
+        Returns:
+            Matched entity names, matched relation keywords, and the share of
+            the text's content words (stopwords excluded) covered by matches
+        """
+        words = _WORD.findall(text.casefold())
+        covered = [False] * len(words)
+        entities: dict[str, None] = {}
+        relations: dict[str, None] = {}
+        i = 0
+        while i < len(words):
+            node = self._root
+            longest_end, longest = i, None
+            for j in range(i, len(words)):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                if node.get(self._END):
+                    longest_end, longest = j + 1, node[self._END]
+            if not longest:
+                i += 1
+                continue
+            for kind, phrase in longest:
+                (entities if kind == ENTITY else relations)[phrase] = None
+            covered[i:longest_end] = [True] * (longest_end - i)
+            i = longest_end
+
+        content = [
+            k
+            for k, word in enumerate(words)
+            if len(word) > 1 and word not in _STOPWORDS
+        ]
+        coverage = sum(covered[k] for k in content) / len(content) if content else 0.0
+        return list(entities), list(relations), coverage
+
+
+def build_phrase_trie(labels: list[str], relation_keywords: list[str]) -> PhraseTrie:
+    trie = PhraseTrie()
+    for label in labels:
+        trie.add(label, ENTITY)
+    for keywords in relation_keywords:
+        for keyword in split_relation_keywords(keywords):
+            trie.add(keyword, RELATION)
+    return trie
+
+
+class LabelIndex:
+    """Case-insensitively sorted labels with their node degrees"""
+
+    def __init__(self, degrees: dict[str, int], version: int = 0):
+        self.version = version
+        self.built_at = time.monotonic()
+        self._degrees = dict(degrees)
+        self._keys = sorted((label.casefold(), label) for label in self._degrees)
+        self._stale_degrees: set[str] = set()
+        self._scores: dict[str, float] = {}
+        self.scores_computed_at: float | None = None
+        self.scores_version = -1
+        self.trie: PhraseTrie | None = None
+        # Phrase changes made while the trie is being built, see begin_trie
+        self._trie_changes: list[tuple[str, str, str]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, label: str) -> None:
+        if label not in self._degrees:
+            self._degrees[label] = 0
+            bisect.insort(self._keys, (label.casefold(), label))
+            self._change_trie("add", label, ENTITY)
+
+    def remove(self, label: str) -> None:
+        if self._degrees.pop(label, None) is not None:
+            key = (label.casefold(), label)
+            pos = bisect.bisect_left(self._keys, key)
+            if pos < len(self._keys) and self._keys[pos] == key:
+                del self._keys[pos]
+            self._change_trie("remove", label, ENTITY)
+        self._stale_degrees.discard(label)
+
+    def labels(self) -> list[str]:
+        return [label for _, label in self._keys]
+
+    def _change_trie(self, op: str, phrase: str, kind: str) -> None:
+        if self.trie is not None:
+            getattr(self.trie, op)(phrase, kind)
+        elif self._trie_changes is not None:
+            self._trie_changes.append((op, phrase, kind))
+
+    def add_relation_keywords(self, keywords: str) -> None:
+        """Index the keywords of a new or changed edge in the trie"""
+        for keyword in split_relation_keywords(keywords):
+            self._change_trie("add", keyword, RELATION)
+
+    def begin_trie(self) -> list[str]:
+        """Start building the trie: returns the labels to build it from and
+        records later label and keyword changes until set_trie applies them"""
+        self._trie_changes = []
+        return self.labels()
+
+    def set_trie(self, trie: PhraseTrie) -> None:
+        for op, phrase, kind in self._trie_changes or ():
+            getattr(trie, op)(phrase, kind)
+        self._trie_changes = None
+        self.trie = trie
+
+    def abandon_trie(self) -> None:
+        """The trie build failed: stop recording changes for it"""
+        self._trie_changes = None
+
+    def mark_degrees_stale(self, labels: Iterable[str]) -> None:
+        """Edges of these labels changed; their degrees are refreshed on demand"""
+        self._stale_degrees.update(label for label in labels if label in self._degrees)
+
+    def take_stale_degrees(self) -> list[str]:
+        stale = list(self._stale_degrees)
+        self._stale_degrees.clear()
+        return stale
+
+    def set_degrees(self, degrees: dict[str, int]) -> None:
+        for label, degree in degrees.items():
+            if label in self._degrees:
+                self._degrees[label] = degree
+
+    def degrees(self, labels: Iterable[str]) -> dict[str, int]:
+        """Degrees of the indexed labels among the given ones"""
+        return {
+            label: self._degrees[label] for label in labels if label in self._degrees
+        }
+
+    def set_scores(self, scores: dict[str, float]) -> None:
+        self._scores = scores
+        self.scores_computed_at = time.monotonic()
+
+    def inherit_scores(self, other: "LabelIndex") -> None:
+        """Keep serving the scores of a replaced index until they are recomputed"""
+        self._scores = other._scores
+        self.scores_computed_at = other.scores_computed_at
+
+    def scores(self, labels: Iterable[str]) -> dict[str, float]:
+        return {label: self._scores.get(label, 0.0) for label in labels}
+
+    def _matches(self, query: str, fuzzy: bool) -> list[tuple[int, str]]:
+        """Labels matching the query with their rank (0 prefix, 1 substring, 2 subsequence)"""
+        if not query:
+            return [(0, label) for _, label in self._keys]
+
+        start = bisect.bisect_left(self._keys, (query,))
+        matches = []
+        for key, label in self._keys[start:]:
+            if not key.startswith(query):
+                break
+            matches.append((0, label))
+        if not fuzzy:
+            return matches
+
+        for key, label in self._keys:
+            if key.startswith(query):
+                continue
+            if query in key:
+                matches.append((1, label))
+            elif _is_subsequence(query, key):
+                matches.append((2, label))
+        return matches
+
+    def search(
+        self,
+        query: str = "",
+        limit: int | None = None,
+        offset: int = 0,
+        order_by: LabelOrder = "name",
+        fuzzy: bool = False,
+    ) -> tuple[list[str], int]:
+        """Find labels starting with (or, with fuzzy, containing) the query
+
+        Matches are ranked prefix, substring, then subsequence matches; within
+        a rank they are ordered by name or by descending degree.
+
+        Returns:
+            The requested page of labels and the total number of matches
+        """
+        matches = self._matches(query.casefold(), fuzzy)
+        total = len(matches)
+        end = None if limit is None else offset + limit
+
+        if order_by == "degree":
+            degrees = self._degrees
+
+            def sort_key(match):
+                return match[0], -degrees.get(match[1], 0)
+
+            if end is not None and end < total:
+                page = heapq.nsmallest(end, matches, key=sort_key)[offset:]
+            else:
+                page = sorted(matches, key=sort_key)[offset:end]
+        elif fuzzy and query:
+            # Matches come grouped by rank and sorted by name within each group
+            page = sorted(matches, key=lambda m: m[0])[offset:end]
+        else:
+            page = matches[offset:end]
+        return [label for _, label in page], total
+
+
+def _is_subsequence(query: str, text: str) -> bool:
+    it = iter(text)
+    return all(char in it for char in query)
+
+
+def pagerank(
+    edges: list[tuple[str, str]], damping: float = 0.85, iterations: int = 30
+) -> dict[str, float]:
+    """PageRank of an undirected graph given as an edge list (power iteration)"""
+    neighbors: dict[str, list[str]] = {}
+    for src, tgt in edges:
+        if src == tgt:
+            continue
+        neighbors.setdefault(src, []).append(tgt)
+        neighbors.setdefault(tgt, []).append(src)
+    count = len(neighbors)
+    if not count:
+        return {}
+
+    scores = dict.fromkeys(neighbors, 1.0 / count)
+    base = (1.0 - damping) / count
+    for _ in range(iterations):
+        next_scores = dict.fromkeys(neighbors, base)
+        for node, node_neighbors in neighbors.items():
+            share = damping * scores[node] / len(node_neighbors)
+            for neighbor in node_neighbors:
+                next_scores[neighbor] += share
+        delta = sum(abs(next_scores[n] - scores[n]) for n in neighbors)
+        scores = next_scores
+        if delta < 1e-6 * count:
+            break
+    return scores
@@ -3,16 +3,14 @@ import os
 from typing import Any, final
 from dataclasses import dataclass
 import numpy as np
-from lightrag.utils import logger, compute_mdhash_id
+from lightrag.utils import logger, compute_mdhash_id, run_blocking
 from ..base import BaseVectorStorage
-import pipmaster as pm
+from lightrag.utils import ensure_package
 
 
-if not pm.is_installed("configparser"):
-    pm.install("configparser")
+ensure_package("configparser")
 
-if not pm.is_installed("pymilvus"):
-    pm.install("pymilvus")
+ensure_package("pymilvus")
 
 import configparser
 from pymilvus import MilvusClient  # type: ignore
@@ -98,14 +96,17 @@ class MilvusVectorDBStorage(BaseVectorStorage):
         embeddings = np.concatenate(embeddings_list)
         for i, d in enumerate(list_data):
             d["vector"] = embeddings[i]
-        results = self._client.upsert(collection_name=self.namespace, data=list_data)
+        results = await run_blocking(
+            self._client.upsert, collection_name=self.namespace, data=list_data
+        )
         return results
 
     async def query(
         self, query: str, top_k: int, ids: list[str] | None = None
     ) -> list[dict[str, Any]]:
         embedding = await self.embedding_func([query])
-        results = self._client.search(
+        results = await run_blocking(
+            self._client.search,
             collection_name=self.namespace,
             data=embedding,
             limit=top_k,
@@ -139,8 +140,8 @@ class MilvusVectorDBStorage(BaseVectorStorage):
             )
 
             # Delete the entity from Milvus collection
-            result = self._client.delete(
-                collection_name=self.namespace, pks=[entity_id]
+            result = await run_blocking(
+                self._client.delete, collection_name=self.namespace, pks=[entity_id]
             )
 
             if result and result.get("delete_count", 0) > 0:
@@ -162,8 +163,11 @@ class MilvusVectorDBStorage(BaseVectorStorage):
             expr = f'src_id == "{entity_name}" or tgt_id == "{entity_name}"'
 
             # Find all relations involving this entity
-            results = self._client.query(
-                collection_name=self.namespace, filter=expr, output_fields=["id"]
+            results = await run_blocking(
+                self._client.query,
+                collection_name=self.namespace,
+                filter=expr,
+                output_fields=["id"],
             )
 
             if not results or len(results) == 0:
@@ -178,8 +182,10 @@ class MilvusVectorDBStorage(BaseVectorStorage):
 
             # Delete the relations
             if relation_ids:
-                delete_result = self._client.delete(
-                    collection_name=self.namespace, pks=relation_ids
+                delete_result = await run_blocking(
+                    self._client.delete,
+                    collection_name=self.namespace,
+                    pks=relation_ids,
                 )
 
                 logger.debug(
@@ -197,7 +203,9 @@ class MilvusVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Delete vectors by IDs
-            result = self._client.delete(collection_name=self.namespace, pks=ids)
+            result = await run_blocking(
+                self._client.delete, collection_name=self.namespace, pks=ids
+            )
 
             if result and result.get("delete_count", 0) > 0:
                 logger.debug(
@@ -221,7 +229,8 @@ class MilvusVectorDBStorage(BaseVectorStorage):
         try:
             # Use Milvus query with expression to find IDs with the given prefix
             expression = f'id like "{prefix}%"'
-            results = self._client.query(
+            results = await run_blocking(
+                self._client.query,
                 collection_name=self.namespace,
                 filter=expression,
                 output_fields=list(self.meta_fields) + ["id"],
@@ -245,7 +254,8 @@ class MilvusVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Query Milvus for a specific ID
-            result = self._client.query(
+            result = await run_blocking(
+                self._client.query,
                 collection_name=self.namespace,
                 filter=f'id == "{id}"',
                 output_fields=list(self.meta_fields) + ["id"],
@@ -277,7 +287,8 @@ class MilvusVectorDBStorage(BaseVectorStorage):
             filter_expr = f'id in ["{id_list}"]'
 
             # Query Milvus with the filter
-            result = self._client.query(
+            result = await run_blocking(
+                self._client.query,
                 collection_name=self.namespace,
                 filter=filter_expr,
                 output_fields=list(self.meta_fields) + ["id"],
@@ -300,11 +311,12 @@ class MilvusVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Drop the collection and recreate it
-            if self._client.has_collection(self.namespace):
-                self._client.drop_collection(self.namespace)
+            if await run_blocking(self._client.has_collection, self.namespace):
+                await run_blocking(self._client.drop_collection, self.namespace)
 
             # Recreate the collection
-            MilvusVectorDBStorage.create_collection_if_not_exist(
+            await run_blocking(
+                MilvusVectorDBStorage.create_collection_if_not_exist,
                 self._client,
                 self.namespace,
                 dimension=self.embedding_func.embedding_dim,
@@ -1,4 +1,5 @@
 import os
+import re
 from dataclasses import dataclass, field
 import numpy as np
 import configparser
@@ -17,13 +18,11 @@ from ..base import (
 from ..namespace import NameSpace, is_namespace
 from ..utils import logger, compute_mdhash_id
 from ..types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
-import pipmaster as pm
+from lightrag.utils import ensure_package
 
-if not pm.is_installed("pymongo"):
-    pm.install("pymongo")
+ensure_package("pymongo")
 
-if not pm.is_installed("motor"):
-    pm.install("motor")
+ensure_package("motor")
 
 from motor.motor_asyncio import (  # type: ignore
     AsyncIOMotorClient,
@@ -146,6 +145,27 @@ class MongoKVStorage(BaseKVStorage):
         else:
             return None
 
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        return await self._data.find_one({"_id": f"{mode}_{args_hash}"})
+
+    async def get_cache_entries(self, mode: str) -> dict[str, dict[str, Any]]:
+        prefix = f"{mode}_"
+        cursor = self._data.find({"_id": {"$regex": f"^{re.escape(prefix)}"}})
+        return {doc["_id"][len(prefix) :]: doc async for doc in cursor}
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        await self._data.update_one(
+            {"_id": f"{mode}_{args_hash}"}, {"$set": entry}, upsert=True
+        )
+
+    async def delete_cache_entries(self, mode: str, args_hashes: list[str]) -> None:
+        if args_hashes:
+            await self._data.delete_many(
+                {"_id": {"$in": [f"{mode}_{args_hash}" for args_hash in args_hashes]}}
+            )
+
     async def index_done_callback(self) -> None:
         # Mongo handles persistence automatically
         pass
@@ -224,6 +244,8 @@ class MongoDocStatusStorage(DocStatusStorage):
         if self.db is None:
             self.db = await ClientManager.get_client()
             self._data = await get_or_create_collection(self.db, self._collection_name)
+            await self._data.create_index("content_hash", sparse=True)
+            await self._data.create_index([("status", 1), ("_id", 1)])
             logger.debug(f"Use MongoDB as DocStatus {self._collection_name}")
 
     async def finalize(self):
@@ -274,7 +296,7 @@ class MongoDocStatusStorage(DocStatusStorage):
         result = await cursor.to_list()
         return {
             doc["_id"]: DocProcessingStatus(
-                content=doc["content"],
+                content=doc.get("content"),
                 content_summary=doc.get("content_summary"),
                 content_length=doc["content_length"],
                 status=doc["status"],
@@ -282,10 +304,54 @@ class MongoDocStatusStorage(DocStatusStorage):
                 updated_at=doc.get("updated_at"),
                 chunks_count=doc.get("chunks_count", -1),
                 file_path=doc.get("file_path", doc["_id"]),
+                content_hash=doc.get("content_hash"),
             )
             for doc in result
         }
 
+    async def get_docs_page(
+        self, status: DocStatus, limit: int, cursor: str | None = None
+    ) -> tuple[dict[str, DocProcessingStatus], str | None]:
+        """Get one page of documents with a specific status, ordered by id"""
+        query: dict[str, Any] = {"status": status.value}
+        if cursor is not None:
+            query["_id"] = {"$gt": cursor}
+        # One extra document tells whether another page follows
+        result = (
+            await self._data.find(query, {"content": 0})
+            .sort("_id", 1)
+            .limit(limit + 1)
+            .to_list()
+        )
+        docs = {
+            doc["_id"]: DocProcessingStatus(
+                content_summary=doc.get("content_summary"),
+                content_length=doc["content_length"],
+                status=doc["status"],
+                created_at=doc.get("created_at"),
+                updated_at=doc.get("updated_at"),
+                chunks_count=doc.get("chunks_count", -1),
+                file_path=doc.get("file_path", doc["_id"]),
+                content_hash=doc.get("content_hash"),
+            )
+            for doc in result[:limit]
+        }
+        next_cursor = result[limit - 1]["_id"] if len(result) > limit else None
+        return docs, next_cursor
+
+    async def patch(self, data: dict[str, dict[str, Any]]) -> None:
+        """Update only the given fields of existing records"""
+        if not data:
+            return
+        await asyncio.gather(
+            *[self._data.update_one({"_id": k}, {"$set": v}) for k, v in data.items()]
+        )
+
+    async def get_doc_by_content_hash(self, content_hash: str) -> str | None:
+        """Return the id of a document whose source file has this hash"""
+        doc = await self._data.find_one({"content_hash": content_hash}, {"_id": 1})
+        return doc["_id"] if doc else None
+
     async def index_done_callback(self) -> None:
         # Mongo handles persistence automatically
         pass
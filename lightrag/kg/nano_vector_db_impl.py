@@ -9,16 +9,15 @@ from lightrag.utils import (
     logger,
     compute_mdhash_id,
 )
-import pipmaster as pm
+from lightrag.utils import ensure_package
 from lightrag.base import BaseVectorStorage
 
-if not pm.is_installed("nano-vectordb"):
-    pm.install("nano-vectordb")
+ensure_package("nano-vectordb")
 
 from nano_vectordb import NanoVectorDB
 from .shared_storage import (
+    SnapshotReloader,
     get_storage_lock,
-    get_update_flag,
     set_all_update_flags,
 )
 
@@ -30,7 +29,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
         # Initialize basic attributes
         self._client = None
         self._storage_lock = None
-        self.storage_updated = None
+        self._reloader = None
 
         # Use global config value if specified, otherwise use default
         kwargs = self.global_config.get("vector_db_storage_cls_kwargs", {})
@@ -53,29 +52,37 @@ class NanoVectorDBStorage(BaseVectorStorage):
 
     async def initialize(self):
         """Initialize storage data"""
-        # Get the update flag for cross-process update notification
-        self.storage_updated = await get_update_flag(self.namespace)
+        # Follow the versions other processes publish
+        self._reloader = SnapshotReloader(
+            self.namespace, self._load_client, self._set_client
+        )
         # Get the storage lock for use in other methods
         self._storage_lock = get_storage_lock(enable_logging=False)
 
-    async def _get_client(self):
-        """Check if the storage should be reloaded"""
-        # Acquire lock to prevent concurrent read and write
-        async with self._storage_lock:
-            # Check if data needs to be reloaded
-            if self.storage_updated.value:
-                logger.info(
-                    f"Process {os.getpid()} reloading {self.namespace} due to update by another process"
-                )
-                # Reload data
-                self._client = NanoVectorDB(
-                    self.embedding_func.embedding_dim,
-                    storage_file=self._client_file_name,
-                )
-                # Reset update flag
-                self.storage_updated.value = False
+    def _load_client(self) -> NanoVectorDB:
+        return NanoVectorDB(
+            self.embedding_func.embedding_dim,
+            storage_file=self._client_file_name,
+        )
+
+    def _set_client(self, client: NanoVectorDB) -> None:
+        self._client = client
 
-            return self._client
+    def _save_client(self) -> None:
+        # Save to a temp file and rename, so readers never load a partial file
+        tmp_file = f"{self._client_file_name}.tmp"
+        self._client.storage_file = tmp_file
+        try:
+            self._client.save()
+        finally:
+            self._client.storage_file = self._client_file_name
+        os.replace(tmp_file, self._client_file_name)
+
+    async def _get_client(self, for_write: bool = False):
+        """Return the client; a newer version saved by another process is loaded
+        in the background and swapped in, so queries never wait for it"""
+        await self._reloader.check(wait=for_write)
+        return self._client
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """
@@ -112,7 +119,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
         if len(embeddings) == len(list_data):
             for i, d in enumerate(list_data):
                 d["__vector__"] = embeddings[i]
-            client = await self._get_client()
+            client = await self._get_client(for_write=True)
             results = client.upsert(datas=list_data)
             return results
         else:
@@ -162,7 +169,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
             ids: List of vector IDs to be deleted
         """
         try:
-            client = await self._get_client()
+            client = await self._get_client(for_write=True)
             client.delete(ids)
             logger.debug(
                 f"Successfully deleted {len(ids)} vectors from {self.namespace}"
@@ -185,7 +192,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
             )
 
             # Check if the entity exists
-            client = await self._get_client()
+            client = await self._get_client(for_write=True)
             if client.get([entity_id]):
                 client.delete([entity_id])
                 logger.debug(f"Successfully deleted entity {entity_name}")
@@ -203,7 +210,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
         """
 
         try:
-            client = await self._get_client()
+            client = await self._get_client(for_write=True)
             storage = getattr(client, "_NanoVectorDB__storage")
             relations = [
                 dp
@@ -214,7 +221,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
             ids_to_delete = [relation["__id__"] for relation in relations]
 
             if ids_to_delete:
-                client = await self._get_client()
+                client = await self._get_client(for_write=True)
                 client.delete(ids_to_delete)
                 logger.debug(
                     f"Deleted {len(ids_to_delete)} relations for {entity_name}"
@@ -228,28 +235,23 @@ class NanoVectorDBStorage(BaseVectorStorage):
         """Save data to disk"""
         async with self._storage_lock:
             # Check if storage was updated by another process
-            if self.storage_updated.value:
+            if self._reloader.is_stale():
                 # Storage was updated by another process, reload data instead of saving
                 logger.warning(
                     f"Storage for {self.namespace} was updated by another process, reloading..."
                 )
-                self._client = NanoVectorDB(
-                    self.embedding_func.embedding_dim,
-                    storage_file=self._client_file_name,
-                )
-                # Reset update flag
-                self.storage_updated.value = False
+                await self._reloader.reload_now()
                 return False  # Return error
 
         # Acquire lock and perform persistence
         async with self._storage_lock:
             try:
                 # Save data to disk
-                self._client.save()
-                # Notify other processes that data has been updated
-                await set_all_update_flags(self.namespace)
-                # Reset own update flag to avoid self-reloading
-                self.storage_updated.value = False
+                self._save_client()
+                # Publish the new version; this process already holds it
+                self._reloader.loaded_version = await set_all_update_flags(
+                    self.namespace
+                )
                 return True  # Return success
             except Exception as e:
                 logger.error(f"Error saving data for {self.namespace}: {e}")
@@ -334,10 +336,10 @@ class NanoVectorDBStorage(BaseVectorStorage):
                     storage_file=self._client_file_name,
                 )
 
-                # Notify other processes that data has been updated
-                await set_all_update_flags(self.namespace)
-                # Reset own update flag to avoid self-reloading
-                self.storage_updated.value = False
+                # Publish the new version; this process already holds it
+                self._reloader.loaded_version = await set_all_update_flags(
+                    self.namespace
+                )
 
                 logger.info(
                     f"Process {os.getpid()} drop {self.namespace}(file:{self._client_file_name})"
@@ -18,10 +18,9 @@ import logging
 from ..utils import logger
 from ..base import BaseGraphStorage
 from ..types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
-import pipmaster as pm
+from lightrag.utils import ensure_package
 
-if not pm.is_installed("neo4j"):
-    pm.install("neo4j")
+ensure_package("neo4j")
 
 from neo4j import (  # type: ignore
     AsyncGraphDatabase,
@@ -43,6 +42,8 @@ logging.getLogger("neo4j").setLevel(logging.ERROR)
 @final
 @dataclass
 class Neo4JStorage(BaseGraphStorage):
+    maintains_label_index = True  # TNC
+
     def __init__(self, namespace, global_config, embedding_func):
         super().__init__(
             namespace=namespace,
@@ -198,7 +199,7 @@ class Neo4JStorage(BaseGraphStorage):
 
     async def index_done_callback(self) -> None:
         # Noe4J handles persistence automatically
-        pass
+        await self._publish_label_changes()  # TNC
 
     async def has_node(self, node_id: str) -> bool:
         """
@@ -569,6 +570,7 @@ class Neo4JStorage(BaseGraphStorage):
                     await result.consume()  # Ensure result is fully consumed
 
                 await session.execute_write(execute_upsert)
+            self._labels_upserted(node_id)  # TNC
         except Exception as e:
             logger.error(f"Error during upsert: {str(e)}")
             raise
@@ -631,6 +633,9 @@ class Neo4JStorage(BaseGraphStorage):
                         await result.consume()  # Ensure result is consumed
 
                 await session.execute_write(execute_upsert)
+            self._label_edges_changed(  # TNC
+                [source_node_id, target_node_id], edge_data.get("keywords")
+            )
         except Exception as e:
             logger.error(f"Error during edge upsert: {str(e)}")
             raise
@@ -638,6 +643,93 @@ class Neo4JStorage(BaseGraphStorage):
     async def _node2vec_embed(self):
         print("Implemented but never called.")
 
+    async def get_neighbors_batch(self, node_ids: list[str]) -> dict[str, list[str]]:
+        """Get the neighbor ids of several nodes with one query"""
+        async with self._driver.session(
+            database=self._DATABASE, default_access_mode="READ"
+        ) as session:
+            query = """
+                UNWIND $entity_ids AS entity_id
+                MATCH (n:base {entity_id: entity_id})-[]-(m:base)
+                RETURN entity_id, collect(DISTINCT m.entity_id) AS neighbors
+            """
+            result = await session.run(query, entity_ids=node_ids)
+            try:
+                return {
+                    record["entity_id"]: record["neighbors"] async for record in result
+                }
+            finally:
+                await result.consume()
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        """Get the degrees of several nodes with one query"""
+        async with self._driver.session(
+            database=self._DATABASE, default_access_mode="READ"
+        ) as session:
+            query = """
+                UNWIND $entity_ids AS entity_id
+                MATCH (n:base {entity_id: entity_id})
+                OPTIONAL MATCH (n)-[r]-()
+                RETURN entity_id, COUNT(r) AS degree
+            """
+            result = await session.run(query, entity_ids=node_ids)
+            try:
+                return {
+                    record["entity_id"]: record["degree"] async for record in result
+                }
+            finally:
+                await result.consume()
+
+    async def get_all_label_degrees(self) -> dict[str, int]:
+        """Get the degree of every node with one query"""
+        async with self._driver.session(
+            database=self._DATABASE, default_access_mode="READ"
+        ) as session:
+            query = """
+                MATCH (n:base)
+                WHERE n.entity_id IS NOT NULL
+                OPTIONAL MATCH (n)-[r]-()
+                RETURN n.entity_id AS entity_id, COUNT(r) AS degree
+            """
+            result = await session.run(query)
+            try:
+                return {
+                    record["entity_id"]: record["degree"] async for record in result
+                }
+            finally:
+                await result.consume()
+
+    async def get_all_relation_keywords(self) -> list[str]:
+        """Get the distinct keywords fields of all edges with one query"""
+        async with self._driver.session(
+            database=self._DATABASE, default_access_mode="READ"
+        ) as session:
+            query = """
+                MATCH (:base)-[r]->(:base)
+                WHERE r.keywords IS NOT NULL
+                RETURN DISTINCT r.keywords AS keywords
+            """
+            result = await session.run(query)
+            try:
+                return [record["keywords"] async for record in result]
+            finally:
+                await result.consume()
+
+    async def get_all_edge_pairs(self) -> list[tuple[str, str]]:
+        """Get every edge as a (source, target) pair with one query"""
+        async with self._driver.session(
+            database=self._DATABASE, default_access_mode="READ"
+        ) as session:
+            query = """
+                MATCH (a:base)-[]->(b:base)
+                RETURN a.entity_id AS source, b.entity_id AS target
+            """
+            result = await session.run(query)
+            try:
+                return [(record["source"], record["target"]) async for record in result]
+            finally:
+                await result.consume()
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -660,6 +752,21 @@ class Neo4JStorage(BaseGraphStorage):
         seen_nodes = set()
         seen_edges = set()
 
+        # TNC: select nodes with the budgeted BFS of bfs_subgraph_nodes (batched
+        # neighbor queries, no APOC needed) and fetch them in one query
+        node_ids = None
+        if node_label != "*":
+            if not await self.has_node(node_label):
+                logger.debug(f"No nodes found for entity_id: {node_label}")
+                return result
+            node_ids, result.is_truncated = await self.bfs_subgraph_nodes(
+                node_label, max_depth, max_nodes
+            )
+            if result.is_truncated:
+                logger.info(
+                    f"Graph truncated: breadth-first search limited to {max_nodes} nodes"
+                )
+
         async with self._driver.session(
             database=self._DATABASE, default_access_mode="READ"
         ) as session:
@@ -708,92 +815,27 @@ class Neo4JStorage(BaseGraphStorage):
                             await result_set.consume()
 
                 else:
-                    # return await self._robust_fallback(node_label, max_depth, max_nodes)
-                    # First try without limit to check if we need to truncate
-                    full_query = """
-                    MATCH (start)
-                    WHERE start.entity_id = $entity_id
-                    WITH start
-                    CALL apoc.path.subgraphAll(start, {
-                        relationshipFilter: '',
-                        minLevel: 0,
-                        maxLevel: $max_depth,
-                        bfs: true
-                    })
-                    YIELD nodes, relationships
-                    WITH nodes, relationships, size(nodes) AS total_nodes
-                    UNWIND nodes AS node
-                    WITH collect({node: node}) AS node_info, relationships, total_nodes
-                    RETURN node_info, relationships, total_nodes
+                    subgraph_query = """
+                    MATCH (n:base)
+                    WHERE n.entity_id IN $entity_ids
+                    WITH collect(n) AS kept_nodes
+                    UNWIND kept_nodes AS a
+                    OPTIONAL MATCH (a)-[r]-(b)
+                    WHERE b IN kept_nodes
+                    WITH kept_nodes, collect(DISTINCT r) AS relationships
+                    RETURN [node IN kept_nodes | {node: node}] AS node_info,
+                           relationships
                     """
-
-                    # Try to get full result
-                    full_result = None
+                    result_set = None
                     try:
-                        full_result = await session.run(
-                            full_query,
-                            {
-                                "entity_id": node_label,
-                                "max_depth": max_depth,
-                            },
+                        result_set = await session.run(
+                            subgraph_query,
+                            {"entity_ids": node_ids},
                         )
-                        full_record = await full_result.single()
-
-                        # If no record found, return empty KnowledgeGraph
-                        if not full_record:
-                            logger.debug(f"No nodes found for entity_id: {node_label}")
-                            return result
-
-                        # If record found, check node count
-                        total_nodes = full_record["total_nodes"]
-
-                        if total_nodes <= max_nodes:
-                            # If node count is within limit, use full result directly
-                            logger.debug(
-                                f"Using full result with {total_nodes} nodes (no truncation needed)"
-                            )
-                            record = full_record
-                        else:
-                            # If node count exceeds limit, set truncated flag and run limited query
-                            result.is_truncated = True
-                            logger.info(
-                                f"Graph truncated: {total_nodes} nodes found, breadth-first search limited to {max_nodes}"
-                            )
-
-                            # Run limited query
-                            limited_query = """
-                            MATCH (start)
-                            WHERE start.entity_id = $entity_id
-                            WITH start
-                            CALL apoc.path.subgraphAll(start, {
-                                relationshipFilter: '',
-                                minLevel: 0,
-                                maxLevel: $max_depth,
-                                limit: $max_nodes,
-                                bfs: true
-                            })
-                            YIELD nodes, relationships
-                            UNWIND nodes AS node
-                            WITH collect({node: node}) AS node_info, relationships
-                            RETURN node_info, relationships
-                            """
-                            result_set = None
-                            try:
-                                result_set = await session.run(
-                                    limited_query,
-                                    {
-                                        "entity_id": node_label,
-                                        "max_depth": max_depth,
-                                        "max_nodes": max_nodes,
-                                    },
-                                )
-                                record = await result_set.single()
-                            finally:
-                                if result_set:
-                                    await result_set.consume()
+                        record = await result_set.single()
                     finally:
-                        if full_result:
-                            await full_result.consume()
+                        if result_set:
+                            await result_set.consume()
 
                 if record:
                     # Handle nodes (compatible with multi-label cases)
@@ -832,174 +874,8 @@ class Neo4JStorage(BaseGraphStorage):
                     )
 
             except neo4jExceptions.ClientError as e:
-                logger.warning(f"APOC plugin error: {str(e)}")
-                if node_label != "*":
-                    logger.warning(
-                        "Neo4j: falling back to basic Cypher recursive search..."
-                    )
-                    return await self._robust_fallback(node_label, max_depth, max_nodes)
-                else:
-                    logger.warning(
-                        "Neo4j: APOC plugin error with wildcard query, returning empty result"
-                    )
-
-        return result
-
-    async def _robust_fallback(
-        self, node_label: str, max_depth: int, max_nodes: int
-    ) -> KnowledgeGraph:
-        """
-        Fallback implementation when APOC plugin is not available or incompatible.
-        This method implements the same functionality as get_knowledge_graph but uses
-        only basic Cypher queries and true breadth-first traversal instead of APOC procedures.
-        """
-        from collections import deque
-
-        result = KnowledgeGraph()
-        visited_nodes = set()
-        visited_edges = set()
-        visited_edge_pairs = set()  # 用于跟踪已处理的边对(排序后的source_id, target_id)
-
-        # Get the starting node's data
-        async with self._driver.session(
-            database=self._DATABASE, default_access_mode="READ"
-        ) as session:
-            query = """
-            MATCH (n:base {entity_id: $entity_id})
-            RETURN id(n) as node_id, n
-            """
-            node_result = await session.run(query, entity_id=node_label)
-            try:
-                node_record = await node_result.single()
-                if not node_record:
-                    return result
-
-                # Create initial KnowledgeGraphNode
-                start_node = KnowledgeGraphNode(
-                    id=f"{node_record['n'].get('entity_id')}",
-                    labels=[node_record["n"].get("entity_id")],
-                    properties=dict(node_record["n"]._properties),
-                )
-            finally:
-                await node_result.consume()  # Ensure results are consumed
-
-        # Initialize queue for BFS with (node, edge, depth) tuples
-        # edge is None for the starting node
-        queue = deque([(start_node, None, 0)])
-
-        # True BFS implementation using a queue
-        while queue and len(visited_nodes) < max_nodes:
-            # Dequeue the next node to process
-            current_node, current_edge, current_depth = queue.popleft()
-
-            # Skip if already visited or exceeds max depth
-            if current_node.id in visited_nodes:
-                continue
-
-            if current_depth > max_depth:
-                logger.debug(
-                    f"Skipping node at depth {current_depth} (max_depth: {max_depth})"
-                )
-                continue
-
-            # Add current node to result
-            result.nodes.append(current_node)
-            visited_nodes.add(current_node.id)
-
-            # Add edge to result if it exists and not already added
-            if current_edge and current_edge.id not in visited_edges:
-                result.edges.append(current_edge)
-                visited_edges.add(current_edge.id)
-
-            # Stop if we've reached the node limit
-            if len(visited_nodes) >= max_nodes:
-                result.is_truncated = True
-                logger.info(
-                    f"Graph truncated: breadth-first search limited to: {max_nodes} nodes"
-                )
-                break
+                logger.warning(f"Neo4j: subgraph query error: {str(e)}")
 
-            # Get all edges and target nodes for the current node (even at max_depth)
-            async with self._driver.session(
-                database=self._DATABASE, default_access_mode="READ"
-            ) as session:
-                query = """
-                MATCH (a:base {entity_id: $entity_id})-[r]-(b)
-                WITH r, b, id(r) as edge_id, id(b) as target_id
-                RETURN r, b, edge_id, target_id
-                """
-                results = await session.run(query, entity_id=current_node.id)
-
-                # Get all records and release database connection
-                records = await results.fetch(1000)  # Max neighbor nodes we can handle
-                await results.consume()  # Ensure results are consumed
-
-                # Process all neighbors - capture all edges but only queue unvisited nodes
-                for record in records:
-                    rel = record["r"]
-                    edge_id = str(record["edge_id"])
-
-                    if edge_id not in visited_edges:
-                        b_node = record["b"]
-                        target_id = b_node.get("entity_id")
-
-                        if target_id:  # Only process if target node has entity_id
-                            # Create KnowledgeGraphNode for target
-                            target_node = KnowledgeGraphNode(
-                                id=f"{target_id}",
-                                labels=[target_id],
-                                properties=dict(b_node._properties),
-                            )
-
-                            # Create KnowledgeGraphEdge
-                            target_edge = KnowledgeGraphEdge(
-                                id=f"{edge_id}",
-                                type=rel.type,
-                                source=f"{current_node.id}",
-                                target=f"{target_id}",
-                                properties=dict(rel),
-                            )
-
-                            # 对source_id和target_id进行排序，确保(A,B)和(B,A)被视为同一条边
-                            sorted_pair = tuple(sorted([current_node.id, target_id]))
-
-                            # 检查是否已存在相同的边（考虑无向性）
-                            if sorted_pair not in visited_edge_pairs:
-                                # 只有当目标节点已经在结果中或将被添加到结果中时，才添加边
-                                if target_id in visited_nodes or (
-                                    target_id not in visited_nodes
-                                    and current_depth < max_depth
-                                ):
-                                    result.edges.append(target_edge)
-                                    visited_edges.add(edge_id)
-                                    visited_edge_pairs.add(sorted_pair)
-
-                            # Only add unvisited nodes to the queue for further expansion
-                            if target_id not in visited_nodes:
-                                # Only add to queue if we're not at max depth yet
-                                if current_depth < max_depth:
-                                    # Add node to queue with incremented depth
-                                    # Edge is already added to result, so we pass None as edge
-                                    queue.append((target_node, None, current_depth + 1))
-                                else:
-                                    # At max depth, we've already added the edge but we don't add the node
-                                    # This prevents adding nodes beyond max_depth to the result
-                                    logger.debug(
-                                        f"Node {target_id} beyond max depth {max_depth}, edge added but node not included"
-                                    )
-                            else:
-                                # If target node already exists in result, we don't need to add it again
-                                logger.debug(
-                                    f"Node {target_id} already visited, edge added but node not queued"
-                                )
-                        else:
-                            logger.warning(
-                                f"Skipping edge {edge_id} due to missing entity_id on target node"
-                            )
-
-        logger.info(
-            f"BFS subgraph query successful | Node count: {len(result.nodes)} | Edge count: {len(result.edges)}"
-        )
         return result
 
     async def get_all_labels(self) -> list[str]:
@@ -1063,6 +939,7 @@ class Neo4JStorage(BaseGraphStorage):
         try:
             async with self._driver.session(database=self._DATABASE) as session:
                 await session.execute_write(_do_delete)
+            self._labels_removed()  # TNC
         except Exception as e:
             logger.error(f"Error during node deletion: {str(e)}")
             raise
@@ -1122,6 +999,7 @@ class Neo4JStorage(BaseGraphStorage):
             try:
                 async with self._driver.session(database=self._DATABASE) as session:
                     await session.execute_write(_do_delete_edge)
+                self._label_edges_changed([source, target])  # TNC
             except Exception as e:
                 logger.error(f"Error during edge deletion: {str(e)}")
                 raise
@@ -1147,6 +1025,8 @@ class Neo4JStorage(BaseGraphStorage):
                 query = "MATCH (n) DETACH DELETE n"
                 result = await session.run(query)
                 await result.consume()  # Ensure result is fully consumed
+                self._labels_removed()  # TNC
+                await self._publish_label_changes()
 
                 logger.info(
                     f"Process {os.getpid()} drop Neo4j database {self._DATABASE}"
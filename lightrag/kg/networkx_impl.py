@@ -7,19 +7,17 @@ from lightrag.types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdg
 from lightrag.utils import logger
 from lightrag.base import BaseGraphStorage
 
-import pipmaster as pm
+from lightrag.utils import ensure_package
 
-if not pm.is_installed("networkx"):
-    pm.install("networkx")
+ensure_package("networkx")
 
-if not pm.is_installed("graspologic"):
-    pm.install("graspologic")
+ensure_package("graspologic")
 
 import networkx as nx
 from graspologic import embed
 from .shared_storage import (
+    SnapshotReloader,
     get_storage_lock,
-    get_update_flag,
     set_all_update_flags,
 )
 
@@ -29,6 +27,8 @@ MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 @final
 @dataclass
 class NetworkXStorage(BaseGraphStorage):
+    maintains_label_index = True  # TNC
+
     @staticmethod
     def load_nx_graph(file_name) -> nx.Graph:
         if os.path.exists(file_name):
@@ -40,7 +40,10 @@ class NetworkXStorage(BaseGraphStorage):
         logger.info(
             f"Writing graph with {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges"
         )
-        nx.write_graphml(graph, file_name)
+        # Write to a temp file and rename, so readers never load a partial file
+        tmp_file = f"{file_name}.tmp"
+        nx.write_graphml(graph, tmp_file)
+        os.replace(tmp_file, file_name)
 
     # TODO：deprecated, remove later
     @staticmethod
@@ -81,7 +84,7 @@ class NetworkXStorage(BaseGraphStorage):
             self.global_config["working_dir"], f"graph_{self.namespace}.graphml"
         )
         self._storage_lock = None
-        self.storage_updated = None
+        self._reloader = None
         self._graph = None
 
         # Load initial graph
@@ -100,28 +103,26 @@ class NetworkXStorage(BaseGraphStorage):
 
     async def initialize(self):
         """Initialize storage data"""
-        # Get the update flag for cross-process update notification
-        self.storage_updated = await get_update_flag(self.namespace)
+        # Follow the graph versions other processes publish
+        self._reloader = SnapshotReloader(
+            self.namespace, self._load_graph, self._set_graph
+        )
         # Get the storage lock for use in other methods
         self._storage_lock = get_storage_lock()
 
-    async def _get_graph(self):
-        """Check if the storage should be reloaded"""
-        # Acquire lock to prevent concurrent read and write
-        async with self._storage_lock:
-            # Check if data needs to be reloaded
-            if self.storage_updated.value:
-                logger.info(
-                    f"Process {os.getpid()} reloading graph {self.namespace} due to update by another process"
-                )
-                # Reload data
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
-                # Reset update flag
-                self.storage_updated.value = False
+    def _load_graph(self) -> nx.Graph:
+        return NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
 
-            return self._graph
+    def _set_graph(self, graph: nx.Graph) -> None:
+        self._graph = graph
+        # TNC: the label index described the previous graph
+        self._label_index = None
+
+    async def _get_graph(self, for_write: bool = False):
+        """Return the graph; a newer version saved by another process is loaded
+        in the background and swapped in, so reads never wait for it"""
+        await self._reloader.check(wait=for_write)
+        return self._graph
 
     async def has_node(self, node_id: str) -> bool:
         graph = await self._get_graph()
@@ -162,8 +163,9 @@ class NetworkXStorage(BaseGraphStorage):
         2. Only one process should updating the storage at a time before index_done_callback,
            KG-storage-log should be used to avoid data corruption
         """
-        graph = await self._get_graph()
+        graph = await self._get_graph(for_write=True)
         graph.add_node(node_id, **node_data)
+        self._labels_upserted(node_id)  # TNC
 
     async def upsert_edge(
         self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
@@ -174,8 +176,13 @@ class NetworkXStorage(BaseGraphStorage):
         2. Only one process should updating the storage at a time before index_done_callback,
            KG-storage-log should be used to avoid data corruption
         """
-        graph = await self._get_graph()
+        graph = await self._get_graph(for_write=True)
         graph.add_edge(source_node_id, target_node_id, **edge_data)
+        self._labels_upserted(source_node_id)  # TNC
+        self._labels_upserted(target_node_id)
+        self._label_edges_changed(
+            [source_node_id, target_node_id], edge_data.get("keywords")
+        )
 
     async def delete_node(self, node_id: str) -> None:
         """
@@ -184,9 +191,10 @@ class NetworkXStorage(BaseGraphStorage):
         2. Only one process should updating the storage at a time before index_done_callback,
            KG-storage-log should be used to avoid data corruption
         """
-        graph = await self._get_graph()
+        graph = await self._get_graph(for_write=True)
         if graph.has_node(node_id):
             graph.remove_node(node_id)
+            self._labels_removed()  # TNC
             logger.debug(f"Node {node_id} deleted from the graph.")
         else:
             logger.warning(f"Node {node_id} not found in the graph for deletion.")
@@ -220,10 +228,11 @@ class NetworkXStorage(BaseGraphStorage):
         Args:
             nodes: List of node IDs to be deleted
         """
-        graph = await self._get_graph()
+        graph = await self._get_graph(for_write=True)
         for node in nodes:
             if graph.has_node(node):
                 graph.remove_node(node)
+        self._labels_removed()  # TNC
 
     async def remove_edges(self, edges: list[tuple[str, str]]):
         """Delete multiple edges
@@ -236,10 +245,11 @@ class NetworkXStorage(BaseGraphStorage):
         Args:
             edges: List of edges to be deleted, each edge is a (source, target) tuple
         """
-        graph = await self._get_graph()
+        graph = await self._get_graph(for_write=True)
         for source, target in edges:
             if graph.has_edge(source, target):
                 graph.remove_edge(source, target)
+                self._label_edges_changed([source, target])  # TNC
 
     async def get_all_labels(self) -> list[str]:
         """
@@ -255,6 +265,34 @@ class NetworkXStorage(BaseGraphStorage):
         # Return sorted list
         return sorted(list(labels))
 
+    async def get_neighbors_batch(self, node_ids: list[str]) -> dict[str, list[str]]:
+        graph = await self._get_graph()
+        return {
+            node_id: list(graph.neighbors(node_id))
+            for node_id in node_ids
+            if graph.has_node(node_id)
+        }
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        graph = await self._get_graph()
+        return {
+            node_id: graph.degree(node_id)
+            for node_id in node_ids
+            if graph.has_node(node_id)
+        }
+
+    async def get_all_label_degrees(self) -> dict[str, int]:
+        graph = await self._get_graph()
+        return {str(node): degree for node, degree in graph.degree()}
+
+    async def get_all_relation_keywords(self) -> list[str]:
+        graph = await self._get_graph()
+        return [keywords for _, _, keywords in graph.edges(data="keywords") if keywords]
+
+    async def get_all_edge_pairs(self) -> list[tuple[str, str]]:
+        graph = await self._get_graph()
+        return [(str(source), str(target)) for source, target in graph.edges()]
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -300,30 +338,11 @@ class NetworkXStorage(BaseGraphStorage):
                 logger.warning(f"Node {node_label} not found in the graph")
                 return KnowledgeGraph()  # Return empty graph
 
-            # Use BFS to get nodes
-            bfs_nodes = []
-            visited = set()
-            queue = [(node_label, 0)]  # (node, depth) tuple
-
-            # Breadth-first search
-            while queue and len(bfs_nodes) < max_nodes:
-                current, depth = queue.pop(0)
-                if current not in visited:
-                    visited.add(current)
-                    bfs_nodes.append(current)
-
-                    # Only explore neighbors if we haven't reached max_depth
-                    if depth < max_depth:
-                        # Add neighbor nodes to queue with incremented depth
-                        neighbors = list(graph.neighbors(current))
-                        queue.extend(
-                            [(n, depth + 1) for n in neighbors if n not in visited]
-                        )
-
-            # Check if graph is truncated - if we still have nodes in the queue
-            # and we've reached max_nodes, then the graph is truncated
-            if queue and len(bfs_nodes) >= max_nodes:
-                result.is_truncated = True
+            # Level-by-level BFS with a node budget, see bfs_subgraph_nodes
+            bfs_nodes, result.is_truncated = await self.bfs_subgraph_nodes(
+                node_label, max_depth, max_nodes
+            )
+            if result.is_truncated:
                 logger.info(
                     f"Graph truncated: breadth-first search limited to {max_nodes} nodes"
                 )
@@ -390,16 +409,12 @@ class NetworkXStorage(BaseGraphStorage):
         """Save data to disk"""
         async with self._storage_lock:
             # Check if storage was updated by another process
-            if self.storage_updated.value:
+            if self._reloader.is_stale():
                 # Storage was updated by another process, reload data instead of saving
                 logger.warning(
                     f"Graph for {self.namespace} was updated by another process, reloading..."
                 )
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
-                # Reset update flag
-                self.storage_updated.value = False
+                await self._reloader.reload_now()
                 return False  # Return error
 
         # Acquire lock and perform persistence
@@ -407,10 +422,11 @@ class NetworkXStorage(BaseGraphStorage):
             try:
                 # Save data to disk
                 NetworkXStorage.write_nx_graph(self._graph, self._graphml_xml_file)
-                # Notify other processes that data has been updated
-                await set_all_update_flags(self.namespace)
-                # Reset own update flag to avoid self-reloading
-                self.storage_updated.value = False
+                # Publish the new version; this process already holds it
+                self._reloader.loaded_version = await set_all_update_flags(
+                    self.namespace
+                )
+                await self._publish_label_changes()  # TNC
                 return True  # Return success
             except Exception as e:
                 logger.error(f"Error saving graph for {self.namespace}: {e}")
@@ -438,10 +454,12 @@ class NetworkXStorage(BaseGraphStorage):
                 if os.path.exists(self._graphml_xml_file):
                     os.remove(self._graphml_xml_file)
                 self._graph = nx.Graph()
-                # Notify other processes that data has been updated
-                await set_all_update_flags(self.namespace)
-                # Reset own update flag to avoid self-reloading
-                self.storage_updated.value = False
+                # Publish the new version; this process already holds it
+                self._reloader.loaded_version = await set_all_update_flags(
+                    self.namespace
+                )
+                self._labels_removed()  # TNC
+                await self._publish_label_changes()
                 logger.info(
                     f"Process {os.getpid()} drop graph {self.namespace} (file:{self._graphml_xml_file})"
                 )
@@ -2,8 +2,9 @@ import asyncio
 import json
 import os
 import time
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from typing import Any, Union, final
+from typing import Any, AsyncIterator, Union, final
 import numpy as np
 import configparser
 
@@ -26,11 +27,11 @@ from ..base import (
 )
 from ..namespace import NameSpace, is_namespace
 from ..utils import logger
+from .cache_policy_tnc import CachePolicy # TNC
 
-import pipmaster as pm
+from lightrag.utils import ensure_package
 
-if not pm.is_installed("asyncpg"):
-    pm.install("asyncpg")
+ensure_package("asyncpg")
 
 import asyncpg  # type: ignore
 from asyncpg import Pool  # type: ignore
@@ -40,20 +41,40 @@ MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 
 
 class PostgreSQLDB:
-    def __init__(self, config: dict[str, Any], **kwargs: Any):
+    def __init__(
+        self, config: dict[str, Any], pool: Pool | None = None, **kwargs: Any
+    ):
         self.host = config.get("host", "localhost")
         self.port = config.get("port", 5432)
         self.user = config.get("user", "postgres")
         self.password = config.get("password", None)
         self.database = config.get("database", "postgres")
         self.workspace = config.get("workspace", "default")
-        self.max = 12
+        self.max = int(config.get("max_connections") or 12)
         self.increment = 1
-        self.pool: Pool | None = None
+        # A pool handed in by ClientManager is shared with other workspaces
+        self.pool: Pool | None = pool
+        # Caps connections this workspace may hold at once (0 = no cap) so one
+        # tenant cannot starve the others on a shared pool
+        workspace_max = int(config.get("workspace_max_connections") or 0)
+        self._connection_limit: asyncio.Semaphore | None = (
+            asyncio.Semaphore(workspace_max) if workspace_max > 0 else None
+        )
 
         if self.user is None or self.password is None or self.database is None:
             raise ValueError("Missing database user, password, or database")
 
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """Acquire a pooled connection, honoring the per-workspace cap."""
+        if self._connection_limit is None:
+            async with self.pool.acquire() as connection:  # type: ignore
+                yield connection
+        else:
+            async with self._connection_limit:
+                async with self.pool.acquire() as connection:  # type: ignore
+                    yield connection
+
     async def initdb(self):
         try:
             self.pool = await asyncpg.create_pool(  # type: ignore
@@ -134,6 +155,14 @@ class PostgreSQLDB:
                     f"PostgreSQL, Failed to create index on table {k}, Got: {e}"
                 )
 
+            for migration in v.get("migrations", []):
+                try:
+                    await self.execute(migration)
+                except Exception as e:
+                    logger.error(
+                        f"PostgreSQL, Failed to migrate table {k}: {migration}, Got: {e}"
+                    )
+
     async def query(
         self,
         sql: str,
@@ -142,7 +171,7 @@ class PostgreSQLDB:
         with_age: bool = False,
         graph_name: str | None = None,
     ) -> dict[str, Any] | None | list[dict[str, Any]]:
-        async with self.pool.acquire() as connection:  # type: ignore
+        async with self.acquire() as connection:
             if with_age and graph_name:
                 await self.configure_age(connection, graph_name)  # type: ignore
             elif with_age and not graph_name:
@@ -180,7 +209,7 @@ class PostgreSQLDB:
         graph_name: str | None = None,
     ):
         try:
-            async with self.pool.acquire() as connection:  # type: ignore
+            async with self.acquire() as connection:
                 if with_age and graph_name:
                     await self.configure_age(connection, graph_name)  # type: ignore
                 elif with_age and not graph_name:
@@ -205,6 +234,8 @@ class PostgreSQLDB:
 
 class ClientManager:
     _instances: dict[str, dict[str, Any]] = {} # TNC
+    # Process-wide pool shared by all workspaces when POSTGRES_SHARED_POOL is on
+    _shared_pool: dict[str, Any] | None = None
     _lock = asyncio.Lock()
 
     @staticmethod
@@ -233,6 +264,19 @@ class ClientManager:
             ),
             "workspace": workspace  # TNC
                 or os.environ.get("POSTGRES_WORKSPACE", config.get("postgres", "workspace", fallback="default")),  # TNC
+            "shared_pool": os.environ.get(
+                "POSTGRES_SHARED_POOL",
+                config.get("postgres", "shared_pool", fallback="false"),
+            ).lower()
+            in ("true", "1", "yes"),
+            "max_connections": os.environ.get(
+                "POSTGRES_MAX_CONNECTIONS",
+                config.get("postgres", "max_connections", fallback=12),
+            ),
+            "workspace_max_connections": os.environ.get(
+                "POSTGRES_WORKSPACE_MAX_CONNECTIONS",
+                config.get("postgres", "workspace_max_connections", fallback=0),
+            ),
         }
 
     @classmethod
@@ -240,9 +284,15 @@ class ClientManager:
         async with cls._lock:
             if workspace not in cls._instances: # TNC
                 config = cls.get_config(workspace) # TNC
-                db = PostgreSQLDB(config)
-                await db.initdb()
-                await db.check_tables()
+                if config["shared_pool"]:
+                    # Workspace travels as a SQL parameter, so every workspace
+                    # can issue its queries over the same connections
+                    pool = await cls._acquire_shared_pool(config)
+                    db = PostgreSQLDB(config, pool=pool)
+                else:
+                    db = PostgreSQLDB(config)
+                    await db.initdb()
+                    await db.check_tables()
                 cls._instances[workspace] = {"db": db, "ref_count": 0} # TNC
             cls._instances[workspace]["ref_count"] += 1 # TNC
             return cls._instances[workspace]["db"] # TNC
@@ -254,10 +304,36 @@ class ClientManager:
             if workspace in cls._instances: # TNC
                 cls._instances[workspace]["ref_count"] -= 1 # TNC
                 if cls._instances[workspace]["ref_count"] == 0: # TNC
-                    await db.pool.close()
-                    logger.info(f"Closed PostgreSQL database connection pool for workspace '{workspace}'") # TNC
+                    if cls._shared_pool is not None and db.pool is cls._shared_pool["pool"]:
+                        await cls._release_shared_pool()
+                    else:
+                        await db.pool.close()
+                        logger.info(f"Closed PostgreSQL database connection pool for workspace '{workspace}'") # TNC
                     del cls._instances[workspace] # TNC
 
+    @classmethod
+    async def _acquire_shared_pool(cls, config: dict[str, Any]) -> Pool:
+        """Return the process-wide pool, creating it on first use; caller holds _lock."""
+        if cls._shared_pool is None:
+            db = PostgreSQLDB(config)
+            await db.initdb()
+            await db.check_tables()
+            cls._shared_pool = {"pool": db.pool, "ref_count": 0}
+            logger.info(
+                f"PostgreSQL, Created shared connection pool (max {db.max} connections)"
+            )
+        cls._shared_pool["ref_count"] += 1
+        return cls._shared_pool["pool"]
+
+    @classmethod
+    async def _release_shared_pool(cls) -> None:
+        """Drop one workspace reference on the shared pool; caller holds _lock."""
+        cls._shared_pool["ref_count"] -= 1
+        if cls._shared_pool["ref_count"] == 0:
+            await cls._shared_pool["pool"].close()
+            cls._shared_pool = None
+            logger.info("Closed shared PostgreSQL database connection pool")
+
 
 @final
 @dataclass
@@ -382,10 +458,74 @@ class PGKVStorage(BaseKVStorage):
                         "original_prompt": v["original_prompt"],
                         "return_value": v["return"],
                         "mode": mode,
+                        "cache_type": v.get("cache_type"), # TNC
                     }
 
                     await self.db.execute(upsert_sql, _data)
 
+    # TNC: point reads and writes of LLM cache entries
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        sql = SQL_TEMPLATES["get_by_mode_id_llm_response_cache"]
+        params = {"workspace": self.db.workspace, "mode": mode, "id": args_hash}
+        return await self.db.query(sql, params) or None
+
+    async def get_cache_entries(self, mode: str) -> dict[str, dict[str, Any]]:
+        sql = SQL_TEMPLATES["get_by_id_llm_response_cache"]
+        params = {"workspace": self.db.workspace, "mode": mode}
+        rows = await self.db.query(sql, params, multirows=True) or []
+        return {row["id"]: row for row in rows}
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        _data = {
+            "workspace": self.db.workspace,
+            "id": args_hash,
+            "original_prompt": entry["original_prompt"],
+            "return_value": entry["return"],
+            "mode": mode,
+            "cache_type": entry.get("cache_type"),
+        }
+        await self.db.execute(SQL_TEMPLATES["upsert_llm_response_cache"], _data)
+
+    async def delete_cache_entries(self, mode: str, args_hashes: list[str]) -> None:
+        if not args_hashes:
+            return
+        sql = "DELETE FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode=$2 AND id = ANY($3)"
+        await self.db.execute(
+            sql, {"workspace": self.db.workspace, "mode": mode, "ids": args_hashes}
+        )
+
+    async def touch_cache_entries(self, hits: dict[tuple[str, str], float]) -> None:
+        if not hits:
+            return
+        params = {
+            "workspace": self.db.workspace,
+            "modes": [mode for mode, _ in hits],
+            "ids": [args_hash for _, args_hash in hits],
+            "hit_times": list(hits.values()),
+        }
+        await self.db.execute(SQL_TEMPLATES["touch_llm_response_cache"], params)
+
+    async def evict_cache_entries(
+        self, cache_type: str, policy: CachePolicy, now: float
+    ) -> int:
+        evicted = 0
+        if policy.ttl:
+            params = {"workspace": self.db.workspace, "cache_type": cache_type, "ttl": float(policy.ttl)}
+            res = await self.db.query(SQL_TEMPLATES["expire_llm_response_cache"], params)
+            evicted += res["evicted"] if res else 0
+        if policy.max_entries or policy.max_bytes:
+            params = {
+                "workspace": self.db.workspace,
+                "cache_type": cache_type,
+                "max_entries": policy.max_entries,
+                "max_bytes": policy.max_bytes,
+            }
+            res = await self.db.query(SQL_TEMPLATES["evict_llm_response_cache"], params)
+            evicted += res["evicted"] if res else 0
+        return evicted
+
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
         pass
@@ -796,6 +936,16 @@ class PGVectorStorage(BaseVectorStorage):
 @dataclass
 class PGDocStatusStorage(DocStatusStorage):
     db: PostgreSQLDB = field(default=None)
+    # Columns patch() may update; the body itself lives in LIGHTRAG_DOC_FULL
+    _patch_columns = (
+        "content_summary",
+        "content_length",
+        "chunks_count",
+        "status",
+        "file_path",
+        "content_hash",
+    )
+
     async def initialize(self):
         if self.db is None:
             workspace = self.global_config.get("workspace") # TNC
@@ -845,6 +995,7 @@ class PGDocStatusStorage(DocStatusStorage):
                 created_at=result[0]["created_at"],
                 updated_at=result[0]["updated_at"],
                 file_path=result[0]["file_path"],
+                content_hash=result[0]["content_hash"],
             )
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
@@ -869,6 +1020,7 @@ class PGDocStatusStorage(DocStatusStorage):
                 "created_at": row["created_at"],
                 "updated_at": row["updated_at"],
                 "file_path": row["file_path"],
+                "content_hash": row["content_hash"],
             }
             for row in results
         ]
@@ -902,11 +1054,55 @@ class PGDocStatusStorage(DocStatusStorage):
                 updated_at=element["updated_at"],
                 chunks_count=element["chunks_count"],
                 file_path=element["file_path"],
+                content_hash=element["content_hash"],
             )
             for element in result
         }
         return docs_by_status
 
+    async def get_docs_page(
+        self, status: DocStatus, limit: int, cursor: str | None = None
+    ) -> tuple[dict[str, DocProcessingStatus], str | None]:
+        """One page of documents with a specific status, keyset-paged by id
+
+        Served by the (workspace, status, id) index; inline content is not selected.
+        """
+        sql = """SELECT id, content_summary, content_length, chunks_count, status,
+                        file_path, content_hash, created_at, updated_at
+                   FROM LIGHTRAG_DOC_STATUS
+                  WHERE workspace=$1 AND status=$2 AND id > $3
+                  ORDER BY id LIMIT $4"""
+        params = {
+            "workspace": self.db.workspace,
+            "status": status.value,
+            "cursor": cursor or "",
+            # One extra row tells whether another page follows
+            "limit": limit + 1,
+        }
+        result = await self.db.query(sql, params, True) or []
+        docs = {
+            element["id"]: DocProcessingStatus(
+                content_summary=element["content_summary"],
+                content_length=element["content_length"],
+                status=element["status"],
+                created_at=element["created_at"],
+                updated_at=element["updated_at"],
+                chunks_count=element["chunks_count"],
+                file_path=element["file_path"],
+                content_hash=element["content_hash"],
+            )
+            for element in result[:limit]
+        }
+        next_cursor = result[limit - 1]["id"] if len(result) > limit else None
+        return docs, next_cursor
+
+    async def get_doc_by_content_hash(self, content_hash: str) -> str | None:
+        """Return the id of a document whose source file has this hash"""
+        sql = "SELECT id FROM LIGHTRAG_DOC_STATUS WHERE workspace=$1 AND content_hash=$2 LIMIT 1"
+        params = {"workspace": self.db.workspace, "content_hash": content_hash}
+        result = await self.db.query(sql, params)
+        return result["id"] if result else None
+
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
         pass
@@ -950,15 +1146,16 @@ class PGDocStatusStorage(DocStatusStorage):
         if not data:
             return
 
-        sql = """insert into LIGHTRAG_DOC_STATUS(workspace,id,content,content_summary,content_length,chunks_count,status,file_path)
-                 values($1,$2,$3,$4,$5,$6,$7,$8)
+        sql = """insert into LIGHTRAG_DOC_STATUS(workspace,id,content,content_summary,content_length,chunks_count,status,file_path,content_hash)
+                 values($1,$2,$3,$4,$5,$6,$7,$8,$9)
                   on conflict(id,workspace) do update set
-                  content = EXCLUDED.content,
+                  content = COALESCE(EXCLUDED.content, LIGHTRAG_DOC_STATUS.content),
                   content_summary = EXCLUDED.content_summary,
                   content_length = EXCLUDED.content_length,
                   chunks_count = EXCLUDED.chunks_count,
                   status = EXCLUDED.status,
                   file_path = EXCLUDED.file_path,
+                  content_hash = COALESCE(EXCLUDED.content_hash, LIGHTRAG_DOC_STATUS.content_hash),
                   updated_at = CURRENT_TIMESTAMP"""
         for k, v in data.items():
             # chunks_count is optional
@@ -967,15 +1164,38 @@ class PGDocStatusStorage(DocStatusStorage):
                 {
                     "workspace": self.db.workspace,
                     "id": k,
-                    "content": v["content"],
+                    # New records keep the body in full_docs (LIGHTRAG_DOC_FULL)
+                    "content": v.get("content"),
                     "content_summary": v["content_summary"],
                     "content_length": v["content_length"],
                     "chunks_count": v["chunks_count"] if "chunks_count" in v else -1,
                     "status": v["status"],
                     "file_path": v["file_path"],
+                    "content_hash": v.get("content_hash"),
                 },
             )
 
+    async def patch(self, data: dict[str, dict[str, Any]]) -> None:
+        """Update only the given columns of existing records
+
+        Args:
+            data: dictionary of document IDs and the fields to change
+        """
+        if not data:
+            return
+        for k, v in data.items():
+            # Fields without a column (e.g. error) are not stored in PostgreSQL;
+            # updated_at is always set by the database
+            fields = {col: v[col] for col in self._patch_columns if col in v}
+            assignments = "".join(
+                f"{col}=${i}, " for i, col in enumerate(fields, start=3)
+            )
+            sql = f"""UPDATE LIGHTRAG_DOC_STATUS SET {assignments}updated_at = CURRENT_TIMESTAMP
+                      WHERE workspace=$1 AND id=$2"""
+            await self.db.execute(
+                sql, {"workspace": self.db.workspace, "id": k, **fields}
+            )
+
     async def drop(self) -> dict[str, str]:
         """Drop the storage"""
         try:
@@ -1016,6 +1236,8 @@ class PGGraphQueryException(Exception):
 @final
 @dataclass
 class PGGraphStorage(BaseGraphStorage):
+    maintains_label_index = True # TNC
+
     def __post_init__(self):
         self.graph_name = self.namespace or os.environ.get("AGE_GRAPH_NAME", "lightrag")
         self._node_embed_algorithms = {
@@ -1035,7 +1257,7 @@ class PGGraphStorage(BaseGraphStorage):
 
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
-        pass
+        await self._publish_label_changes() # TNC
 
     @staticmethod
     def _record_to_dict(record: asyncpg.Record) -> dict[str, Any]:
@@ -1346,6 +1568,7 @@ class PGGraphStorage(BaseGraphStorage):
 
         try:
             await self._query(query, readonly=False, upsert=True)
+            self._labels_upserted(label) # TNC
 
         except Exception:
             logger.error(f"POSTGRES, upsert_node error on node_id: `{node_id}`")
@@ -1387,6 +1610,9 @@ class PGGraphStorage(BaseGraphStorage):
 
         try:
             await self._query(query, readonly=False, upsert=True)
+            self._label_edges_changed( # TNC
+                [src_label, tgt_label], edge_data.get("keywords")
+            )
 
         except Exception:
             logger.error(
@@ -1413,6 +1639,7 @@ class PGGraphStorage(BaseGraphStorage):
 
         try:
             await self._query(query, readonly=False)
+            self._labels_removed() # TNC
         except Exception as e:
             logger.error("Error during node deletion: {%s}", e)
             raise
@@ -1435,6 +1662,7 @@ class PGGraphStorage(BaseGraphStorage):
 
         try:
             await self._query(query, readonly=False)
+            self._labels_removed() # TNC
         except Exception as e:
             logger.error("Error during node removal: {%s}", e)
             raise
@@ -1457,6 +1685,7 @@ class PGGraphStorage(BaseGraphStorage):
 
             try:
                 await self._query(query, readonly=False)
+                self._label_edges_changed([src_label, tgt_label]) # TNC
                 logger.debug(f"Deleted edge from '{source}' to '{target}'")
             except Exception as e:
                 logger.error(f"Error during edge deletion: {str(e)}")
@@ -1501,6 +1730,83 @@ class PGGraphStorage(BaseGraphStorage):
         embed_func = self._node_embed_algorithms[algorithm]
         return await embed_func()
 
+    @staticmethod
+    def _format_id_list(node_ids: list[str]) -> str:
+        """Format entity ids as a cypher list literal"""
+        return json.dumps([node_id.strip('"') for node_id in node_ids], ensure_ascii=False)
+
+    async def get_neighbors_batch(self, node_ids: list[str]) -> dict[str, list[str]]:
+        """Get the neighbor ids of several nodes with one query"""
+        query = """SELECT * FROM cypher('%s', $$
+                     MATCH (n:base)-[]-(m:base)
+                     WHERE n.entity_id IN %s
+                     RETURN DISTINCT n.entity_id AS source, m.entity_id AS target
+                   $$) AS (source text, target text)""" % (
+            self.graph_name,
+            self._format_id_list(node_ids),
+        )
+        neighbors: dict[str, list[str]] = {}
+        for record in await self._query(query):
+            neighbors.setdefault(record["source"], []).append(record["target"])
+        return neighbors
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        """Get the degrees of several nodes with one query"""
+        query = """SELECT * FROM cypher('%s', $$
+                     MATCH (n:base)
+                     WHERE n.entity_id IN %s
+                     OPTIONAL MATCH (n)-[r]-()
+                     RETURN n.entity_id AS node_id, count(r) AS degree
+                   $$) AS (node_id text, degree bigint)""" % (
+            self.graph_name,
+            self._format_id_list(node_ids),
+        )
+        return {
+            record["node_id"]: int(record["degree"])
+            for record in await self._query(query)
+        }
+
+    async def get_all_label_degrees(self) -> dict[str, int]:
+        """Get the degree of every node with one query"""
+        query = (
+            """SELECT * FROM cypher('%s', $$
+                     MATCH (n:base)
+                     WHERE n.entity_id IS NOT NULL
+                     OPTIONAL MATCH (n)-[r]-()
+                     RETURN n.entity_id AS node_id, count(r) AS degree
+                   $$) AS (node_id text, degree bigint)"""
+            % self.graph_name
+        )
+        return {
+            record["node_id"]: int(record["degree"])
+            for record in await self._query(query)
+        }
+
+    async def get_all_relation_keywords(self) -> list[str]:
+        """Get the distinct keywords fields of all edges with one query"""
+        query = (
+            """SELECT * FROM cypher('%s', $$
+                     MATCH (:base)-[r]->(:base)
+                     WHERE r.keywords IS NOT NULL
+                     RETURN DISTINCT r.keywords AS keywords
+                   $$) AS (keywords text)"""
+            % self.graph_name
+        )
+        return [record["keywords"] for record in await self._query(query)]
+
+    async def get_all_edge_pairs(self) -> list[tuple[str, str]]:
+        """Get every edge as a (source, target) pair with one query"""
+        query = (
+            """SELECT * FROM cypher('%s', $$
+                     MATCH (a:base)-[]->(b:base)
+                     RETURN a.entity_id AS source, b.entity_id AS target
+                   $$) AS (source text, target text)"""
+            % self.graph_name
+        )
+        return [
+            (record["source"], record["target"]) for record in await self._query(query)
+        ]
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -1513,105 +1819,87 @@ class PGGraphStorage(BaseGraphStorage):
         Args:
             node_label: Label of the starting node, * means all nodes
             max_depth: Maximum depth of the subgraph, Defaults to 3
-            max_nodes: Maxiumu nodes to return, Defaults to 1000 (not BFS nor DFS garanteed)
+            max_nodes: Maxiumu nodes to return by BFS, Defaults to 1000
 
         Returns:
             KnowledgeGraph object containing nodes and edges, with an is_truncated flag
             indicating whether the graph was truncated due to max_nodes limit
         """
-        # First, count the total number of nodes that would be returned without limit
+        # TNC: select the node set first (top degree for *, budgeted BFS otherwise),
+        # then fetch the nodes and the edges between them in two queries
         if node_label == "*":
-            count_query = f"""SELECT * FROM cypher('{self.graph_name}', $$
-                    MATCH (n:base)
-                    RETURN count(distinct n) AS total_nodes
-                    $$) AS (total_nodes bigint)"""
-        else:
-            strip_label = node_label.strip('"')
-            count_query = f"""SELECT * FROM cypher('{self.graph_name}', $$
-                    MATCH (n:base {{entity_id: "{strip_label}"}})
-                    OPTIONAL MATCH p = (n)-[*..{max_depth}]-(m)
-                    RETURN count(distinct m) AS total_nodes
-                    $$) AS (total_nodes bigint)"""
-
-        count_result = await self._query(count_query)
-        total_nodes = count_result[0]["total_nodes"] if count_result else 0
-        is_truncated = total_nodes > max_nodes
-
-        # Now get the actual data with limit
-        if node_label == "*":
-            query = f"""SELECT * FROM cypher('{self.graph_name}', $$
-                    MATCH (n:base)
-                    OPTIONAL MATCH (n)-[r]->(target:base)
-                    RETURN collect(distinct n) AS n, collect(distinct r) AS r
-                    LIMIT {max_nodes}
-                    $$) AS (n agtype, r agtype)"""
+            query = """SELECT * FROM cypher('%s', $$
+                         MATCH (n:base)
+                         OPTIONAL MATCH (n)-[r]-()
+                         WITH n, count(r) AS degree
+                         ORDER BY degree DESC
+                         LIMIT %d
+                         RETURN n.entity_id AS node_id
+                       $$) AS (node_id text)""" % (self.graph_name, max_nodes + 1)
+            node_ids = [record["node_id"] for record in await self._query(query)]
+            is_truncated = len(node_ids) > max_nodes
+            node_ids = node_ids[:max_nodes]
         else:
             strip_label = node_label.strip('"')
-            query = f"""SELECT * FROM cypher('{self.graph_name}', $$
-                    MATCH (n:base {{entity_id: "{strip_label}"}})
-                    OPTIONAL MATCH p = (n)-[*..{max_depth}]-(m)
-                    RETURN nodes(p) AS n, relationships(p) AS r
-                    LIMIT {max_nodes}
-                    $$) AS (n agtype, r agtype)"""
-
-        results = await self._query(query)
+            if not await self.has_node(strip_label):
+                logger.warning(f"Node {strip_label} not found in the graph")
+                return KnowledgeGraph()
+            node_ids, is_truncated = await self.bfs_subgraph_nodes(
+                strip_label, max_depth, max_nodes
+            )
 
-        # Process the query results with deduplication by node and edge IDs
-        nodes_dict = {}
-        edges_dict = {}
-        for result in results:
-            # Handle single node cases
-            if result.get("n") and isinstance(result["n"], dict):
-                node_id = str(result["n"]["id"])
-                if node_id not in nodes_dict:
-                    nodes_dict[node_id] = KnowledgeGraphNode(
+        if is_truncated:
+            logger.info(f"Graph truncated: subgraph limited to {max_nodes} nodes")
+
+        kg = KnowledgeGraph(is_truncated=is_truncated)
+        if not node_ids:
+            return kg
+
+        id_list = self._format_id_list(node_ids)
+        nodes_query = """SELECT * FROM cypher('%s', $$
+                           MATCH (n:base)
+                           WHERE n.entity_id IN %s
+                           RETURN n
+                         $$) AS (n agtype)""" % (self.graph_name, id_list)
+        edges_query = """SELECT * FROM cypher('%s', $$
+                           MATCH (a:base)-[r]->(b:base)
+                           WHERE a.entity_id IN %s AND b.entity_id IN %s
+                           RETURN r
+                         $$) AS (r agtype)""" % (self.graph_name, id_list, id_list)
+
+        seen_nodes = set()
+        for record in await self._query(nodes_query):
+            node = record.get("n")
+            if not isinstance(node, dict) or "properties" not in node:
+                continue
+            node_id = str(node["id"])
+            if node_id not in seen_nodes:
+                kg.nodes.append(
+                    KnowledgeGraphNode(
                         id=node_id,
-                        labels=[result["n"]["properties"]["entity_id"]],
-                        properties=result["n"]["properties"],
+                        labels=[node["properties"]["entity_id"]],
+                        properties=node["properties"],
                     )
-            # Handle node list cases
-            elif result.get("n") and isinstance(result["n"], list):
-                for node in result["n"]:
-                    if isinstance(node, dict) and "id" in node:
-                        node_id = str(node["id"])
-                        if node_id not in nodes_dict and "properties" in node:
-                            nodes_dict[node_id] = KnowledgeGraphNode(
-                                id=node_id,
-                                labels=[node["properties"]["entity_id"]],
-                                properties=node["properties"],
-                            )
-
-            # Handle single edge cases
-            if result.get("r") and isinstance(result["r"], dict):
-                edge_id = str(result["r"]["id"])
-                if edge_id not in edges_dict:
-                    edges_dict[edge_id] = KnowledgeGraphEdge(
+                )
+                seen_nodes.add(node_id)
+
+        seen_edges = set()
+        for record in await self._query(edges_query):
+            edge = record.get("r")
+            if not isinstance(edge, dict) or "id" not in edge:
+                continue
+            edge_id = str(edge["id"])
+            if edge_id not in seen_edges:
+                kg.edges.append(
+                    KnowledgeGraphEdge(
                         id=edge_id,
                         type="DIRECTED",
-                        source=str(result["r"]["start_id"]),
-                        target=str(result["r"]["end_id"]),
-                        properties=result["r"]["properties"],
+                        source=str(edge["start_id"]),
+                        target=str(edge["end_id"]),
+                        properties=edge["properties"],
                     )
-            # Handle edge list cases
-            elif result.get("r") and isinstance(result["r"], list):
-                for edge in result["r"]:
-                    if isinstance(edge, dict) and "id" in edge:
-                        edge_id = str(edge["id"])
-                        if edge_id not in edges_dict:
-                            edges_dict[edge_id] = KnowledgeGraphEdge(
-                                id=edge_id,
-                                type="DIRECTED",
-                                source=str(edge["start_id"]),
-                                target=str(edge["end_id"]),
-                                properties=edge["properties"],
-                            )
-
-        # Construct and return the KnowledgeGraph with deduplicated nodes and edges
-        kg = KnowledgeGraph(
-            nodes=list(nodes_dict.values()),
-            edges=list(edges_dict.values()),
-            is_truncated=is_truncated,
-        )
+                )
+                seen_edges.add(edge_id)
 
         logger.info(
             f"Subgraph query successful | Node count: {len(kg.nodes)} | Edge count: {len(kg.edges)}"
@@ -1627,6 +1915,8 @@ class PGGraphStorage(BaseGraphStorage):
                             $$) AS (result agtype)"""
 
             await self._query(drop_query, readonly=False)
+            self._labels_removed() # TNC
+            await self._publish_label_changes()
             return {"status": "success", "message": "graph data dropped"}
         except Exception as e:
             logger.error(f"Error dropping graph: {e}")
@@ -1716,8 +2006,17 @@ TABLES = {
                     return_value TEXT,
                     create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     update_time TIMESTAMP,
+                    cache_type varchar(32),
+                    last_hit TIMESTAMP,
 	                CONSTRAINT LIGHTRAG_LLM_CACHE_PK PRIMARY KEY (workspace, mode, id)
-                    )"""
+                    )""",
+        # Applied to existing tables on startup; each statement must be idempotent
+        "migrations": [
+            "ALTER TABLE LIGHTRAG_LLM_CACHE ADD COLUMN IF NOT EXISTS cache_type varchar(32) NULL",
+            "ALTER TABLE LIGHTRAG_LLM_CACHE ADD COLUMN IF NOT EXISTS last_hit TIMESTAMP NULL",
+            "UPDATE LIGHTRAG_LLM_CACHE SET cache_type = CASE WHEN mode = 'default' THEN 'extract' ELSE 'query' END WHERE cache_type IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_lightrag_llm_cache_type ON LIGHTRAG_LLM_CACHE(workspace, cache_type)",
+        ],
     },
     "LIGHTRAG_DOC_STATUS": {
         "ddl": """CREATE TABLE LIGHTRAG_DOC_STATUS (
@@ -1729,10 +2028,17 @@ TABLES = {
 	               chunks_count int4 NULL,
 	               status varchar(64) NULL,
 	               file_path TEXT NULL,
+	               content_hash varchar(64) NULL,
 	               created_at timestamp DEFAULT CURRENT_TIMESTAMP NULL,
 	               updated_at timestamp DEFAULT CURRENT_TIMESTAMP NULL,
 	               CONSTRAINT LIGHTRAG_DOC_STATUS_PK PRIMARY KEY (workspace, id)
-	              )"""
+	              )""",
+        # Applied to existing tables on startup; each statement must be idempotent
+        "migrations": [
+            "ALTER TABLE LIGHTRAG_DOC_STATUS ADD COLUMN IF NOT EXISTS content_hash varchar(64) NULL",
+            "CREATE INDEX IF NOT EXISTS idx_lightrag_doc_status_content_hash ON LIGHTRAG_DOC_STATUS(workspace, content_hash)",
+            "CREATE INDEX IF NOT EXISTS idx_lightrag_doc_status_status_id ON LIGHTRAG_DOC_STATUS(workspace, status, id)",
+        ],
     },
 }
 
@@ -1768,14 +2074,43 @@ SQL_TEMPLATES = {
                         ON CONFLICT (workspace,id) DO UPDATE
                            SET content = $2, update_time = CURRENT_TIMESTAMP
                        """,
-    "upsert_llm_response_cache": """INSERT INTO LIGHTRAG_LLM_CACHE(workspace,id,original_prompt,return_value,mode)
-                                      VALUES ($1, $2, $3, $4, $5)
+    "upsert_llm_response_cache": """INSERT INTO LIGHTRAG_LLM_CACHE(workspace,id,original_prompt,return_value,mode,cache_type)
+                                      VALUES ($1, $2, $3, $4, $5, $6)
                                       ON CONFLICT (workspace,mode,id) DO UPDATE
                                       SET original_prompt = EXCLUDED.original_prompt,
                                       return_value=EXCLUDED.return_value,
                                       mode=EXCLUDED.mode,
+                                      cache_type=EXCLUDED.cache_type,
                                       update_time = CURRENT_TIMESTAMP
                                      """,
+    # TNC: LLM cache limits, see kg/cache_policy_tnc.py
+    "touch_llm_response_cache": """UPDATE LIGHTRAG_LLM_CACHE c SET last_hit = to_timestamp(h.hit_time)::timestamp
+                                     FROM unnest($2::varchar[], $3::varchar[], $4::float8[]) AS h(mode, id, hit_time)
+                                     WHERE c.workspace=$1 AND c.mode=h.mode AND c.id=h.id
+                                    """,
+    "expire_llm_response_cache": """WITH evicted AS (
+                                      DELETE FROM LIGHTRAG_LLM_CACHE
+                                      WHERE workspace=$1 AND cache_type=$2
+                                      AND COALESCE(update_time, create_time) < LOCALTIMESTAMP - make_interval(secs => $3::float8)
+                                      RETURNING 1)
+                                     SELECT count(*) AS evicted FROM evicted
+                                    """,
+    "evict_llm_response_cache": """WITH ranked AS (
+                                     SELECT mode, id,
+                                       ROW_NUMBER() OVER w AS position,
+                                       SUM(COALESCE(octet_length(return_value), 0) + COALESCE(octet_length(original_prompt), 0)) OVER w AS total_bytes
+                                     FROM LIGHTRAG_LLM_CACHE
+                                     WHERE workspace=$1 AND cache_type=$2
+                                     WINDOW w AS (ORDER BY COALESCE(last_hit, update_time, create_time) DESC
+                                                  ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)),
+                                   evicted AS (
+                                     DELETE FROM LIGHTRAG_LLM_CACHE c USING ranked r
+                                     WHERE c.workspace=$1 AND c.mode=r.mode AND c.id=r.id
+                                     AND (($3::bigint > 0 AND r.position > $3::bigint)
+                                          OR ($4::bigint > 0 AND r.total_bytes > $4::bigint))
+                                     RETURNING 1)
+                                   SELECT count(*) AS evicted FROM evicted
+                                  """,
     "upsert_chunk": """INSERT INTO LIGHTRAG_DOC_CHUNKS (workspace, id, tokens,
                       chunk_order_index, full_doc_id, content, content_vector, file_path)
                       VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
@@ -5,13 +5,12 @@ from dataclasses import dataclass
 import numpy as np
 import hashlib
 import uuid
-from ..utils import logger
+from ..utils import logger, run_blocking
 from ..base import BaseVectorStorage
 import configparser
-import pipmaster as pm
+from lightrag.utils import ensure_package
 
-if not pm.is_installed("qdrant-client"):
-    pm.install("qdrant-client")
+ensure_package("qdrant-client")
 
 from qdrant_client import QdrantClient, models  # type: ignore
 
@@ -116,8 +115,11 @@ class QdrantVectorDBStorage(BaseVectorStorage):
                 )
             )
 
-        results = self._client.upsert(
-            collection_name=self.namespace, points=list_points, wait=True
+        results = await run_blocking(
+            self._client.upsert,
+            collection_name=self.namespace,
+            points=list_points,
+            wait=True,
         )
         return results
 
@@ -125,7 +127,8 @@ class QdrantVectorDBStorage(BaseVectorStorage):
         self, query: str, top_k: int, ids: list[str] | None = None
     ) -> list[dict[str, Any]]:
         embedding = await self.embedding_func([query])
-        results = self._client.search(
+        results = await run_blocking(
+            self._client.search,
             collection_name=self.namespace,
             query_vector=embedding[0],
             limit=top_k,
@@ -151,7 +154,8 @@ class QdrantVectorDBStorage(BaseVectorStorage):
             # Convert regular ids to Qdrant compatible ids
             qdrant_ids = [compute_mdhash_id_for_qdrant(id) for id in ids]
             # Delete points from the collection
-            self._client.delete(
+            await run_blocking(
+                self._client.delete,
                 collection_name=self.namespace,
                 points_selector=models.PointIdsList(
                     points=qdrant_ids,
@@ -178,7 +182,8 @@ class QdrantVectorDBStorage(BaseVectorStorage):
             )
 
             # Delete the entity point from the collection
-            self._client.delete(
+            await run_blocking(
+                self._client.delete,
                 collection_name=self.namespace,
                 points_selector=models.PointIdsList(
                     points=[entity_id],
@@ -197,7 +202,8 @@ class QdrantVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Find relations where the entity is either source or target
-            results = self._client.scroll(
+            results = await run_blocking(
+                self._client.scroll,
                 collection_name=self.namespace,
                 scroll_filter=models.Filter(
                     should=[
@@ -219,7 +225,8 @@ class QdrantVectorDBStorage(BaseVectorStorage):
 
             if ids_to_delete:
                 # Delete the relations
-                self._client.delete(
+                await run_blocking(
+                    self._client.delete,
                     collection_name=self.namespace,
                     points_selector=models.PointIdsList(
                         points=ids_to_delete,
@@ -245,7 +252,8 @@ class QdrantVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Use scroll method to find records with IDs starting with the prefix
-            results = self._client.scroll(
+            results = await run_blocking(
+                self._client.scroll,
                 collection_name=self.namespace,
                 scroll_filter=models.Filter(
                     must=[
@@ -288,7 +296,8 @@ class QdrantVectorDBStorage(BaseVectorStorage):
             qdrant_id = compute_mdhash_id_for_qdrant(id)
 
             # Retrieve the point by ID
-            result = self._client.retrieve(
+            result = await run_blocking(
+                self._client.retrieve,
                 collection_name=self.namespace,
                 ids=[qdrant_id],
                 with_payload=True,
@@ -319,7 +328,8 @@ class QdrantVectorDBStorage(BaseVectorStorage):
             qdrant_ids = [compute_mdhash_id_for_qdrant(id) for id in ids]
 
             # Retrieve the points by IDs
-            results = self._client.retrieve(
+            results = await run_blocking(
+                self._client.retrieve,
                 collection_name=self.namespace,
                 ids=qdrant_ids,
                 with_payload=True,
@@ -342,11 +352,12 @@ class QdrantVectorDBStorage(BaseVectorStorage):
         """
         try:
             # Delete the collection and recreate it
-            if self._client.collection_exists(self.namespace):
-                self._client.delete_collection(self.namespace)
+            if await run_blocking(self._client.collection_exists, self.namespace):
+                await run_blocking(self._client.delete_collection, self.namespace)
 
             # Recreate the collection
-            QdrantVectorDBStorage.create_collection_if_not_exist(
+            await run_blocking(
+                QdrantVectorDBStorage.create_collection_if_not_exist,
                 self._client,
                 self.namespace,
                 vectors_config=models.VectorParams(
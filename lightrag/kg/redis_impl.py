@@ -1,16 +1,16 @@
 import os
 from typing import Any, final
 from dataclasses import dataclass
-import pipmaster as pm
+from lightrag.utils import ensure_package
 import configparser
 
-if not pm.is_installed("redis"):
-    pm.install("redis")
+ensure_package("redis")
 
 # aioredis is a depricated library, replaced with redis
 from redis.asyncio import Redis  # type: ignore
 from lightrag.utils import logger
 from lightrag.base import BaseKVStorage
+from .cache_policy_tnc import get_cache_janitor
 import json
 
 
@@ -65,6 +65,41 @@ class RedisKVStorage(BaseKVStorage):
         # Redis handles persistence automatically
         pass
 
+    def _cache_key(self, mode: str, args_hash: str) -> str:
+        return f"{self.namespace}:{mode}:{args_hash}"
+
+    async def get_cache_entry(self, mode: str, args_hash: str) -> dict[str, Any] | None:
+        data = await self._redis.get(self._cache_key(mode, args_hash))
+        return json.loads(data) if data else None
+
+    async def get_cache_entries(self, mode: str) -> dict[str, dict[str, Any]]:
+        prefix = self._cache_key(mode, "")
+        keys = [key async for key in self._redis.scan_iter(match=f"{prefix}*")]
+        if not keys:
+            return {}
+        values = await self._redis.mget(keys)
+        return {
+            key[len(prefix) :]: json.loads(value)
+            for key, value in zip(keys, values)
+            if value
+        }
+
+    async def upsert_cache_entry(
+        self, mode: str, args_hash: str, entry: dict[str, Any]
+    ) -> None:
+        # TNC: Redis expires entries itself; size limits are left to maxmemory-policy
+        policy = get_cache_janitor(self).policies.get(entry.get("cache_type"))
+        ttl = max(1, int(policy.ttl)) if policy and policy.ttl else None
+        await self._redis.set(
+            self._cache_key(mode, args_hash), json.dumps(entry), ex=ttl
+        )
+
+    async def delete_cache_entries(self, mode: str, args_hashes: list[str]) -> None:
+        if args_hashes:
+            await self._redis.delete(
+                *[self._cache_key(mode, args_hash) for args_hash in args_hashes]
+            )
+
     async def delete(self, ids: list[str]) -> None:
         """Delete entries with specified IDs
 
@@ -101,7 +136,12 @@ class RedisKVStorage(BaseKVStorage):
             return False
 
         try:
-            await self.delete(modes)
+            # Entries of each mode, plus mode records of the former layout
+            keys = [f"{self.namespace}:{mode}" for mode in modes]
+            for mode in modes:
+                pattern = f"{self._cache_key(mode, '')}*"
+                keys.extend([key async for key in self._redis.scan_iter(match=pattern)])
+            await self._redis.delete(*keys)
             return True
         except Exception:
             return False
@@ -1,9 +1,10 @@
 import os
 import sys
 import asyncio
+import inspect
 from multiprocessing.synchronize import Lock as ProcessLock
 from multiprocessing import Manager
-from typing import Any, Dict, Optional, Union, TypeVar, Generic
+from typing import Any, Callable, Dict, Optional, Union, TypeVar, Generic
 
 
 # Define a direct print function for critical logs that must be visible in all processes
@@ -28,11 +29,15 @@ _is_multiprocess = None
 _workers = None
 _manager = None
 _initialized = None
+# TNC: pluggable coordination backend (None: Manager or in-process data)
+_coordination = None
 
 # shared data for storage across processes
 _shared_dicts: Optional[Dict[str, Any]] = None
 _init_flags: Optional[Dict[str, bool]] = None  # namespace -> initialized
 _update_flags: Optional[Dict[str, bool]] = None  # namespace -> updated
+# TNC: namespace -> change version, bumped whenever a namespace is published
+_namespace_versions: Optional[Dict[str, int]] = None
 
 # locks for mutex access
 _storage_lock: Optional[LockType] = None
@@ -70,8 +75,8 @@ class UnifiedLock(Generic[T]):
                 enable_output=self._enable_logging,
             )
 
-            # If in multiprocess mode and async lock exists, acquire it first
-            if not self._is_async and self._async_lock is not None:
+            # If an async lock exists (cross-process lock), acquire it first
+            if self._async_lock is not None:
                 direct_log(
                     f"== Lock == Process {self._pid}: Acquiring async lock for '{self._name}'",
                     enable_output=self._enable_logging,
@@ -95,11 +100,7 @@ class UnifiedLock(Generic[T]):
             return self
         except Exception as e:
             # If main lock acquisition fails, release the async lock if it was acquired
-            if (
-                not self._is_async
-                and self._async_lock is not None
-                and self._async_lock.locked()
-            ):
+            if self._async_lock is not None and self._async_lock.locked():
                 self._async_lock.release()
 
             direct_log(
@@ -117,16 +118,15 @@ class UnifiedLock(Generic[T]):
                 enable_output=self._enable_logging,
             )
 
-            # Release main lock first
-            if self._is_async:
-                self._lock.release()
-            else:
-                self._lock.release()
+            # Release main lock first (coordination backend locks may be async)
+            released = self._lock.release()
+            if inspect.isawaitable(released):
+                await released
 
             main_lock_released = True
 
             # Then release async lock if in multiprocess mode
-            if not self._is_async and self._async_lock is not None:
+            if self._async_lock is not None:
                 direct_log(
                     f"== Lock == Process {self._pid}: Releasing async lock for '{self._name}'",
                     enable_output=self._enable_logging,
@@ -145,11 +145,7 @@ class UnifiedLock(Generic[T]):
             )
 
             # If main lock release failed but async lock hasn't been released, try to release it
-            if (
-                not main_lock_released
-                and not self._is_async
-                and self._async_lock is not None
-            ):
+            if not main_lock_released and self._async_lock is not None:
                 try:
                     direct_log(
                         f"== Lock == Process {self._pid}: Attempting to release async lock after main lock failure",
@@ -216,64 +212,43 @@ class UnifiedLock(Generic[T]):
             raise
 
 
-def get_internal_lock(enable_logging: bool = False) -> UnifiedLock:
-    """return unified storage lock for data consistency"""
-    async_lock = _async_locks.get("internal_lock") if _is_multiprocess else None
+def _get_unified_lock(lock: Any, name: str, enable_logging: bool) -> UnifiedLock:
+    # Manager locks are acquired synchronously; in-process asyncio locks and
+    # coordination backend locks are awaited
     return UnifiedLock(
-        lock=_internal_lock,
-        is_async=not _is_multiprocess,
-        name="internal_lock",
+        lock=lock,
+        is_async=_coordination is not None or not _is_multiprocess,
+        name=name,
         enable_logging=enable_logging,
-        async_lock=async_lock,
+        async_lock=_async_locks.get(name) if _async_locks else None,
     )
 
 
+def get_internal_lock(enable_logging: bool = False) -> UnifiedLock:
+    """return unified storage lock for data consistency"""
+    return _get_unified_lock(_internal_lock, "internal_lock", enable_logging)
+
+
 def get_storage_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified storage lock for data consistency"""
-    async_lock = _async_locks.get("storage_lock") if _is_multiprocess else None
-    return UnifiedLock(
-        lock=_storage_lock,
-        is_async=not _is_multiprocess,
-        name="storage_lock",
-        enable_logging=enable_logging,
-        async_lock=async_lock,
-    )
+    return _get_unified_lock(_storage_lock, "storage_lock", enable_logging)
 
 
 def get_pipeline_status_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified storage lock for data consistency"""
-    async_lock = _async_locks.get("pipeline_status_lock") if _is_multiprocess else None
-    return UnifiedLock(
-        lock=_pipeline_status_lock,
-        is_async=not _is_multiprocess,
-        name="pipeline_status_lock",
-        enable_logging=enable_logging,
-        async_lock=async_lock,
+    return _get_unified_lock(
+        _pipeline_status_lock, "pipeline_status_lock", enable_logging
     )
 
 
 def get_graph_db_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified graph database lock for ensuring atomic operations"""
-    async_lock = _async_locks.get("graph_db_lock") if _is_multiprocess else None
-    return UnifiedLock(
-        lock=_graph_db_lock,
-        is_async=not _is_multiprocess,
-        name="graph_db_lock",
-        enable_logging=enable_logging,
-        async_lock=async_lock,
-    )
+    return _get_unified_lock(_graph_db_lock, "graph_db_lock", enable_logging)
 
 
 def get_data_init_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified data initialization lock for ensuring atomic data initialization"""
-    async_lock = _async_locks.get("data_init_lock") if _is_multiprocess else None
-    return UnifiedLock(
-        lock=_data_init_lock,
-        is_async=not _is_multiprocess,
-        name="data_init_lock",
-        enable_logging=enable_logging,
-        async_lock=async_lock,
-    )
+    return _get_unified_lock(_data_init_lock, "data_init_lock", enable_logging)
 
 
 def initialize_share_data(workers: int = 1):
@@ -296,6 +271,7 @@ def initialize_share_data(workers: int = 1):
     """
     global \
         _manager, \
+        _coordination, \
         _workers, \
         _is_multiprocess, \
         _storage_lock, \
@@ -307,6 +283,7 @@ def initialize_share_data(workers: int = 1):
         _init_flags, \
         _initialized, \
         _update_flags, \
+        _namespace_versions, \
         _async_locks
 
     # Check if already initialized
@@ -318,7 +295,35 @@ def initialize_share_data(workers: int = 1):
 
     _workers = workers
 
-    if workers > 1:
+    # TNC: locks, update flags and namespace data on a coordination backend
+    backend_name = os.getenv("COORDINATION_BACKEND", "manager").lower()
+    if backend_name != "manager":
+        from .coordination_tnc import create_coordination_backend
+
+        _coordination = create_coordination_backend(backend_name, workers)
+        _is_multiprocess = workers > 1
+        _manager = _coordination.manager
+        _internal_lock = _coordination.create_lock("internal_lock")
+        _storage_lock = _coordination.create_lock("storage_lock")
+        _pipeline_status_lock = _coordination.create_lock("pipeline_status_lock")
+        _graph_db_lock = _coordination.create_lock("graph_db_lock")
+        _data_init_lock = _coordination.create_lock("data_init_lock")
+        # Namespace registry is shared only when its objects are Manager proxies
+        _shared_dicts = _manager.dict() if _manager is not None else {}
+        _init_flags = _manager.dict() if _manager is not None else {}
+        # This process's update flags; the counters behind them are shared
+        _update_flags = {}
+        # Versions live in the backend's counters
+        _namespace_versions = None
+        # Coroutines of one process queue here before the cross-process lock
+        _async_locks = {
+            "internal_lock": asyncio.Lock(),
+            "storage_lock": asyncio.Lock(),
+            "pipeline_status_lock": asyncio.Lock(),
+            "graph_db_lock": asyncio.Lock(),
+            "data_init_lock": asyncio.Lock(),
+        }
+    elif workers > 1:
         _is_multiprocess = True
         _manager = Manager()
         _internal_lock = _manager.Lock()
@@ -329,6 +334,7 @@ def initialize_share_data(workers: int = 1):
         _shared_dicts = _manager.dict()
         _init_flags = _manager.dict()
         _update_flags = _manager.dict()
+        _namespace_versions = _manager.dict()
 
         # Initialize async locks for multiprocess mode
         _async_locks = {
@@ -352,6 +358,7 @@ def initialize_share_data(workers: int = 1):
         _shared_dicts = {}
         _init_flags = {}
         _update_flags = {}
+        _namespace_versions = {}
         _async_locks = None  # No need for async locks in single process mode
         direct_log(f"Process {os.getpid()} Shared-Data created for Single Process")
 
@@ -372,7 +379,10 @@ async def initialize_pipeline_status():
             return
 
         # Create a shared list object for history_messages
-        history_messages = _manager.list() if _is_multiprocess else []
+        if _coordination is not None:
+            history_messages = _coordination.create_list()
+        else:
+            history_messages = _manager.list() if _is_multiprocess else []
         pipeline_namespace.update(
             {
                 "autoscanned": False,  # Auto-scan started
@@ -390,6 +400,32 @@ async def initialize_pipeline_status():
         direct_log(f"Process {os.getpid()} Pipeline namespace initialized")
 
 
+def pipeline_is_busy(pipeline_status: Dict[str, Any]) -> bool:  # TNC
+    """True if a live process of this host is running the pipeline
+
+    Call under the pipeline status lock. A busy flag left behind by a worker
+    that died mid-job (its "busy_pid" no longer exists) is reset, so the
+    pipeline does not stay busy until the next restart.
+    """
+    if not pipeline_status.get("busy", False):
+        return False
+    pid = pipeline_status.get("busy_pid")
+    if pid is None or pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        direct_log(
+            f"Process {os.getpid()} resetting pipeline busy flag of dead process {pid}",
+            level="WARNING",
+        )
+        pipeline_status["busy"] = False
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+
+
 async def get_update_flag(namespace: str):
     """
     Create a namespace's update flag for a workers.
@@ -399,6 +435,14 @@ async def get_update_flag(namespace: str):
     if _update_flags is None:
         raise ValueError("Try to create namespace before Shared-Data is initialized")
 
+    if _coordination is not None:
+        from .coordination_tnc import VersionFlag
+
+        async with get_internal_lock():
+            new_update_flag = VersionFlag(_coordination.counters, namespace)
+        _update_flags.setdefault(namespace, []).append(new_update_flag)
+        return new_update_flag
+
     async with get_internal_lock():
         if namespace not in _update_flags:
             if _is_multiprocess and _manager is not None:
@@ -423,18 +467,95 @@ async def get_update_flag(namespace: str):
         return new_update_flag
 
 
-async def set_all_update_flags(namespace: str):
-    """Set all update flag of namespace indicating all workers need to reload data from files"""
+async def set_all_update_flags(namespace: str) -> int:
+    """Set all update flag of namespace indicating all workers need to reload data from files
+
+    Also publishes a new change version of the namespace, which is returned.
+    """
     global _update_flags
     if _update_flags is None:
         raise ValueError("Try to create namespace before Shared-Data is initialized")
 
     async with get_internal_lock():
-        if namespace not in _update_flags:
-            raise ValueError(f"Namespace {namespace} not found in update flags")
+        if _coordination is not None:
+            # One version bump raises the flag of every worker
+            _coordination.counters.bump(namespace)
+            return _coordination.counters.version(namespace)
+        version = _namespace_versions.get(namespace, 0) + 1
+        _namespace_versions[namespace] = version
         # Update flags for both modes
-        for i in range(len(_update_flags[namespace])):
-            _update_flags[namespace][i].value = True
+        if namespace in _update_flags:
+            for i in range(len(_update_flags[namespace])):
+                _update_flags[namespace][i].value = True
+        return version
+
+
+def get_namespace_version(namespace: str) -> int:
+    """Latest change version published for a namespace (a single read, no lock)"""
+    if _coordination is not None:
+        return _coordination.counters.version(namespace)
+    if _namespace_versions is None:
+        raise ValueError("Try to read namespace before Shared-Data is initialized")
+    return _namespace_versions.get(namespace, 0)
+
+
+class SnapshotReloader:
+    """Keeps a storage's in-memory snapshot of a namespace at the latest version
+
+    Readers call ``check()``: when another process has published a newer
+    version it starts a background reload and returns at once, so queries keep
+    using the current snapshot until the new one is swapped in. Writers
+    ``await check(wait=True)`` so their changes apply to the latest data.
+    """
+
+    def __init__(
+        self, namespace: str, load: Callable[[], Any], apply: Callable[[Any], None]
+    ):
+        self.namespace = namespace
+        self.loaded_version = get_namespace_version(namespace)
+        self._load = load
+        self._apply = apply
+        self._task: Optional[asyncio.Task] = None
+
+    def is_stale(self) -> bool:
+        return get_namespace_version(self.namespace) > self.loaded_version
+
+    async def check(self, wait: bool = False) -> None:
+        if self.is_stale() and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._reload())
+        if wait and self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def _reload(self) -> None:
+        from lightrag.utils import run_blocking
+
+        try:
+            while True:
+                version = get_namespace_version(self.namespace)
+                direct_log(
+                    f"Process {os.getpid()} reloading {self.namespace} to version {version} in background"
+                )
+                snapshot = await run_blocking(self._load)
+                # Saves persist and publish while holding the storage lock, so a
+                # save that overlapped the load shows up as a newer version here
+                async with get_storage_lock():
+                    if get_namespace_version(self.namespace) == version:
+                        self._apply(snapshot)
+                        self.loaded_version = version
+                        return
+        except Exception as e:
+            direct_log(
+                f"Process {os.getpid()} failed to reload {self.namespace}: {e}",
+                level="ERROR",
+            )
+
+    async def reload_now(self) -> None:
+        """Reload in place; the caller holds the storage lock"""
+        from lightrag.utils import run_blocking
+
+        version = get_namespace_version(self.namespace)
+        self._apply(await run_blocking(self._load))
+        self.loaded_version = version
 
 
 async def clear_all_update_flags(namespace: str):
@@ -444,6 +565,9 @@ async def clear_all_update_flags(namespace: str):
         raise ValueError("Try to create namespace before Shared-Data is initialized")
 
     async with get_internal_lock():
+        if _coordination is not None:
+            _coordination.counters.clear(namespace)
+            return
         if namespace not in _update_flags:
             raise ValueError(f"Namespace {namespace} not found in update flags")
         # Update flags for both modes
@@ -466,7 +590,7 @@ async def get_all_update_flags_status() -> Dict[str, list]:
         for namespace, flags in _update_flags.items():
             worker_statuses = []
             for flag in flags:
-                if _is_multiprocess:
+                if _is_multiprocess or _coordination is not None:
                     worker_statuses.append(flag.value)
                 else:
                     worker_statuses.append(flag)
@@ -486,8 +610,13 @@ async def try_initialize_namespace(namespace: str) -> bool:
         raise ValueError("Try to create nanmespace before Shared-Data is initialized")
 
     async with get_internal_lock():
-        if namespace not in _init_flags:
-            _init_flags[namespace] = True
+        if _coordination is not None:
+            need_init = _coordination.try_initialize(namespace, _init_flags)
+        else:
+            need_init = namespace not in _init_flags
+            if need_init:
+                _init_flags[namespace] = True
+        if need_init:
             direct_log(
                 f"Process {os.getpid()} ready to initialize storage namespace: [{namespace}]"
             )
@@ -510,7 +639,9 @@ async def get_namespace_data(namespace: str) -> Dict[str, Any]:
 
     async with get_internal_lock():
         if namespace not in _shared_dicts:
-            if _is_multiprocess and _manager is not None:
+            if _coordination is not None:
+                _shared_dicts[namespace] = _coordination.create_dict(namespace)
+            elif _is_multiprocess and _manager is not None:
                 _shared_dicts[namespace] = _manager.dict()
             else:
                 _shared_dicts[namespace] = {}
@@ -530,6 +661,7 @@ def finalize_share_data():
     """
     global \
         _manager, \
+        _coordination, \
         _is_multiprocess, \
         _storage_lock, \
         _internal_lock, \
@@ -540,6 +672,7 @@ def finalize_share_data():
         _init_flags, \
         _initialized, \
         _update_flags, \
+        _namespace_versions, \
         _async_locks
 
     # Check if already initialized
@@ -553,8 +686,17 @@ def finalize_share_data():
         f"Process {os.getpid()} finalizing storage data (multiprocess={_is_multiprocess})"
     )
 
+    if _coordination is not None:
+        # Shuts down the backend's Manager; Redis counters outlive the processes
+        try:
+            _coordination.finalize()
+        except Exception as e:
+            direct_log(
+                f"Process {os.getpid()} Error finalizing coordination backend: {e}",
+                level="ERROR",
+            )
     # In multi-process mode, shut down the Manager
-    if _is_multiprocess and _manager is not None:
+    elif _is_multiprocess and _manager is not None:
         try:
             # Clear shared resources before shutting down Manager
             if _shared_dicts is not None:
@@ -595,6 +737,7 @@ def finalize_share_data():
 
     # Reset global variables
     _manager = None
+    _coordination = None
     _initialized = None
     _is_multiprocess = None
     _shared_dicts = None
@@ -605,6 +748,7 @@ def finalize_share_data():
     _graph_db_lock = None
     _data_init_lock = None
     _update_flags = None
+    _namespace_versions = None
     _async_locks = None
 
     direct_log(f"Process {os.getpid()} storage data finalization complete")
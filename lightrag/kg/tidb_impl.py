@@ -12,13 +12,11 @@ from ..base import BaseGraphStorage, BaseKVStorage, BaseVectorStorage
 from ..namespace import NameSpace, is_namespace
 from ..utils import logger
 
-import pipmaster as pm
+from lightrag.utils import ensure_package
 import configparser
 
-if not pm.is_installed("pymysql"):
-    pm.install("pymysql")
-if not pm.is_installed("sqlalchemy"):
-    pm.install("sqlalchemy")
+ensure_package("pymysql")
+ensure_package("sqlalchemy")
 
 from sqlalchemy import create_engine, text  # type: ignore
 
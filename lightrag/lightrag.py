@@ -10,13 +10,13 @@ from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from functools import partial
 from typing import Any, AsyncIterator, Callable, Iterator, cast, final, Literal
-import pandas as pd
 
 
 from lightrag.kg import (
     STORAGES,
     verify_storage_implementation,
 )
+from lightrag.kg.data_version_tnc import publish_data_version  # TNC
 
 from .base import (
     BaseGraphStorage,
@@ -47,18 +47,16 @@ from .utils import (
     encode_string_by_tiktoken,
     lazy_external_import,
     limit_async_func_call,
+    get_llm_scheduler,  # TNC
+    llm_priority,  # TNC
     get_content_summary,
     clean_text,
     check_storage_env_vars,
     logger,
 )
 from .types import KnowledgeGraph
-from dotenv import load_dotenv
-
-# use the .env that is inside the current folder
-# allows to use different .env file for each lightrag instance
-# the OS environment variables take precedence over the .env file
-load_dotenv(dotenv_path=".env", override=False)
+from .llm.client_registry import client_registry
+# TNC: .env is loaded once, on import of lightrag.utils above
 
 # TODO: TO REMOVE @Yannick
 config = configparser.ConfigParser()
@@ -107,6 +105,11 @@ class LightRAG:
         default=int(os.getenv("MAX_TOKEN_SUMMARY", 500))
     )
 
+    entity_summary_min_new_tokens: int = field(  # TNC
+        default=int(os.getenv("SUMMARY_MIN_NEW_TOKENS", 0))
+    )
+    """New description tokens collected beyond a summary before it is redone (0: half of entity_summary_to_max_tokens)."""
+
     # Text chunking
     # ---
 
@@ -248,6 +251,11 @@ class LightRAG:
     max_parallel_insert: int = field(default=int(os.getenv("MAX_PARALLEL_INSERT", 2)))
     """Maximum number of parallel insert operations."""
 
+    doc_status_page_size: int = field(
+        default=int(os.getenv("DOC_STATUS_PAGE_SIZE", 500))
+    )
+    """Number of documents the pipeline pulls from doc status storage per page."""  # TNC
+
     addon_params: dict[str, Any] = field(
         default_factory=lambda: {
             "language": os.getenv("SUMMARY_LANGUAGE", PROMPTS["DEFAULT_LANGUAGE"])
@@ -423,12 +431,17 @@ class LightRAG:
         # Directly use llm_response_cache, don't create a new object
         hashing_kv = self.llm_response_cache
 
-        self.llm_model_func = limit_async_func_call(self.llm_model_max_async)(
+        # TNC: priority classes and per-workspace fairness instead of a plain
+        # semaphore; instances using the same model share its scheduler
+        self.llm_model_func = get_llm_scheduler(
+            self.llm_model_name, self.llm_model_max_async
+        ).wrap(
             partial(
                 self.llm_model_func,  # type: ignore
                 hashing_kv=hashing_kv,
                 **self.llm_model_kwargs,
-            )
+            ),
+            self.workspace,
         )
 
 
@@ -480,6 +493,7 @@ class LightRAG:
 
             await asyncio.gather(*tasks)
 
+            client_registry.acquire()
             self._storages_status = StoragesStatus.INITIALIZED
             logger.debug("Initialized Storages")
 
@@ -503,6 +517,9 @@ class LightRAG:
 
             await asyncio.gather(*tasks)
 
+            # Close pooled LLM/embedding HTTP clients once no instance uses them
+            await client_registry.release()
+
             self._storages_status = StoragesStatus.FINALIZED
             logger.debug("Finalized Storages")
 
@@ -510,6 +527,24 @@ class LightRAG:
         text = await self.chunk_entity_relation_graph.get_all_labels()
         return text
 
+    # TNC
+    async def search_graph_labels(
+        self,
+        query: str = "",
+        limit: int | None = None,
+        offset: int = 0,
+        order_by: Literal["name", "degree"] = "name",
+        fuzzy: bool = False,
+    ) -> tuple[list[str], int]:
+        """Search graph labels by prefix (or fuzzily) in the graph's label index
+
+        Returns:
+            The requested page of labels and the total number of matches
+        """
+        return await self.chunk_entity_relation_graph.search_labels(
+            query, limit, offset, order_by, fuzzy
+        )
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -659,6 +694,7 @@ class LightRAG:
         input: str | list[str],
         ids: list[str] | None = None,
         file_paths: str | list[str] | None = None,
+        content_hashes: str | list[str | None] | None = None,
     ) -> None:
         """
         Pipeline for Processing Documents
@@ -673,6 +709,8 @@ class LightRAG:
             input: Single document string or list of document strings
             ids: list of unique document IDs, if not provided, MD5 hash IDs will be generated
             file_paths: list of file paths corresponding to each document, used for citation
+            content_hashes: hashes of the source files, stored so repeated uploads
+                of the same file can be rejected before parsing
         """
         if isinstance(input, str):
             input = [input]
@@ -680,6 +718,12 @@ class LightRAG:
             ids = [ids]
         if isinstance(file_paths, str):
             file_paths = [file_paths]
+        if content_hashes is None or isinstance(content_hashes, str):
+            content_hashes = [content_hashes] * len(input)
+        if len(content_hashes) != len(input):
+            raise ValueError(
+                "Number of content hashes must match the number of documents"
+            )
 
         # If file_paths is provided, ensure it matches the number of documents
         if file_paths is not None:
@@ -705,28 +749,30 @@ class LightRAG:
 
             # Generate contents dict of IDs provided by user and documents
             contents = {
-                id_: {"content": doc, "file_path": path}
-                for id_, doc, path in zip(ids, input, file_paths)
+                id_: {"content": doc, "file_path": path, "content_hash": hash_}
+                for id_, doc, path, hash_ in zip(ids, input, file_paths, content_hashes)
             }
         else:
             # Clean input text and remove duplicates
             cleaned_input = [
-                (clean_text(doc), path) for doc, path in zip(input, file_paths)
+                (clean_text(doc), path, hash_)
+                for doc, path, hash_ in zip(input, file_paths, content_hashes)
             ]
             unique_content_with_paths = {}
 
             # Keep track of unique content and their paths
-            for content, path in cleaned_input:
+            for content, path, hash_ in cleaned_input:
                 if content not in unique_content_with_paths:
-                    unique_content_with_paths[content] = path
+                    unique_content_with_paths[content] = (path, hash_)
 
             # Generate contents dict of MD5 hash IDs and documents with paths
             contents = {
                 compute_mdhash_id(content, prefix="doc-"): {
                     "content": content,
                     "file_path": path,
+                    "content_hash": hash_,
                 }
-                for content, path in unique_content_with_paths.items()
+                for content, (path, hash_) in unique_content_with_paths.items()
             }
 
         # 2. Remove duplicate contents
@@ -735,19 +781,23 @@ class LightRAG:
             content = content_data["content"]
             file_path = content_data["file_path"]
             if content not in unique_contents:
-                unique_contents[content] = (id_, file_path)
+                unique_contents[content] = (
+                    id_,
+                    file_path,
+                    content_data["content_hash"],
+                )
 
         # Reconstruct contents with unique content
         contents = {
-            id_: {"content": content, "file_path": file_path}
-            for content, (id_, file_path) in unique_contents.items()
+            id_: {"content": content, "file_path": file_path, "content_hash": hash_}
+            for content, (id_, file_path, hash_) in unique_contents.items()
         }
 
         # 3. Generate document initial status
+        # The body is kept once in full_docs; doc_status only references it by id
         new_docs: dict[str, Any] = {
             id_: {
                 "status": DocStatus.PENDING,
-                "content": content_data["content"],
                 "content_summary": get_content_summary(content_data["content"]),
                 "content_length": len(content_data["content"]),
                 "created_at": datetime.now().isoformat(),
@@ -755,6 +805,7 @@ class LightRAG:
                 "file_path": content_data[
                     "file_path"
                 ],  # Store file path in document status
+                "content_hash": content_data["content_hash"],
             }
             for id_, content_data in contents.items()
         }
@@ -787,7 +838,12 @@ class LightRAG:
             logger.info("No new unique documents were found.")
             return
 
-        # 5. Store status document
+        # 5. Store document bodies, then their status records
+        await self.full_docs.upsert(
+            {doc_id: {"content": contents[doc_id]["content"]} for doc_id in new_docs}
+        )
+        # Persist bodies now: file-backed stores otherwise flush only after processing
+        await self.full_docs.index_done_callback()
         await self.doc_status.upsert(new_docs)
         logger.info(f"Stored {len(new_docs)} new unique documents")
 
@@ -809,6 +865,7 @@ class LightRAG:
         from lightrag.kg.shared_storage import (
             get_namespace_data,
             get_pipeline_status_lock,
+            pipeline_is_busy,  # TNC
         )
 
         # Get pipeline status shared data and lock
@@ -819,17 +876,12 @@ class LightRAG:
         # Check if another process is already processing the queue
         async with pipeline_status_lock:
             # Ensure only one worker is processing documents
-            if not pipeline_status.get("busy", False):
-                processing_docs, failed_docs, pending_docs = await asyncio.gather(
-                    self.doc_status.get_docs_by_status(DocStatus.PROCESSING),
-                    self.doc_status.get_docs_by_status(DocStatus.FAILED),
-                    self.doc_status.get_docs_by_status(DocStatus.PENDING),
-                )
-
-                to_process_docs: dict[str, DocProcessingStatus] = {}
-                to_process_docs.update(processing_docs)
-                to_process_docs.update(failed_docs)
-                to_process_docs.update(pending_docs)
+            if not pipeline_is_busy(pipeline_status):  # TNC: resets a dead owner's flag
+                # TNC: pull pending work in bounded pages instead of loading every
+                # PROCESSING/FAILED/PENDING record at once
+                cursors = self._new_docs_cursors()
+                attempted: set[str] = set()
+                to_process_docs = await self._next_docs_page(cursors, attempted)
 
                 if not to_process_docs:
                     logger.info("No documents to process")
@@ -838,6 +890,7 @@ class LightRAG:
                 pipeline_status.update(
                     {
                         "busy": True,
+                        "busy_pid": os.getpid(),  # TNC
                         "job_name": "Default Job",
                         "job_start": datetime.now().isoformat(),
                         "docs": 0,
@@ -867,6 +920,8 @@ class LightRAG:
                     pipeline_status["history_messages"].append(log_message)
                     break
 
+                attempted.update(to_process_docs)
+
                 # 2. split docs into chunks, insert chunks, update doc status
                 docs_batches = [
                     list(to_process_docs.items())[i : i + self.max_parallel_insert]
@@ -901,10 +956,23 @@ class LightRAG:
                     pipeline_status_lock: asyncio.Lock,
                 ) -> None:
                     """Process single document"""
+                    tasks: list[asyncio.Task] = []
                     try:
                         # Get file path from status document
                         file_path = getattr(status_doc, "file_path", "unknown_source")
 
+                        # Document bodies live in full_docs; records enqueued before
+                        # that still carry their content in doc_status
+                        content_data = await self.full_docs.get_by_id(doc_id)
+                        if content_data:
+                            content = content_data["content"]
+                        else:
+                            # Paged status records omit inline content
+                            legacy_status = await self.doc_status.get_by_id(doc_id)
+                            content = (legacy_status or {}).get("content")
+                        if content is None:
+                            raise ValueError(f"Content of document {doc_id} not found")
+
                         # Generate chunks from document
                         chunks: dict[str, Any] = {
                             compute_mdhash_id(dp["content"], prefix="chunk-"): {
@@ -913,7 +981,7 @@ class LightRAG:
                                 "file_path": file_path,  # Add file path to each chunk
                             }
                             for dp in self.chunking_func(
-                                status_doc.content,
+                                content,
                                 split_by_character,
                                 split_by_character_only,
                                 self.chunk_overlap_token_size,
@@ -924,57 +992,42 @@ class LightRAG:
 
                         # Process document (text chunks and full docs) in parallel
                         # Create tasks with references for potential cancellation
-                        doc_status_task = asyncio.create_task(
-                            self.doc_status.upsert(
-                                {
-                                    doc_id: {
-                                        "status": DocStatus.PROCESSING,
-                                        "chunks_count": len(chunks),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now().isoformat(),
-                                        "file_path": file_path,
-                                    }
-                                }
-                            )
-                        )
-                        chunks_vdb_task = asyncio.create_task(
-                            self.chunks_vdb.upsert(chunks)
-                        )
-                        entity_relation_task = asyncio.create_task(
-                            self._process_entity_relation_graph(
-                                chunks, pipeline_status, pipeline_status_lock
-                            )
-                        )
-                        full_docs_task = asyncio.create_task(
-                            self.full_docs.upsert(
-                                {doc_id: {"content": status_doc.content}}
-                            )
-                        )
-                        text_chunks_task = asyncio.create_task(
-                            self.text_chunks.upsert(chunks)
-                        )
                         tasks = [
-                            doc_status_task,
-                            chunks_vdb_task,
-                            entity_relation_task,
-                            full_docs_task,
-                            text_chunks_task,
+                            asyncio.create_task(
+                                self.doc_status.patch(
+                                    {
+                                        doc_id: {
+                                            "status": DocStatus.PROCESSING,
+                                            "chunks_count": len(chunks),
+                                            "error": None,
+                                            "updated_at": datetime.now().isoformat(),
+                                        }
+                                    }
+                                )
+                            ),
+                            asyncio.create_task(self.chunks_vdb.upsert(chunks)),
+                            asyncio.create_task(
+                                self._process_entity_relation_graph(
+                                    chunks, pipeline_status, pipeline_status_lock
+                                )
+                            ),
+                            asyncio.create_task(self.text_chunks.upsert(chunks)),
                         ]
+                        if not content_data:
+                            # Move legacy inline content into the document store
+                            tasks.append(
+                                asyncio.create_task(
+                                    self.full_docs.upsert(
+                                        {doc_id: {"content": content}}
+                                    )
+                                )
+                            )
                         await asyncio.gather(*tasks)
-                        await self.doc_status.upsert(
+                        await self.doc_status.patch(
                             {
                                 doc_id: {
                                     "status": DocStatus.PROCESSED,
-                                    "chunks_count": len(chunks),
-                                    "content": status_doc.content,
-                                    "content_summary": status_doc.content_summary,
-                                    "content_length": status_doc.content_length,
-                                    "created_at": status_doc.created_at,
                                     "updated_at": datetime.now().isoformat(),
-                                    "file_path": file_path,
                                 }
                             }
                         )
@@ -987,26 +1040,16 @@ class LightRAG:
                             pipeline_status["history_messages"].append(error_msg)
 
                             # Cancel other tasks as they are no longer meaningful
-                            for task in [
-                                chunks_vdb_task,
-                                entity_relation_task,
-                                full_docs_task,
-                                text_chunks_task,
-                            ]:
+                            for task in tasks:
                                 if not task.done():
                                     task.cancel()
                         # Update document status to failed
-                        await self.doc_status.upsert(
+                        await self.doc_status.patch(
                             {
                                 doc_id: {
                                     "status": DocStatus.FAILED,
                                     "error": str(e),
-                                    "content": status_doc.content,
-                                    "content_summary": status_doc.content_summary,
-                                    "content_length": status_doc.content_length,
-                                    "created_at": status_doc.created_at,
                                     "updated_at": datetime.now().isoformat(),
-                                    "file_path": file_path,
                                 }
                             }
                         )
@@ -1045,6 +1088,12 @@ class LightRAG:
                     pipeline_status["latest_message"] = log_message
                     pipeline_status["history_messages"].append(log_message)
 
+                # TNC: continue with the next page of this pass
+                if cursors:
+                    to_process_docs = await self._next_docs_page(cursors, attempted)
+                    if to_process_docs:
+                        continue
+
                 # Check if there's a pending request to process more documents (with lock)
                 has_pending_request = False
                 async with pipeline_status_lock:
@@ -1061,17 +1110,10 @@ class LightRAG:
                 pipeline_status["latest_message"] = log_message
                 pipeline_status["history_messages"].append(log_message)
 
-                # Check for pending documents again
-                processing_docs, failed_docs, pending_docs = await asyncio.gather(
-                    self.doc_status.get_docs_by_status(DocStatus.PROCESSING),
-                    self.doc_status.get_docs_by_status(DocStatus.FAILED),
-                    self.doc_status.get_docs_by_status(DocStatus.PENDING),
-                )
-
-                to_process_docs = {}
-                to_process_docs.update(processing_docs)
-                to_process_docs.update(failed_docs)
-                to_process_docs.update(pending_docs)
+                # Check for pending documents again, starting a fresh pass
+                cursors = self._new_docs_cursors()
+                attempted = set()
+                to_process_docs = await self._next_docs_page(cursors, attempted)
 
         finally:
             log_message = "Document processing pipeline completed"
@@ -1082,21 +1124,54 @@ class LightRAG:
                 pipeline_status["latest_message"] = log_message
                 pipeline_status["history_messages"].append(log_message)
 
+    @staticmethod
+    def _new_docs_cursors() -> dict[DocStatus, str | None]:
+        """Paging cursors for one pipeline pass, in the order statuses are drained"""
+        return {
+            DocStatus.PROCESSING: None,
+            DocStatus.FAILED: None,
+            DocStatus.PENDING: None,
+        }
+
+    async def _next_docs_page(
+        self, cursors: dict[DocStatus, str | None], attempted: set[str]
+    ) -> dict[str, DocProcessingStatus]:
+        """Pull the next non-empty page of documents to process.
+
+        Statuses are drained one after another, each paged by id; a status is
+        removed from ``cursors`` once exhausted. Documents already attempted in
+        this pass (e.g. a PROCESSING one that has just FAILED) are skipped.
+        """
+        while cursors:
+            status = next(iter(cursors))
+            docs, next_cursor = await self.doc_status.get_docs_page(
+                status, self.doc_status_page_size, cursors[status]
+            )
+            if next_cursor is None:
+                del cursors[status]
+            else:
+                cursors[status] = next_cursor
+            docs = {k: v for k, v in docs.items() if k not in attempted}
+            if docs:
+                return docs
+        return {}
+
     async def _process_entity_relation_graph(
         self, chunk: dict[str, Any], pipeline_status=None, pipeline_status_lock=None
     ) -> None:
         try:
             # logger.debug("Processing chunk dict" + str(chunk))
-            await extract_entities(
-                chunk,
-                knowledge_graph_inst=self.chunk_entity_relation_graph,
-                entity_vdb=self.entities_vdb,
-                relationships_vdb=self.relationships_vdb,
-                global_config=asdict(self),
-                pipeline_status=pipeline_status,
-                pipeline_status_lock=pipeline_status_lock,
-                llm_response_cache=self.llm_response_cache,
-            )
+            with llm_priority("extraction"):  # TNC
+                await extract_entities(
+                    chunk,
+                    knowledge_graph_inst=self.chunk_entity_relation_graph,
+                    entity_vdb=self.entities_vdb,
+                    relationships_vdb=self.relationships_vdb,
+                    global_config=asdict(self),
+                    pipeline_status=pipeline_status,
+                    pipeline_status_lock=pipeline_status_lock,
+                    llm_response_cache=self.llm_response_cache,
+                )
         except Exception as e:
             logger.error("Failed to extract entities and relationships")
             raise e
@@ -1118,6 +1193,7 @@ class LightRAG:
             if storage_inst is not None
         ]
         await asyncio.gather(*tasks)
+        await publish_data_version(self.llm_response_cache)  # TNC: invalidates cached answers
 
         log_message = "In memory DB persist to disk"
         logger.info(log_message)
@@ -1466,6 +1542,7 @@ class LightRAG:
                 ]
             ]
         )
+        await publish_data_version(self.llm_response_cache)  # TNC
 
     def delete_by_relation(self, source_entity: str, target_entity: str) -> None:
         """Synchronously delete a relation between two entities.
@@ -1530,6 +1607,7 @@ class LightRAG:
                 ]
             ]
         )
+        await publish_data_version(self.llm_response_cache)  # TNC
 
     async def get_processing_status(self) -> dict[str, int]:
         """Get current document processing status counts
@@ -2120,6 +2198,7 @@ class LightRAG:
                 ]
             ]
         )
+        await publish_data_version(self.llm_response_cache)  # TNC
 
     # TODO: Lock all KG relative DB to esure consistency across multiple processes
     async def aedit_relation(
@@ -2240,6 +2319,7 @@ class LightRAG:
                 ]
             ]
         )
+        await publish_data_version(self.llm_response_cache)  # TNC
 
     async def acreate_entity(
         self, entity_name: str, entity_data: dict[str, Any]
@@ -2788,6 +2868,8 @@ class LightRAG:
 
         elif file_format == "excel":
             # Excel export
+            import pandas as pd  # TNC: only needed here, kept out of import time
+
             entities_df = (
                 pd.DataFrame(entities_data) if entities_data else pd.DataFrame()
             )
@@ -3145,3 +3227,4 @@ class LightRAG:
                 ]
             ]
         )
+        await publish_data_version(self.llm_response_cache)  # TNC
@@ -4,7 +4,7 @@ import os
 import logging
 import numpy as np
 from typing import Any, Union, AsyncIterator
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 if sys.version_info < (3, 9):
     from typing import AsyncIterator
@@ -12,12 +12,10 @@ else:
     from collections.abc import AsyncIterator
 
 # Install Anthropic SDK if not present
-if not pm.is_installed("anthropic"):
-    pm.install("anthropic")
+ensure_package("anthropic")
 
 # Add Voyage AI import
-if not pm.is_installed("voyageai"):
-    pm.install("voyageai")
+ensure_package("voyageai")
 import voyageai
 
 from anthropic import (
@@ -1,11 +1,9 @@
 import os
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 # install specific modules
-if not pm.is_installed("openai"):
-    pm.install("openai")
-if not pm.is_installed("tenacity"):
-    pm.install("tenacity")
+ensure_package("openai")
+ensure_package("tenacity")
 
 from openai import (
     AsyncAzureOpenAI,
@@ -25,10 +23,30 @@ from lightrag.utils import (
     locate_json_string_body_from_string,
     safe_unicode_decode,
 )
+from lightrag.llm.client_registry import client_registry
 
 import numpy as np
 
 
+def get_azure_openai_async_client(model: str) -> AsyncAzureOpenAI:
+    """Return a pooled AsyncAzureOpenAI client for the configured endpoint and deployment."""
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    api_version = os.getenv("AZURE_OPENAI_API_VERSION")
+    return client_registry.get_or_create(
+        "azure_openai",
+        lambda: AsyncAzureOpenAI(
+            azure_endpoint=endpoint,
+            azure_deployment=model,
+            api_key=api_key,
+            api_version=api_version,
+        ),
+        base_url=endpoint,
+        api_key=api_key,
+        config={"deployment": model, "api_version": api_version},
+    )
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -53,12 +71,7 @@ async def azure_openai_complete_if_cache(
     if api_version:
         os.environ["AZURE_OPENAI_API_VERSION"] = api_version
 
-    openai_async_client = AsyncAzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        azure_deployment=model,
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    )
+    openai_async_client = get_azure_openai_async_client(model)
     kwargs.pop("hashing_kv", None)
     messages = []
     if system_prompt:
@@ -135,12 +148,7 @@ async def azure_openai_embed(
     if api_version:
         os.environ["AZURE_OPENAI_API_VERSION"] = api_version
 
-    openai_async_client = AsyncAzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        azure_deployment=model,
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    )
+    openai_async_client = get_azure_openai_async_client(model)
 
     response = await openai_async_client.embeddings.create(
         model=model, input=texts, encoding_format="float"
@@ -2,12 +2,10 @@ import copy
 import os
 import json
 
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
-if not pm.is_installed("aioboto3"):
-    pm.install("aioboto3")
-if not pm.is_installed("tenacity"):
-    pm.install("tenacity")
+ensure_package("aioboto3")
+ensure_package("tenacity")
 import aioboto3
 import numpy as np
 from tenacity import (
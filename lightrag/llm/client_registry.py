@@ -0,0 +1,134 @@
+"""
+Registry of long-lived LLM / embedding API clients.
+
+Bindings used to build a new SDK client (and with it a new HTTP connection
+pool) on every call, paying a TCP + TLS handshake per request. The registry
+keeps one client per (binding, base_url, api_key, config) and event loop so
+keep-alive / HTTP/2 connections are reused across calls.
+
+Clients are bound to the event loop that created them, so the cache is keyed
+by the running loop as well; clients of a loop are dropped with it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import inspect
+import os
+import weakref
+from typing import Any, Callable, Hashable
+
+from lightrag.utils import logger
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn a (possibly nested) config value into a hashable cache key part."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        # Objects such as a caller supplied http_client are keyed by identity
+        return ("id", id(value))
+
+
+def _secret_key(secret: str | None) -> str | None:
+    """Keep raw API keys out of the key tuple (it shows up in debug output)."""
+    if secret is None:
+        return None
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+
+async def _close_client(client: Any) -> None:
+    """Close an SDK or HTTP client regardless of which close API it exposes."""
+    for name in ("aclose", "close"):
+        close = getattr(client, name, None)
+        if close is None:
+            continue
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+        return
+    # ollama.AsyncClient only exposes the underlying httpx client
+    inner = getattr(client, "_client", None)
+    if inner is not None:
+        await _close_client(inner)
+
+
+def http2_enabled() -> bool:
+    """Whether bindings should negotiate HTTP/2 with their API endpoint."""
+    return os.getenv("LLM_HTTP2", "false").lower() in ("true", "1", "yes")
+
+
+class ClientRegistry:
+    """Cache of API clients keyed by binding configuration and event loop."""
+
+    def __init__(self):
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[Hashable, Any]
+        ] = weakref.WeakKeyDictionary()
+        self._users = 0
+
+    def get_or_create(
+        self,
+        binding: str,
+        factory: Callable[[], Any],
+        base_url: str | None = None,
+        api_key: str | None = None,
+        config: dict[str, Any] | None = None,
+    ) -> Any:
+        """Return the cached client for this configuration, creating it if needed.
+
+        Args:
+            binding: Binding name, e.g. "openai" or "ollama".
+            factory: Zero-argument callable building a new client.
+            base_url: Endpoint the client talks to.
+            api_key: Credential the client authenticates with.
+            config: Any further options that change the client's behavior.
+        """
+        key = (binding, base_url, _secret_key(api_key), _freeze(config or {}))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside a loop the client cannot be safely shared
+            return factory()
+
+        clients = self._clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = factory()
+            clients[key] = client
+            logger.debug(f"Created pooled {binding} client for {base_url}")
+        return client
+
+    def acquire(self) -> None:
+        """Register a user (a LightRAG instance) of the pooled clients."""
+        self._users += 1
+
+    async def release(self) -> None:
+        """Unregister a user; clients are closed once the last one is gone."""
+        self._users = max(0, self._users - 1)
+        if self._users == 0:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close every client created on the running event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        clients = self._clients.pop(loop, {})
+        for client in clients.values():
+            try:
+                await _close_client(client)
+            except Exception as e:
+                logger.warning(f"Failed to close pooled LLM client: {e}")
+        if clients:
+            logger.debug(f"Closed {len(clients)} pooled LLM client(s)")
+
+
+client_registry = ClientRegistry()
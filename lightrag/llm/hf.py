@@ -1,22 +1,18 @@
 import copy
 import os
+import weakref
 from functools import lru_cache
+from typing import Any
 
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 # install specific modules
-if not pm.is_installed("transformers"):
-    pm.install("transformers")
-if not pm.is_installed("torch"):
-    pm.install("torch")
-if not pm.is_installed("tenacity"):
-    pm.install("tenacity")
-if not pm.is_installed("numpy"):
-    pm.install("numpy")
-if not pm.is_installed("tenacity"):
-    pm.install("tenacity")
-
-from transformers import AutoTokenizer, AutoModelForCausalLM
+ensure_package("transformers")
+ensure_package("torch")
+ensure_package("tenacity")
+ensure_package("numpy")
+
+from transformers import AutoModel, AutoTokenizer, AutoModelForCausalLM
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -30,6 +26,7 @@ from lightrag.exceptions import (
 )
 from lightrag.utils import (
     locate_json_string_body_from_string,
+    run_blocking,
 )
 import torch
 import numpy as np
@@ -66,7 +63,8 @@ async def hf_model_if_cache(
     **kwargs,
 ) -> str:
     model_name = model
-    hf_model, hf_tokenizer = initialize_hf_model(model_name)
+    # Loading weights on first use blocks for a long time; keep it off the loop
+    hf_model, hf_tokenizer = await run_blocking(initialize_hf_model, model_name)
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
@@ -106,6 +104,11 @@ async def hf_model_if_cache(
                     + ">\n"
                 )
 
+    return await run_blocking(_hf_generate, hf_model, hf_tokenizer, input_prompt)
+
+
+def _hf_generate(hf_model, hf_tokenizer, input_prompt: str) -> str:
+    """Tokenize and run generation synchronously; called on the blocking executor."""
     input_ids = hf_tokenizer(
         input_prompt, return_tensors="pt", padding=True, truncation=True
     ).to("cuda")
@@ -137,33 +140,153 @@ async def hf_model_complete(
     return result
 
 
-async def hf_embed(texts: list[str], tokenizer, embed_model) -> np.ndarray:
-    # Detect the appropriate device
+# Devices embedding models have already been moved to, so the model stays
+# resident instead of being transferred on every call
+_embed_model_devices: "weakref.WeakKeyDictionary[Any, torch.device]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _resolve_embed_device(embed_model) -> torch.device:
+    if not isinstance(embed_model, torch.nn.Module):
+        # ONNX Runtime models manage their own execution provider
+        return torch.device(getattr(embed_model, "device", "cpu"))
     if torch.cuda.is_available():
-        device = next(embed_model.parameters()).device  # Use CUDA if available
+        return next(embed_model.parameters()).device  # Use CUDA if available
     elif torch.backends.mps.is_available():
-        device = torch.device("mps")  # Use MPS for Apple Silicon
-    else:
-        device = torch.device("cpu")  # Fallback to CPU
+        return torch.device("mps")  # Use MPS for Apple Silicon
+    return torch.device("cpu")  # Fallback to CPU
+
+
+def _ensure_resident(embed_model) -> torch.device:
+    device = _embed_model_devices.get(embed_model)
+    if device is None:
+        device = _resolve_embed_device(embed_model)
+        if isinstance(embed_model, torch.nn.Module):
+            embed_model.to(device)
+            embed_model.eval()
+        _embed_model_devices[embed_model] = device
+    return device
 
-    # Move the model to the detected device
-    embed_model = embed_model.to(device)
 
-    # Tokenize the input texts and move them to the same device
-    encoded_texts = tokenizer(
-        texts, return_tensors="pt", padding=True, truncation=True
-    ).to(device)
+def load_hf_embed_model(
+    model_name: str, backend: str = "torch", quantize: bool = False
+) -> tuple[Any, Any]:
+    """Load a tokenizer and embedding model once, for reuse across hf_embed calls.
 
-    # Perform inference
-    with torch.no_grad():
-        outputs = embed_model(
-            input_ids=encoded_texts["input_ids"],
-            attention_mask=encoded_texts["attention_mask"],
+    Args:
+        model_name: Hugging Face model id or local path.
+        backend: "torch" or "onnx". The ONNX backend exports the model through
+            optimum and runs it with ONNX Runtime, which is usually faster on CPU.
+        quantize: Apply dynamic int8 quantization of the linear layers, for
+            CPU-only hosts.
+
+    Returns:
+        (tokenizer, embed_model) ready to pass to hf_embed.
+    """
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "onnx":
+        ensure_package("optimum", install="optimum[onnxruntime]")
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        embed_model = ORTModelForFeatureExtraction.from_pretrained(
+            model_name, export=True
         )
-        embeddings = outputs.last_hidden_state.mean(dim=1)
+        if quantize:
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
 
-    # Convert embeddings to NumPy
-    if embeddings.dtype == torch.bfloat16:
-        return embeddings.detach().to(torch.float32).cpu().numpy()
+            quantized_dir = os.path.join(
+                os.getenv("HF_EMBED_ONNX_CACHE", "./onnx_embed_models"),
+                model_name.replace("/", "--") + "-int8",
+            )
+            quantizer = ORTQuantizer.from_pretrained(embed_model)
+            quantizer.quantize(
+                save_dir=quantized_dir,
+                quantization_config=AutoQuantizationConfig.avx2(
+                    is_static=False, per_channel=False
+                ),
+            )
+            embed_model = ORTModelForFeatureExtraction.from_pretrained(quantized_dir)
+    elif backend == "torch":
+        embed_model = AutoModel.from_pretrained(model_name)
+        if quantize:
+            embed_model = torch.quantization.quantize_dynamic(
+                embed_model, {torch.nn.Linear}, dtype=torch.qint8
+            )
     else:
-        return embeddings.detach().cpu().numpy()
+        raise ValueError(f"Unsupported embedding backend: {backend}")
+    return tokenizer, embed_model
+
+
+async def hf_embed(
+    texts: list[str],
+    tokenizer,
+    embed_model,
+    batch_size: int = 32,
+    max_length: int | None = None,
+    normalize: bool = False,
+) -> np.ndarray:
+    """Embed texts with a local Hugging Face model.
+
+    Inputs are sorted by token length and run in sub-batches so each batch is
+    padded only to its own longest text; hidden states are mean-pooled over
+    real tokens only. Results are returned in input order.
+
+    Args:
+        texts: Texts to embed.
+        tokenizer: Tokenizer matching ``embed_model``.
+        embed_model: A transformers model or an ONNX Runtime feature-extraction
+            model (see load_hf_embed_model).
+        batch_size: Max texts per forward pass.
+        max_length: Truncation length; defaults to the tokenizer's limit.
+        normalize: L2-normalize the embeddings.
+    """
+    return await run_blocking(
+        _hf_embed_sync, texts, tokenizer, embed_model, batch_size, max_length, normalize
+    )
+
+
+def _hf_embed_sync(
+    texts: list[str],
+    tokenizer,
+    embed_model,
+    batch_size: int = 32,
+    max_length: int | None = None,
+    normalize: bool = False,
+) -> np.ndarray:
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    device = _ensure_resident(embed_model)
+
+    # Tokenize once without padding; padding is applied per sub-batch below
+    encoded = tokenizer(texts, truncation=True, max_length=max_length, padding=False)
+    lengths = [len(ids) for ids in encoded["input_ids"]]
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+    batch_size = max(1, batch_size)
+    results: list[np.ndarray | None] = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start : start + batch_size]
+        features = {key: [encoded[key][i] for i in batch_idx] for key in encoded.keys()}
+        batch = tokenizer.pad(features, padding=True, return_tensors="pt").to(device)
+
+        with torch.no_grad():
+            outputs = embed_model(**batch)
+            hidden = outputs.last_hidden_state
+            # Mean-pool over real tokens only so padding does not dilute the vectors
+            mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            embeddings = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            if normalize:
+                embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+
+        # Convert embeddings to NumPy
+        embeddings = embeddings.detach()
+        if embeddings.dtype != torch.float32:
+            embeddings = embeddings.to(torch.float32)
+        embeddings = embeddings.cpu().numpy()
+        for row, i in enumerate(batch_idx):
+            results[i] = embeddings[row]
+
+    return np.stack(results)
@@ -1,11 +1,9 @@
 import os
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 # install specific modules
-if not pm.is_installed("lmdeploy"):
-    pm.install("lmdeploy")
-if not pm.is_installed("tenacity"):
-    pm.install("tenacity")
+ensure_package("lmdeploy")
+ensure_package("tenacity")
 
 
 import numpy as np
@@ -1,4 +1,4 @@
-import pipmaster as pm
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 from llama_index.core.llms import (
     ChatMessage,
     MessageRole,
@@ -8,8 +8,7 @@ from typing import List, Optional
 from lightrag.utils import logger
 
 # Install required dependencies
-if not pm.is_installed("llama-index"):
-    pm.install("llama-index")
+ensure_package("llama-index")
 
 from llama_index.core.embeddings import BaseEmbedding
 from llama_index.core.settings import Settings as LlamaIndexSettings
@@ -1,16 +1,15 @@
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 # install specific modules
-if not pm.is_installed("lmdeploy"):
-    pm.install("lmdeploy[all]")
-if not pm.is_installed("tenacity"):
-    pm.install("tenacity")
+ensure_package("lmdeploy", install="lmdeploy[all]")
+ensure_package("tenacity")
 
 from lightrag.exceptions import (
     APIConnectionError,
     RateLimitError,
     APITimeoutError,
 )
+from lightrag.utils import run_blocking
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -115,7 +114,9 @@ async def lmdeploy_model_if_cache(
         do_sample = True
         gen_params.update(do_sample=do_sample)
 
-    lmdeploy_pipe = initialize_lmdeploy_pipeline(
+    # Building the pipeline loads the model synchronously; keep it off the loop
+    lmdeploy_pipe = await run_blocking(
+        initialize_lmdeploy_pipeline,
         model=model,
         tp=tp,
         chat_template=chat_template,
@@ -4,12 +4,10 @@ if sys.version_info < (3, 9):
     from typing import AsyncIterator
 else:
     from collections.abc import AsyncIterator
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
-if not pm.is_installed("aiohttp"):
-    pm.install("aiohttp")
-if not pm.is_installed("tenacity"):
-    pm.install("tenacity")
+ensure_package("aiohttp")
+ensure_package("tenacity")
 
 import aiohttp
 from tenacity import (
@@ -25,10 +23,26 @@ from lightrag.exceptions import (
     APITimeoutError,
 )
 
+from lightrag.llm.client_registry import client_registry
+
 from typing import Union, List
 import numpy as np
 
 
+def get_lollms_session(
+    headers: dict[str, str], timeout: float | None = None
+) -> aiohttp.ClientSession:
+    """Return a pooled aiohttp session so requests reuse keep-alive connections."""
+    return client_registry.get_or_create(
+        "lollms",
+        lambda: aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=timeout), headers=headers
+        ),
+        api_key=headers.get("Authorization"),
+        config={"headers": headers, "timeout": timeout},
+    )
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -79,24 +93,23 @@ async def lollms_model_if_cache(
     full_prompt += prompt
 
     request_data["prompt"] = full_prompt
-    timeout = aiohttp.ClientTimeout(total=kwargs.get("timeout", None))
-
-    async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-        if stream:
+    session = get_lollms_session(headers, kwargs.get("timeout", None))
 
-            async def inner():
-                async with session.post(
-                    f"{base_url}/lollms_generate", json=request_data
-                ) as response:
-                    async for line in response.content:
-                        yield line.decode().strip()
+    if stream:
 
-            return inner()
-        else:
+        async def inner():
             async with session.post(
                 f"{base_url}/lollms_generate", json=request_data
             ) as response:
-                return await response.text()
+                async for line in response.content:
+                    yield line.decode().strip()
+
+        return inner()
+    else:
+        async with session.post(
+            f"{base_url}/lollms_generate", json=request_data
+        ) as response:
+            return await response.text()
 
 
 async def lollms_model_complete(
@@ -146,16 +159,16 @@ async def lollms_embed(
         if api_key
         else {"Content-Type": "application/json"}
     )
-    async with aiohttp.ClientSession(headers=headers) as session:
-        embeddings = []
-        for text in texts:
-            request_data = {"text": text}
-
-            async with session.post(
-                f"{base_url}/lollms_embed",
-                json=request_data,
-            ) as response:
-                result = await response.json()
-                embeddings.append(result["vector"])
-
-        return np.array(embeddings)
+    session = get_lollms_session(headers)
+    embeddings = []
+    for text in texts:
+        request_data = {"text": text}
+
+        async with session.post(
+            f"{base_url}/lollms_embed",
+            json=request_data,
+        ) as response:
+            result = await response.json()
+            embeddings.append(result["vector"])
+
+    return np.array(embeddings)
@@ -6,11 +6,10 @@ if sys.version_info < (3, 9):
 else:
     pass
 
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 # install specific modules
-if not pm.is_installed("openai"):
-    pm.install("openai")
+ensure_package("openai")
 
 from openai import (
     AsyncOpenAI,
@@ -5,13 +5,11 @@ if sys.version_info < (3, 9):
 else:
     from collections.abc import AsyncIterator
 
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 # install specific modules
-if not pm.is_installed("ollama"):
-    pm.install("ollama")
-if not pm.is_installed("tenacity"):
-    pm.install("tenacity")
+ensure_package("ollama")
+ensure_package("tenacity")
 
 
 import ollama
@@ -28,11 +26,34 @@ from lightrag.exceptions import (
     APITimeoutError,
 )
 from lightrag.api import __api_version__
+from lightrag.llm.client_registry import client_registry
 
 import numpy as np
 from typing import Union
 
 
+def get_ollama_async_client(
+    host: str | None = None, api_key: str | None = None, **client_kwargs
+) -> ollama.AsyncClient:
+    """Return a pooled ollama.AsyncClient so calls reuse its HTTP connections."""
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": f"LightRAG/{__api_version__}",
+    }
+    extra_headers = client_kwargs.pop("headers", None)
+    if extra_headers:
+        headers.update(extra_headers)
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return client_registry.get_or_create(
+        "ollama",
+        lambda: ollama.AsyncClient(host=host, headers=headers, **client_kwargs),
+        base_url=host,
+        api_key=api_key,
+        config={"headers": headers, **client_kwargs},
+    )
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -55,13 +76,7 @@ async def _ollama_model_if_cache(
     timeout = kwargs.pop("timeout", None)
     kwargs.pop("hashing_kv", None)
     api_key = kwargs.pop("api_key", None)
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": f"LightRAG/{__api_version__}",
-    }
-    if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
-    ollama_client = ollama.AsyncClient(host=host, timeout=timeout, headers=headers)
+    ollama_client = get_ollama_async_client(host=host, api_key=api_key, timeout=timeout)
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
@@ -110,9 +125,9 @@ async def ollama_embedding(texts: list[str], embed_model, **kwargs) -> np.ndarra
     Deprecated in favor of `embed`.
     """
     embed_text = []
-    ollama_client = ollama.Client(**kwargs)
+    ollama_client = get_ollama_async_client(**kwargs)
     for text in texts:
-        data = ollama_client.embeddings(model=embed_model, prompt=text)
+        data = await ollama_client.embeddings(model=embed_model, prompt=text)
         embed_text.append(data["embedding"])
 
     return embed_text
@@ -120,13 +135,8 @@ async def ollama_embedding(texts: list[str], embed_model, **kwargs) -> np.ndarra
 
 async def ollama_embed(texts: list[str], embed_model, **kwargs) -> np.ndarray:
     api_key = kwargs.pop("api_key", None)
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": f"LightRAG/{__api_version__}",
-    }
     if api_key:
-        headers["Authorization"] = api_key
-    kwargs["headers"] = headers
-    ollama_client = ollama.Client(**kwargs)
-    data = ollama_client.embed(model=embed_model, input=texts)
+        kwargs["headers"] = {"Authorization": api_key}
+    ollama_client = get_ollama_async_client(**kwargs)
+    data = await ollama_client.embed(model=embed_model, input=texts)
     return data["embeddings"]
@@ -7,11 +7,10 @@ if sys.version_info < (3, 9):
     from typing import AsyncIterator
 else:
     from collections.abc import AsyncIterator
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 # install specific modules
-if not pm.is_installed("openai"):
-    pm.install("openai")
+ensure_package("openai")
 
 from openai import (
     AsyncOpenAI,
@@ -30,9 +29,17 @@ from lightrag.utils import (
     locate_json_string_body_from_string,
     safe_unicode_decode,
     logger,
+    current_llm_prompt_tokens,
 )
 from lightrag.types import GPTKeywordExtractionFormat
 from lightrag.api import __api_version__
+from lightrag.llm.client_registry import client_registry, http2_enabled
+from lightrag.llm.rate_control import (
+    SlotStream,
+    estimate_prompt_tokens,
+    rate_controllers,
+    wait_retry_after,
+)
 
 import numpy as np
 from typing import Any, Union
@@ -82,12 +89,42 @@ def create_openai_async_client(
     if base_url is not None:
         merged_configs["base_url"] = base_url
 
+    if http2_enabled() and "http_client" not in merged_configs:
+        ensure_package("h2")
+        from openai import DefaultAsyncHttpxClient
+
+        merged_configs["http_client"] = DefaultAsyncHttpxClient(http2=True)
+
     return AsyncOpenAI(**merged_configs)
 
 
+def get_openai_async_client(
+    api_key: str | None = None,
+    base_url: str | None = None,
+    client_configs: dict[str, Any] = None,
+) -> AsyncOpenAI:
+    """Return a pooled AsyncOpenAI client, reused across calls with the same configuration.
+
+    Reusing the client keeps its HTTP connection pool (and TLS sessions) alive
+    between requests instead of reconnecting on every call.
+    """
+    if not api_key:
+        api_key = os.environ["OPENAI_API_KEY"]
+
+    return client_registry.get_or_create(
+        "openai",
+        lambda: create_openai_async_client(
+            api_key=api_key, base_url=base_url, client_configs=client_configs
+        ),
+        base_url=base_url,
+        api_key=api_key,
+        config=client_configs,
+    )
+
+
 @retry(
     stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10),
+    wait=wait_retry_after(wait_exponential(multiplier=1, min=4, max=10)),
     retry=retry_if_exception_type(
         (RateLimitError, APIConnectionError, APITimeoutError, InvalidResponseError)
     ),
@@ -138,13 +175,13 @@ async def openai_complete_if_cache(
     # Extract client configuration options
     client_configs = kwargs.pop("openai_client_configs", {})
 
-    # Create the OpenAI client
-    openai_async_client = create_openai_async_client(
+    # Reuse the pooled OpenAI client
+    openai_async_client = get_openai_async_client(
         api_key=api_key, base_url=base_url, client_configs=client_configs
     )
 
     # Remove special kwargs that shouldn't be passed to OpenAI
-    kwargs.pop("hashing_kv", None)
+    hashing_kv = kwargs.pop("hashing_kv", None)
     kwargs.pop("keyword_extraction", None)
 
     # Prepare messages
@@ -162,15 +199,33 @@ async def openai_complete_if_cache(
     verbose_debug(f"Query: {prompt}")
     logger.debug("===== Sending Query to LLM =====")
 
+    # Shared adaptive concurrency limit, Retry-After pause and token budget
+    # capped by the calling instance's llm_model_max_async
+    max_async = (
+        hashing_kv.global_config.get("llm_model_max_async")
+        if hashing_kv is not None
+        else None
+    )
+    rate_controller = rate_controllers.get("openai", model, base_url, max_async)
+    prompt_tokens = current_llm_prompt_tokens() or estimate_prompt_tokens(messages)
+    if kwargs.get("stream") and openai_async_client.base_url.host == "api.openai.com":
+        # Report the stream's usage in its last chunk to correct the budget;
+        # other OpenAI-compatible servers may reject stream_options
+        kwargs.setdefault("stream_options", {"include_usage": True})
+
     try:
-        if "response_format" in kwargs:
-            response = await openai_async_client.beta.chat.completions.parse(
-                model=model, messages=messages, **kwargs
-            )
-        else:
-            response = await openai_async_client.chat.completions.create(
-                model=model, messages=messages, **kwargs
-            )
+        async with rate_controller.slot(prompt_tokens) as rate_slot:
+            if "response_format" in kwargs:
+                response = await openai_async_client.beta.chat.completions.parse(
+                    model=model, messages=messages, **kwargs
+                )
+            else:
+                response = await openai_async_client.chat.completions.create(
+                    model=model, messages=messages, **kwargs
+                )
+            if hasattr(response, "__aiter__"):
+                # A stream keeps its slot until it has been read, see SlotStream
+                rate_slot.detach()
     except APIConnectionError as e:
         logger.error(f"OpenAI API Connection Error: {e}")
         raise
@@ -189,19 +244,35 @@ async def openai_complete_if_cache(
     if hasattr(response, "__aiter__"):
 
         async def inner():
+            completion_chars = 0
+            usage = None
             try:
                 async for chunk in response:
+                    # With stream_options={"include_usage": True} the last
+                    # chunk carries the usage and no choices
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
                     content = chunk.choices[0].delta.content
                     if content is None:
                         continue
+                    completion_chars += len(content)
                     if r"\u" in content:
                         content = safe_unicode_decode(content.encode("utf-8"))
                     yield content
             except Exception as e:
                 logger.error(f"Error in stream response: {str(e)}")
                 raise
+            finally:
+                # Charge the reported usage, else estimate the completion
+                if usage is not None:
+                    rate_controller.charge(
+                        (getattr(usage, "total_tokens", 0) or 0) - prompt_tokens
+                    )
+                else:
+                    rate_controller.charge(completion_chars // 4)
 
-        return inner()
+        return SlotStream(inner(), rate_slot)
 
     else:
         if (
@@ -222,6 +293,13 @@ async def openai_complete_if_cache(
         if r"\u" in content:
             content = safe_unicode_decode(content.encode("utf-8"))
 
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            # Correct the budget with the tokens the provider actually counted
+            rate_controller.charge(
+                (getattr(usage, "total_tokens", 0) or 0) - prompt_tokens
+            )
+
         if token_tracker and hasattr(response, "usage"):
             token_counts = {
                 "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
@@ -357,8 +435,8 @@ async def openai_embed(
         RateLimitError: If the OpenAI API rate limit is exceeded.
         APITimeoutError: If the OpenAI API request times out.
     """
-    # Create the OpenAI client
-    openai_async_client = create_openai_async_client(
+    # Reuse the pooled OpenAI client
+    openai_async_client = get_openai_async_client(
         api_key=api_key, base_url=base_url, client_configs=client_configs
     )
 
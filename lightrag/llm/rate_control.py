@@ -0,0 +1,376 @@
+"""
+Adaptive concurrency and token budgets for LLM API calls.
+
+A fixed MAX_ASYNC either leaves provider capacity unused or, once the
+provider starts answering 429, lets every task back off and retry on its
+own. Bindings instead run their API calls through one RateController per
+(binding, base_url, model) and process, which
+
+  - adjusts the number of calls in flight AIMD-style: +1 per limit's worth of
+    successful calls, halved on a rate limit or timeout (at most once per
+    round trip), reduced by 10% for calls slower than LLM_LATENCY_TARGET;
+  - stops admitting calls until a 429's Retry-After has passed, so retries
+    of all tasks wait for the provider instead of hammering it;
+  - keeps a tokens-per-minute budget (LLM_TPM_LIMIT) charged with the prompt
+    tokens callers already computed (utils.llm_prompt_tokens, else an
+    estimate) and corrected with the usage the response reports.
+
+The limit moves between 1 and LLM_ADAPTIVE_MAX_ASYNC, by default the
+calling LightRAG instance's llm_model_max_async (MAX_ASYNC).
+Waiting calls are admitted by LLM priority class (utils.llm_priority), then
+in arrival order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Hashable
+
+from lightrag.utils import LLM_PRIORITIES, current_llm_priority, logger
+
+
+def retry_after_seconds(exc: BaseException | None) -> float | None:
+    """Delay requested by a rate-limit error's Retry-After headers, if any"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or "RateLimit" in type(exc).__name__
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    return isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or (
+        "Timeout" in type(exc).__name__
+    )
+
+
+def estimate_prompt_tokens(messages: list[dict[str, Any]]) -> int:
+    """Rough token count of chat messages (4 characters per token)"""
+    chars = sum(
+        len(message["content"])
+        for message in messages
+        if isinstance(message.get("content"), str)
+    )
+    return chars // 4 + 1
+
+
+def wait_retry_after(fallback: Callable[[Any], float]) -> Callable[[Any], float]:
+    """tenacity wait honoring Retry-After, ``fallback`` for other errors"""
+
+    def wait(retry_state) -> float:
+        outcome = retry_state.outcome
+        delay = retry_after_seconds(outcome.exception() if outcome else None)
+        return fallback(retry_state) if delay is None else delay
+
+    return wait
+
+
+class RateController:
+    """AIMD in-flight limit, Retry-After pause and token budget of one model"""
+
+    def __init__(
+        self,
+        name: str,
+        max_limit: int,
+        initial_limit: int | None = None,
+        tokens_per_minute: int = 0,
+        latency_target: float = 0,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.max_limit = max(1, max_limit)
+        self.limit = float(min(initial_limit or self.max_limit, self.max_limit))
+        self.tokens_per_minute = tokens_per_minute
+        self.latency_target = latency_target
+        self._in_flight = 0
+        self._waiters: list[list] = []  # heap of [priority, seq, wakeup future]
+        self._seq = itertools.count()
+        self._blocked_until = 0.0
+        self._tokens = float(tokens_per_minute)
+        self._tokens_at = time.monotonic()
+        self._latency: float | None = None
+        self._last_decrease = 0.0
+        self._stats = {"calls": 0, "rate_limited": 0, "timeouts": 0, "decreases": 0}
+
+    def _refill(self, now: float) -> None:
+        if self.tokens_per_minute:
+            self._tokens = min(
+                float(self.tokens_per_minute),
+                self._tokens + (now - self._tokens_at) * self.tokens_per_minute / 60,
+            )
+        self._tokens_at = now
+
+    def _delay(self, tokens: int, now: float) -> float:
+        """Seconds until a call of ``tokens`` prompt tokens may start"""
+        delay = self._blocked_until - now
+        if self.tokens_per_minute:
+            self._refill(now)
+            missing = min(tokens, self.tokens_per_minute) - self._tokens
+            if missing > 0:
+                delay = max(delay, missing * 60 / self.tokens_per_minute)
+        return delay
+
+    def _wake(self) -> None:
+        if self._waiters and not self._waiters[0][2].done():
+            self._waiters[0][2].set_result(None)
+
+    def charge(self, tokens: int) -> None:
+        """Take tokens from the budget, e.g. completion tokens reported after a call"""
+        if self.tokens_per_minute and tokens:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+
+    async def acquire(self, tokens: int) -> None:
+        loop = asyncio.get_running_loop()
+        entry = [
+            LLM_PRIORITIES.index(current_llm_priority()),
+            next(self._seq),
+            loop.create_future(),
+        ]
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                delay = None
+                if self._waiters[0] is entry and self._in_flight < int(self.limit):
+                    delay = self._delay(tokens, time.monotonic())
+                    if delay <= 0:
+                        heapq.heappop(self._waiters)
+                        self._in_flight += 1
+                        self.charge(tokens)
+                        self._wake()
+                        return
+                entry[2] = loop.create_future()
+                try:
+                    await asyncio.wait_for(entry[2], delay)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._wake()
+            raise
+
+    def raise_max_limit(self, max_limit: int) -> None:
+        """Allow more calls in flight, e.g. for a caller with a higher MAX_ASYNC"""
+        if max_limit > self.max_limit:
+            if self.limit >= self.max_limit:
+                # Not throttled: use the new headroom right away
+                self.limit = float(max_limit)
+            self.max_limit = max_limit
+            self._wake()
+
+    def _decrease(self, factor: float, now: float) -> None:
+        # One decrease per round trip: the calls already in flight when the
+        # provider pushed back report the same congestion
+        if now - self._last_decrease < max(1.0, self._latency or 0):
+            return
+        self._last_decrease = now
+        self._stats["decreases"] += 1
+        previous = self.limit
+        self.limit = max(1.0, self.limit * factor)
+        logger.info(
+            f"LLM concurrency of {self.name} lowered from {int(previous)} to {int(self.limit)}"
+        )
+
+    def _on_success(self, latency: float, now: float) -> None:
+        self._latency = (
+            latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        )
+        if self.latency_target and latency > self.latency_target:
+            self._decrease(0.9, now)
+        elif self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+    def _on_error(self, exc: BaseException, now: float) -> None:
+        if is_rate_limit_error(exc):
+            self._stats["rate_limited"] += 1
+            delay = retry_after_seconds(exc)
+            if delay:
+                self._blocked_until = max(self._blocked_until, now + delay)
+            self._decrease(0.5, now)
+        elif is_timeout_error(exc):
+            self._stats["timeouts"] += 1
+            self._decrease(0.5, now)
+
+    def _finish(self, started: float, exc: BaseException | None, done: bool) -> None:
+        now = time.monotonic()
+        if exc is not None:
+            self._on_error(exc, now)
+        elif done:
+            self._on_success(now - started, now)
+        self._in_flight -= 1
+        self._stats["calls"] += 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0):
+        """Run one API call under the controller's limits
+
+        Yields the RateSlot; a call returning a stream detaches it and hands
+        it to a SlotStream, which releases it when the stream ends.
+        """
+        if self.enabled:
+            await self.acquire(tokens)
+        held = RateSlot(self if self.enabled else None)
+        try:
+            yield held
+        except BaseException as e:
+            held.release(e)
+            raise
+        else:
+            if not held.detached:
+                held.release()
+
+    def get_metrics(self) -> dict[str, Any]:
+        now = time.monotonic()
+        if self.tokens_per_minute:
+            self._refill(now)
+        return {
+            "enabled": self.enabled,
+            "limit": int(self.limit),
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "paused_for": max(0.0, self._blocked_until - now),
+            "tokens_available": int(self._tokens) if self.tokens_per_minute else None,
+            "avg_latency": self._latency,
+            **self._stats,
+        }
+
+
+class RateSlot:
+    """One call's slot of a RateController, released exactly once"""
+
+    def __init__(self, controller: RateController | None):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+        self.detached = False
+
+    def detach(self) -> "RateSlot":
+        """Keep the slot past the end of RateController.slot()"""
+        self.detached = True
+        return self
+
+    def release(self, exc: BaseException | None = None, done: bool = True) -> None:
+        """Free the slot; ``done`` False frees it without judging the call"""
+        if self._released:
+            return
+        self._released = True
+        if self._controller is not None:
+            self._controller._finish(self._started, exc, done)
+
+
+class SlotStream:
+    """Streamed response that holds its RateSlot until the stream ends
+
+    The slot is released when the stream is exhausted, fails or is closed,
+    and also when the stream is dropped without ever being iterated (e.g.
+    the client disconnected before the response body started).
+    """
+
+    def __init__(self, chunks: AsyncIterator[str], slot: RateSlot):
+        self._chunks = chunks
+        self._slot = slot
+
+    def __aiter__(self) -> "SlotStream":
+        return self
+
+    async def __anext__(self) -> str:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._slot.release()
+            raise
+        except BaseException as e:
+            self._slot.release(e)
+            raise
+
+    async def aclose(self) -> None:
+        self._slot.release(done=False)
+        await self._chunks.aclose()
+
+    def __del__(self):
+        self._slot.release(done=False)
+
+
+class RateControllerRegistry:
+    """Process-wide RateController per (binding, base_url, model)"""
+
+    def __init__(self):
+        self._controllers: dict[Hashable, RateController] = {}
+
+    def get(
+        self,
+        binding: str,
+        model: str,
+        base_url: str | None = None,
+        max_limit: int | None = None,
+    ) -> RateController:
+        """Return the controller of a model, creating it on first use
+
+        ``max_limit`` is the caller's concurrency limit (LightRAG's
+        llm_model_max_async); LLM_ADAPTIVE_MAX_ASYNC overrides it, MAX_ASYNC
+        stands in when neither is given. Callers sharing a controller get the
+        largest of their limits.
+        """
+        if os.getenv("LLM_ADAPTIVE_MAX_ASYNC"):
+            max_limit = int(os.environ["LLM_ADAPTIVE_MAX_ASYNC"])
+        elif not max_limit:
+            max_limit = int(os.getenv("MAX_ASYNC", "4"))
+        key = (binding, base_url, model)
+        controller = self._controllers.get(key)
+        if controller is not None:
+            controller.raise_max_limit(max_limit)
+        else:
+            controller = RateController(
+                name=f"{binding}:{model}",
+                max_limit=max_limit,
+                initial_limit=int(os.getenv("LLM_ADAPTIVE_INITIAL_ASYNC", "0")),
+                tokens_per_minute=int(os.getenv("LLM_TPM_LIMIT", "0")),
+                latency_target=float(os.getenv("LLM_LATENCY_TARGET", "0")),
+                enabled=os.getenv("LLM_ADAPTIVE_CONCURRENCY", "true").lower()
+                in ("true", "1", "yes"),
+            )
+            self._controllers[key] = controller
+        return controller
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            controller.name: controller.get_metrics()
+            for controller in self._controllers.values()
+        }
+
+
+rate_controllers = RateControllerRegistry()
@@ -4,11 +4,10 @@ if sys.version_info < (3, 9):
     pass
 else:
     pass
-import pipmaster as pm  # Pipmaster for dynamic library install
+from lightrag.utils import ensure_package  # Installs missing optional dependencies
 
 # install specific modules
-if not pm.is_installed("lmdeploy"):
-    pm.install("lmdeploy")
+ensure_package("lmdeploy")
 
 from openai import (
     APIConnectionError,
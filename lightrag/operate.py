@@ -25,6 +25,12 @@ from .utils import (
     CacheData,
     statistic_data,
     get_conversation_turns,
+    get_single_flight,  # TNC
+    tee_stream_to_cache,  # TNC
+    replay_cached_stream,  # TNC
+    cache_flight_key,  # TNC
+    llm_priority,  # TNC
+    llm_prompt_tokens,  # TNC
 )
 from .base import (
     BaseGraphStorage,
@@ -34,13 +40,10 @@ from .base import (
     QueryParam,
 )
 from .prompt import GRAPH_FIELD_SEP, PROMPTS
+from .kg.data_version_tnc import current_data_version  # TNC
+from .kg.cache_policy_tnc import get_cache_janitor  # TNC
 import time
-from dotenv import load_dotenv
-
-# use the .env that is inside the current folder
-# allows to use different .env file for each lightrag instance
-# the OS environment variables take precedence over the .env file
-load_dotenv(dotenv_path=".env", override=False)
+# TNC: .env is loaded once, on import of lightrag.utils above
 
 
 def chunking_by_token_size(
@@ -101,39 +104,131 @@ def chunking_by_token_size(
     return results
 
 
+def _append_descriptions(  # TNC
+    existing_description: str | None, descriptions: list[str]
+) -> str:
+    """Existing description followed by the new descriptions it does not contain
+
+    The existing (usually already summarized) description stays first and
+    unchanged, so _handle_entity_relation_summary can tell it from new material.
+    """
+    known = (
+        set(split_string_by_multi_markers(existing_description, [GRAPH_FIELD_SEP]))
+        if existing_description
+        else set()
+    )
+    new_descriptions = sorted({d for d in descriptions if d and d not in known})
+    if existing_description:
+        new_descriptions.insert(0, existing_description)
+    return GRAPH_FIELD_SEP.join(new_descriptions)
+
+
+async def _summarize_descriptions(  # TNC
+    entity_or_relation_name: str,
+    descriptions: list[str],
+    global_config: dict,
+    total_tokens: int | None = None,
+) -> str:
+    """Summarize a description list, map-reduce if it exceeds one LLM call"""
+    use_llm_func: callable = global_config["llm_model_func"]
+    tiktoken_model_name = global_config["tiktoken_model_name"]
+    summary_max_tokens = global_config["entity_summary_to_max_tokens"]
+    # Room for the answer; at least two partial summaries per group so that
+    # every reduce round shrinks the list
+    group_max_tokens = max(
+        2 * summary_max_tokens,
+        global_config["llm_model_max_token_size"] - summary_max_tokens,
+    )
+    language = global_config["addon_params"].get(
+        "language", PROMPTS["DEFAULT_LANGUAGE"]
+    )
+
+    groups: list[list[str]] = [[]]
+    group_tokens = 0
+    if total_tokens is not None and total_tokens <= group_max_tokens:
+        groups, descriptions = [descriptions], []
+    for description in descriptions:
+        tokens = encode_string_by_tiktoken(description, model_name=tiktoken_model_name)
+        if len(tokens) > group_max_tokens:
+            tokens = tokens[:group_max_tokens]
+            description = decode_tokens_by_tiktoken(
+                tokens, model_name=tiktoken_model_name
+            )
+        if groups[-1] and group_tokens + len(tokens) > group_max_tokens:
+            groups.append([])
+            group_tokens = 0
+        groups[-1].append(description)
+        group_tokens += len(tokens)
+
+    async def summarize(description_list: list[str]) -> str:
+        use_prompt = PROMPTS["summarize_entity_descriptions"].format(
+            entity_name=entity_or_relation_name,
+            description_list=description_list,
+            language=language,
+        )
+        with llm_priority("summary"):
+            return await use_llm_func(use_prompt, max_tokens=summary_max_tokens)
+
+    if len(groups) == 1:
+        return await summarize(groups[0])
+    logger.debug(
+        f"Map-reduce summary of {entity_or_relation_name}: {len(groups)} groups"
+    )
+    partial_summaries = await asyncio.gather(*[summarize(g) for g in groups])
+    return await _summarize_descriptions(
+        entity_or_relation_name, list(partial_summaries), global_config
+    )
+
+
 async def _handle_entity_relation_summary(
     entity_or_relation_name: str,
     description: str,
     global_config: dict,
+    existing_description: str | None = None,
 ) -> str:
     """Handle entity relation summary
     For each entity or relation, input is the combined description of already existing description and new description.
     If too long, use LLM to summarize.
+
+    TNC: ``description`` starts with ``existing_description`` (the stored text)
+    followed by the new descriptions. The first segment of the stored text is
+    its summary (summaries never contain GRAPH_FIELD_SEP); everything after it
+    was appended unsummarized. Once the whole text reaches the summary size,
+    the summary is only redone when the appended descriptions add up to
+    entity_summary_min_new_tokens, from the existing summary plus them. Lists
+    longer than llm_model_max_token_size are summarized map-reduce instead of
+    truncated.
     """
-    use_llm_func: callable = global_config["llm_model_func"]
-    llm_max_tokens = global_config["llm_model_max_token_size"]
     tiktoken_model_name = global_config["tiktoken_model_name"]
     summary_max_tokens = global_config["entity_summary_to_max_tokens"]
-    language = global_config["addon_params"].get(
-        "language", PROMPTS["DEFAULT_LANGUAGE"]
-    )
 
+    if existing_description and description == existing_description:
+        return description  # Nothing new
     tokens = encode_string_by_tiktoken(description, model_name=tiktoken_model_name)
     if len(tokens) < summary_max_tokens:  # No need for summary
         return description
-    prompt_template = PROMPTS["summarize_entity_descriptions"]
-    use_description = decode_tokens_by_tiktoken(
-        tokens[:llm_max_tokens], model_name=tiktoken_model_name
-    )
-    context_base = dict(
-        entity_name=entity_or_relation_name,
-        description_list=use_description.split(GRAPH_FIELD_SEP),
-        language=language,
-    )
-    use_prompt = prompt_template.format(**context_base)
+    if existing_description:
+        # Only the descriptions appended after the summary count against the
+        # allowance; a never summarized list's first description stands in
+        summary = existing_description.split(GRAPH_FIELD_SEP, 1)[0]
+        appended = encode_string_by_tiktoken(
+            description[len(summary) :], model_name=tiktoken_model_name
+        )
+        allowance = (
+            global_config.get("entity_summary_min_new_tokens")
+            or summary_max_tokens // 2
+        )
+        if len(appended) < allowance:  # Not enough new material yet
+            return description
     logger.debug(f"Trigger summary: {entity_or_relation_name}")
-    summary = await use_llm_func(use_prompt, max_tokens=summary_max_tokens)
-    return summary
+    summary = await _summarize_descriptions(
+        entity_or_relation_name,
+        description.split(GRAPH_FIELD_SEP),
+        global_config,
+        len(tokens),
+    )
+    # Keep the summary a single segment, so later merges can tell it apart
+    return summary.replace(GRAPH_FIELD_SEP, " ")
 
 
 async def _handle_single_entity_extraction(
@@ -236,8 +331,9 @@ async def _merge_nodes_then_upsert(
         key=lambda x: x[1],
         reverse=True,
     )[0][0]
-    description = GRAPH_FIELD_SEP.join(
-        sorted(set([dp["description"] for dp in nodes_data] + already_description))
+    description = _append_descriptions(  # TNC
+        already_description[0] if already_description else None,
+        [dp["description"] for dp in nodes_data],
     )
     source_id = GRAPH_FIELD_SEP.join(
         set([dp["source_id"] for dp in nodes_data] + already_source_ids)
@@ -248,7 +344,10 @@ async def _merge_nodes_then_upsert(
 
     logger.debug(f"file_path: {file_path}")
     description = await _handle_entity_relation_summary(
-        entity_name, description, global_config
+        entity_name,
+        description,
+        global_config,
+        already_description[0] if already_description else None,  # TNC
     )
     node_data = dict(
         entity_id=entity_name,
@@ -315,13 +414,9 @@ async def _merge_edges_then_upsert(
 
     # Process edges_data with None checks
     weight = sum([dp["weight"] for dp in edges_data] + already_weights)
-    description = GRAPH_FIELD_SEP.join(
-        sorted(
-            set(
-                [dp["description"] for dp in edges_data if dp.get("description")]
-                + already_description
-            )
-        )
+    description = _append_descriptions(  # TNC
+        already_description[0] if already_description else None,
+        [dp["description"] for dp in edges_data if dp.get("description")],
     )
     keywords = GRAPH_FIELD_SEP.join(
         sorted(
@@ -357,7 +452,10 @@ async def _merge_edges_then_upsert(
                 },
             )
     description = await _handle_entity_relation_summary(
-        f"({src_id}, {tgt_id})", description, global_config
+        f"({src_id}, {tgt_id})",
+        description,
+        global_config,
+        already_description[0] if already_description else None,  # TNC
     )
     await knowledge_graph_inst.upsert_edge(
         src_id,
@@ -462,41 +560,57 @@ async def extract_entities(
             # logger.debug(f"Prompt: {_prompt}")        
             # TODO： add cache_type="extract"
             arg_hash = compute_args_hash(_prompt)
-            cached_return, _1, _2, _3 = await handle_cache(
-                llm_response_cache,
-                arg_hash,
+            # TNC: identical prompts in flight (duplicate chunks) share one LLM call
+            return await get_single_flight().do(
+                cache_flight_key(llm_response_cache, "default", arg_hash),
+                _cached_llm_call,
+                input_text,
+                history_messages,
                 _prompt,
-                "default",
-                cache_type="extract",
-            )
-            if cached_return:
-                logger.debug(f"Found cache for {arg_hash}")
-                statistic_data["llm_cache"] += 1
-                return cached_return
-            statistic_data["llm_call"] += 1
-            logger.debug(f"Calling LLM with input (truncated): {input_text[:5]}")
-            if history_messages:
-                res: str = await use_llm_func(
-                    input_text, history_messages=history_messages
-                )
-            else:
-                res: str = await use_llm_func(input_text)
-            await save_to_cache(
-                llm_response_cache,
-                CacheData(
-                    args_hash=arg_hash,
-                    content=res,
-                    prompt=_prompt,
-                    cache_type="extract",
-                ),
+                arg_hash,
             )
-            return res
 
         if history_messages:
             return await use_llm_func(input_text, history_messages=history_messages)
         else:
             return await use_llm_func(input_text)
 
+    async def _cached_llm_call(
+        input_text: str,
+        history_messages: list[dict[str, str]] | None,
+        _prompt: str,
+        arg_hash: str,
+    ) -> str:
+        cached_return, _1, _2, _3 = await handle_cache(
+            llm_response_cache,
+            arg_hash,
+            _prompt,
+            "default",
+            cache_type="extract",
+        )
+        if cached_return:
+            logger.debug(f"Found cache for {arg_hash}")
+            statistic_data["llm_cache"] += 1
+            return cached_return
+        statistic_data["llm_call"] += 1
+        logger.debug(f"Calling LLM with input (truncated): {input_text[:5]}")
+        if history_messages:
+            res: str = await use_llm_func(
+                input_text, history_messages=history_messages
+            )
+        else:
+            res: str = await use_llm_func(input_text)
+        await save_to_cache(
+            llm_response_cache,
+            CacheData(
+                args_hash=arg_hash,
+                content=res,
+                prompt=_prompt,
+                cache_type="extract",
+            ),
+        )
+        return res
+
     async def _process_extraction_result(
         result: str, chunk_key: str, file_path: str = "unknown_source"
     ):
@@ -679,6 +793,20 @@ async def extract_entities(
             pipeline_status["history_messages"].append(log_message)
 
 
+def _query_flight_key(
+    hashing_kv: BaseKVStorage | None,
+    mode: str,
+    query: str,
+    query_param: QueryParam,
+    system_prompt: str | None,
+) -> str:
+    """Single-flight key of a query: its cache hash plus every parameter that shapes the answer"""
+    args_hash = compute_args_hash(mode, query, cache_type="query")
+    return cache_flight_key(
+        hashing_kv, mode, compute_args_hash(args_hash, repr(query_param), system_prompt)
+    )
+
+
 async def kg_query(
     query: str,
     knowledge_graph_inst: BaseGraphStorage,
@@ -689,6 +817,31 @@ async def kg_query(
     global_config: dict[str, str],
     hashing_kv: BaseKVStorage | None = None,
     system_prompt: str | None = None,
+) -> str | AsyncIterator[str]:
+    # TNC: identical concurrent queries await one cache lookup and computation
+    if query_param.stream:
+        return await _kg_query(
+            query, knowledge_graph_inst, entities_vdb, relationships_vdb,
+            text_chunks_db, query_param, global_config, hashing_kv, system_prompt,
+        )
+    return await get_single_flight().do(
+        _query_flight_key(hashing_kv, query_param.mode, query, query_param, system_prompt),
+        _kg_query,
+        query, knowledge_graph_inst, entities_vdb, relationships_vdb,
+        text_chunks_db, query_param, global_config, hashing_kv, system_prompt,
+    )
+
+
+async def _kg_query(
+    query: str,
+    knowledge_graph_inst: BaseGraphStorage,
+    entities_vdb: BaseVectorStorage,
+    relationships_vdb: BaseVectorStorage,
+    text_chunks_db: BaseKVStorage,
+    query_param: QueryParam,
+    global_config: dict[str, str],
+    hashing_kv: BaseKVStorage | None = None,
+    system_prompt: str | None = None,
 ) -> str | AsyncIterator[str]:
     # Handle cache
     use_model_func = (
@@ -696,15 +849,26 @@ async def kg_query(
         if query_param.model_func
         else global_config["llm_model_func"]
     )
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    # TNC: answers are cached per data version, so changes to the data invalidate them
+    data_version = await current_data_version(hashing_kv)
+    args_hash = compute_args_hash(
+        query_param.mode, f"[v{data_version}]", query, cache_type="query"
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
-        hashing_kv, args_hash, query, query_param.mode, cache_type="query"
+        hashing_kv,
+        args_hash,
+        query,
+        query_param.mode,
+        cache_type="query",
+        data_version=data_version,
     )
     if cached_response is not None:
+        if query_param.stream:  # TNC
+            return replay_cached_stream(cached_response)
         return cached_response
 
     hl_keywords, ll_keywords = await get_keywords_from_query(
-        query, query_param, global_config, hashing_kv
+        query, query_param, global_config, hashing_kv, knowledge_graph_inst
     )
 
     logger.debug(f"High-level keywords: {hl_keywords}")
@@ -739,6 +903,7 @@ async def kg_query(
         relationships_vdb,
         text_chunks_db,
         query_param,
+        hashing_kv,  # TNC
     )
 
     if query_param.only_need_context:
@@ -766,11 +931,12 @@ async def kg_query(
     len_of_prompts = len(encode_string_by_tiktoken(query + sys_prompt))
     logger.debug(f"[kg_query]Prompt Tokens: {len_of_prompts}")
 
-    response = await use_model_func(
-        query,
-        system_prompt=sys_prompt,
-        stream=query_param.stream,
-    )
+    with llm_prompt_tokens(len_of_prompts):  # TNC
+        response = await use_model_func(
+            query,
+            system_prompt=sys_prompt,
+            stream=query_param.stream,
+        )
     if isinstance(response, str) and len(response) > len(sys_prompt):
         response = (
             response.replace(sys_prompt, "")
@@ -783,19 +949,21 @@ async def kg_query(
         )
 
     # Save to cache
-    await save_to_cache(
-        hashing_kv,
-        CacheData(
-            args_hash=args_hash,
-            content=response,
-            prompt=query,
-            quantized=quantized,
-            min_val=min_val,
-            max_val=max_val,
-            mode=query_param.mode,
-            cache_type="query",
-        ),
-    )
+    cache_data = CacheData(
+        args_hash=args_hash,
+        content=response,
+        prompt=query,
+        quantized=quantized,
+        min_val=min_val,
+        max_val=max_val,
+        mode=query_param.mode,
+        cache_type="query",
+        data_version=data_version,
+    )
+    if hasattr(response, "__aiter__"):
+        # TNC: cache the streamed text once the client has received all of it
+        return tee_stream_to_cache(hashing_kv, cache_data)
+    await save_to_cache(hashing_kv, cache_data)
     return response
 
 
@@ -804,6 +972,7 @@ async def get_keywords_from_query(
     query_param: QueryParam,
     global_config: dict[str, str],
     hashing_kv: BaseKVStorage | None = None,
+    knowledge_graph_inst: BaseGraphStorage | None = None,
 ) -> tuple[list[str], list[str]]:
     """
     Retrieves high-level and low-level keywords for RAG operations.
@@ -816,6 +985,8 @@ async def get_keywords_from_query(
         query_param: Query parameters that may contain pre-defined keywords
         global_config: Global configuration dictionary
         hashing_kv: Optional key-value storage for caching results
+        knowledge_graph_inst: Graph whose entity names and relation keywords
+            the query is matched against when query_param.fast_keywords is set
 
     Returns:
         A tuple containing (high_level_keywords, low_level_keywords)
@@ -824,6 +995,22 @@ async def get_keywords_from_query(
     if query_param.hl_keywords or query_param.ll_keywords:
         return query_param.hl_keywords, query_param.ll_keywords
 
+    # TNC: LLM-free keywords when the graph's phrases cover the query well enough
+    if query_param.fast_keywords and knowledge_graph_inst is not None:
+        entities, relations, coverage = await knowledge_graph_inst.match_keywords(
+            query
+        )
+        if coverage >= query_param.fast_keywords_min_coverage:
+            logger.info(
+                f"Fast keywords ({coverage:.0%} coverage): {len(entities)} entities, {len(relations)} relation keywords"
+            )
+            # Entity names drive the entity search, relation keywords the
+            # relation search; either stands in for the other when missing
+            return relations or entities, entities or relations
+        logger.debug(
+            f"Fast keywords cover {coverage:.0%} of the query, asking the LLM"
+        )
+
     # Extract keywords using extract_keywords_only function which already supports conversation history
     hl_keywords, ll_keywords = await extract_keywords_only(
         query, query_param, global_config, hashing_kv
@@ -890,7 +1077,8 @@ async def extract_keywords_only(
     use_model_func = (
         param.model_func if param.model_func else global_config["llm_model_func"]
     )
-    result = await use_model_func(kw_prompt, keyword_extraction=True)
+    with llm_prompt_tokens(len_of_prompts):  # TNC
+        result = await use_model_func(kw_prompt, keyword_extraction=True)
 
     # 6. Parse out JSON from the LLM response
     match = re.search(r"\{.*\}", result, re.DOTALL)
@@ -948,17 +1136,54 @@ async def mix_kg_vector_query(
     2. Retrieving relevant text chunks through vector similarity
     3. Combining both results for comprehensive answer generation
     """
+    # TNC: identical concurrent queries await one cache lookup and computation
+    if query_param.stream:
+        return await _mix_kg_vector_query(
+            query, knowledge_graph_inst, entities_vdb, relationships_vdb, chunks_vdb,
+            text_chunks_db, query_param, global_config, hashing_kv, system_prompt,
+        )
+    return await get_single_flight().do(
+        _query_flight_key(hashing_kv, "mix", query, query_param, system_prompt),
+        _mix_kg_vector_query,
+        query, knowledge_graph_inst, entities_vdb, relationships_vdb, chunks_vdb,
+        text_chunks_db, query_param, global_config, hashing_kv, system_prompt,
+    )
+
+
+async def _mix_kg_vector_query(
+    query: str,
+    knowledge_graph_inst: BaseGraphStorage,
+    entities_vdb: BaseVectorStorage,
+    relationships_vdb: BaseVectorStorage,
+    chunks_vdb: BaseVectorStorage,
+    text_chunks_db: BaseKVStorage,
+    query_param: QueryParam,
+    global_config: dict[str, str],
+    hashing_kv: BaseKVStorage | None = None,
+    system_prompt: str | None = None,
+) -> str | AsyncIterator[str]:
     # 1. Cache handling
     use_model_func = (
         query_param.model_func
         if query_param.model_func
         else global_config["llm_model_func"]
     )
-    args_hash = compute_args_hash("mix", query, cache_type="query")
+    # TNC: answers are cached per data version, so changes to the data invalidate them
+    data_version = await current_data_version(hashing_kv)
+    args_hash = compute_args_hash(
+        "mix", f"[v{data_version}]", query, cache_type="query"
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
-        hashing_kv, args_hash, query, "mix", cache_type="query"
+        hashing_kv,
+        args_hash,
+        query,
+        "mix",
+        cache_type="query",
+        data_version=data_version,
     )
     if cached_response is not None:
+        if query_param.stream:  # TNC
+            return replay_cached_stream(cached_response)
         return cached_response
 
     # Process conversation history
@@ -972,7 +1197,7 @@ async def mix_kg_vector_query(
     async def get_kg_context():
         try:
             hl_keywords, ll_keywords = await get_keywords_from_query(
-                query, query_param, global_config, hashing_kv
+                query, query_param, global_config, hashing_kv, knowledge_graph_inst
             )
 
             if not hl_keywords and not ll_keywords:
@@ -1002,6 +1227,7 @@ async def mix_kg_vector_query(
                 relationships_vdb,
                 text_chunks_db,
                 query_param,
+                hashing_kv,  # TNC
             )
 
             return context
@@ -1101,11 +1327,12 @@ async def mix_kg_vector_query(
     logger.debug(f"[mix_kg_vector_query]Prompt Tokens: {len_of_prompts}")
 
     # 6. Generate response
-    response = await use_model_func(
-        query,
-        system_prompt=sys_prompt,
-        stream=query_param.stream,
-    )
+    with llm_prompt_tokens(len_of_prompts):  # TNC
+        response = await use_model_func(
+            query,
+            system_prompt=sys_prompt,
+            stream=query_param.stream,
+        )
 
     # Clean up response content
     if isinstance(response, str) and len(response) > len(sys_prompt):
@@ -1131,6 +1358,23 @@ async def mix_kg_vector_query(
                 max_val=max_val,
                 mode="mix",
                 cache_type="query",
+                data_version=data_version,
+            ),
+        )
+    elif hasattr(response, "__aiter__"):
+        # TNC: cache the streamed text once the client has received all of it
+        response = tee_stream_to_cache(
+            hashing_kv,
+            CacheData(
+                args_hash=args_hash,
+                content=response,
+                prompt=query,
+                quantized=quantized,
+                min_val=min_val,
+                max_val=max_val,
+                mode="mix",
+                cache_type="query",
+                data_version=data_version,
             ),
         )
 
@@ -1145,6 +1389,77 @@ async def _build_query_context(
     relationships_vdb: BaseVectorStorage,
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
+    hashing_kv: BaseKVStorage | None = None,
+):
+    # TNC: contexts are cached (cache_type "context") by keywords, retrieval
+    # settings and data version, so prompt variants of a query reuse retrieval
+    if hashing_kv is None or not hashing_kv.global_config.get("enable_llm_cache"):
+        return await _retrieve_query_context(
+            ll_keywords,
+            hl_keywords,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+        )
+
+    data_version = await current_data_version(hashing_kv)
+    context_hash = compute_args_hash(
+        json.dumps(
+            [
+                query_param.mode,
+                data_version,
+                ll_keywords,
+                hl_keywords,
+                query_param.top_k,
+                query_param.max_token_for_text_unit,
+                query_param.max_token_for_global_context,
+                query_param.max_token_for_local_context,
+                query_param.ids,
+            ],
+            ensure_ascii=False,
+        ),
+        cache_type="context",
+    )
+    entry = await hashing_kv.get_cache_entry(query_param.mode, context_hash)
+    if entry is not None:
+        logger.debug(f"Query context cache hit(mode:{query_param.mode})")
+        get_cache_janitor(hashing_kv).record_hit(query_param.mode, context_hash)
+        return entry["return"]
+
+    context = await _retrieve_query_context(
+        ll_keywords,
+        hl_keywords,
+        knowledge_graph_inst,
+        entities_vdb,
+        relationships_vdb,
+        text_chunks_db,
+        query_param,
+    )
+    if context is not None:
+        await save_to_cache(
+            hashing_kv,
+            CacheData(
+                args_hash=context_hash,
+                content=context,
+                prompt=f"{ll_keywords} | {hl_keywords}",
+                mode=query_param.mode,
+                cache_type="context",
+                data_version=data_version,
+            ),
+        )
+    return context
+
+
+async def _retrieve_query_context(
+    ll_keywords: str,
+    hl_keywords: str,
+    knowledge_graph_inst: BaseGraphStorage,
+    entities_vdb: BaseVectorStorage,
+    relationships_vdb: BaseVectorStorage,
+    text_chunks_db: BaseKVStorage,
+    query_param: QueryParam,
 ):
     logger.info(f"Process {os.getpid()} buidling query context...")
     if query_param.mode == "local":
@@ -1238,21 +1553,20 @@ async def _get_node_data(
     if not len(results):
         return "", "", ""
     # get entity information
+    # TNC: ranks come from the graph's cached degree table, not per-node queries
     node_datas, node_degrees = await asyncio.gather(
         asyncio.gather(
             *[knowledge_graph_inst.get_node(r["entity_name"]) for r in results]
         ),
-        asyncio.gather(
-            *[knowledge_graph_inst.node_degree(r["entity_name"]) for r in results]
-        ),
+        knowledge_graph_inst.cached_node_degrees([r["entity_name"] for r in results]),
     )
 
     if not all([n is not None for n in node_datas]):
         logger.warning("Some nodes are missing, maybe the storage is damaged")
 
     node_datas = [
-        {**n, "entity_name": k["entity_name"], "rank": d}
-        for k, n, d in zip(results, node_datas, node_degrees)
+        {**n, "entity_name": k["entity_name"], "rank": node_degrees[k["entity_name"]]}
+        for k, n in zip(results, node_datas)
         if n is not None
     ]  # what is this text_chunks_db doing.  dont remember it in airvx.  check the diagram.
     # get entitytext chunk
@@ -1464,19 +1778,19 @@ async def _find_most_related_edges_from_entities(
                 seen.add(sorted_edge)
                 all_edges.append(sorted_edge)
 
-    all_edges_pack, all_edges_degree = await asyncio.gather(
+    all_edges_pack, all_edges_rank = await asyncio.gather(
         asyncio.gather(*[knowledge_graph_inst.get_edge(e[0], e[1]) for e in all_edges]),
-        asyncio.gather(
-            *[knowledge_graph_inst.edge_degree(e[0], e[1]) for e in all_edges]
-        ),
+        _get_edge_ranks(knowledge_graph_inst, all_edges),
     )
     all_edges_data = [
-        {"src_tgt": k, "rank": d, **v}
-        for k, v, d in zip(all_edges, all_edges_pack, all_edges_degree)
+        {"src_tgt": k, "rank": d, "centrality": c, **v}
+        for k, v, (d, c) in zip(all_edges, all_edges_pack, all_edges_rank)
         if v is not None
     ]
     all_edges_data = sorted(
-        all_edges_data, key=lambda x: (x["rank"], x["weight"]), reverse=True
+        all_edges_data,
+        key=lambda x: (x["centrality"], x["rank"], x["weight"]),
+        reverse=True,
     )
     all_edges_data = truncate_list_by_token_size(
         all_edges_data,
@@ -1491,6 +1805,29 @@ async def _find_most_related_edges_from_entities(
     return all_edges_data
 
 
+# TNC
+async def _get_edge_ranks(
+    knowledge_graph_inst: BaseGraphStorage, edges: list[tuple[str, str]]
+) -> list[tuple[int, float]]:
+    """Edge degree and PageRank sum of each edge from the graph's cached tables
+
+    The degree is the `rank` column of the context; the PageRank sum (0 unless
+    GRAPH_PAGERANK_INTERVAL is set) orders relations ahead of it.
+    """
+    node_ids = list({node_id for edge in edges for node_id in edge})
+    degrees, centrality = await asyncio.gather(
+        knowledge_graph_inst.cached_node_degrees(node_ids),
+        knowledge_graph_inst.node_centrality(node_ids),
+    )
+    return [
+        (
+            degrees[src] + degrees[tgt],
+            centrality.get(src, 0.0) + centrality.get(tgt, 0.0),
+        )
+        for src, tgt in edges
+    ]
+
+
 async def _get_edge_data(
     keywords,
     knowledge_graph_inst: BaseGraphStorage,
@@ -1509,15 +1846,12 @@ async def _get_edge_data(
     if not len(results):
         return "", "", ""
 
-    edge_datas, edge_degree = await asyncio.gather(
+    edge_datas, edge_ranks = await asyncio.gather(
         asyncio.gather(
             *[knowledge_graph_inst.get_edge(r["src_id"], r["tgt_id"]) for r in results]
         ),
-        asyncio.gather(
-            *[
-                knowledge_graph_inst.edge_degree(r["src_id"], r["tgt_id"])
-                for r in results
-            ]
+        _get_edge_ranks(
+            knowledge_graph_inst, [(r["src_id"], r["tgt_id"]) for r in results]
         ),
     )
 
@@ -1526,14 +1860,17 @@ async def _get_edge_data(
             "src_id": k["src_id"],
             "tgt_id": k["tgt_id"],
             "rank": d,
+            "centrality": c,
             "created_at": k.get("__created_at__", None),
             **v,
         }
-        for k, v, d in zip(results, edge_datas, edge_degree)
+        for k, v, (d, c) in zip(results, edge_datas, edge_ranks)
         if v is not None
     ]
     edge_datas = sorted(
-        edge_datas, key=lambda x: (x["rank"], x["weight"]), reverse=True
+        edge_datas,
+        key=lambda x: (x["centrality"], x["rank"], x["weight"]),
+        reverse=True,
     )
     edge_datas = truncate_list_by_token_size(
         edge_datas,
@@ -1644,16 +1981,11 @@ async def _find_most_related_entities_from_relationships(
                 for entity_name in entity_names
             ]
         ),
-        asyncio.gather(
-            *[
-                knowledge_graph_inst.node_degree(entity_name)
-                for entity_name in entity_names
-            ]
-        ),
+        knowledge_graph_inst.cached_node_degrees(entity_names),  # TNC
     )
     node_datas = [
-        {**n, "entity_name": k, "rank": d}
-        for k, n, d in zip(entity_names, node_datas, node_degrees)
+        {**n, "entity_name": k, "rank": node_degrees[k]}
+        for k, n in zip(entity_names, node_datas)
     ]
 
     len_node_datas = len(node_datas)
@@ -1763,11 +2095,22 @@ async def naive_query(
         if query_param.model_func
         else global_config["llm_model_func"]
     )
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    # TNC: answers are cached per data version, so changes to the data invalidate them
+    data_version = await current_data_version(hashing_kv)
+    args_hash = compute_args_hash(
+        query_param.mode, f"[v{data_version}]", query, cache_type="query"
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
-        hashing_kv, args_hash, query, query_param.mode, cache_type="query"
+        hashing_kv,
+        args_hash,
+        query,
+        query_param.mode,
+        cache_type="query",
+        data_version=data_version,
     )
     if cached_response is not None:
+        if query_param.stream:  # TNC
+            return replay_cached_stream(cached_response)
         return cached_response
 
     results = await chunks_vdb.query(
@@ -1832,10 +2175,11 @@ async def naive_query(
     len_of_prompts = len(encode_string_by_tiktoken(query + sys_prompt))
     logger.debug(f"[naive_query]Prompt Tokens: {len_of_prompts}")
 
-    response = await use_model_func(
-        query,
-        system_prompt=sys_prompt,
-    )
+    with llm_prompt_tokens(len_of_prompts):  # TNC
+        response = await use_model_func(
+            query,
+            system_prompt=sys_prompt,
+        )
 
     if len(response) > len(sys_prompt):
         response = (
@@ -1850,19 +2194,21 @@ async def naive_query(
         )
 
     # Save to cache
-    await save_to_cache(
-        hashing_kv,
-        CacheData(
-            args_hash=args_hash,
-            content=response,
-            prompt=query,
-            quantized=quantized,
-            min_val=min_val,
-            max_val=max_val,
-            mode=query_param.mode,
-            cache_type="query",
-        ),
-    )
+    cache_data = CacheData(
+        args_hash=args_hash,
+        content=response,
+        prompt=query,
+        quantized=quantized,
+        min_val=min_val,
+        max_val=max_val,
+        mode=query_param.mode,
+        cache_type="query",
+        data_version=data_version,
+    )
+    if hasattr(response, "__aiter__"):
+        # TNC: cache the streamed text once the client has received all of it
+        return tee_stream_to_cache(hashing_kv, cache_data)
+    await save_to_cache(hashing_kv, cache_data)
 
     return response
 
@@ -1891,11 +2237,22 @@ async def kg_query_with_keywords(
         if query_param.model_func
         else global_config["llm_model_func"]
     )
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    # TNC: answers are cached per data version, so changes to the data invalidate them
+    data_version = await current_data_version(hashing_kv)
+    args_hash = compute_args_hash(
+        query_param.mode, f"[v{data_version}]", query, cache_type="query"
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
-        hashing_kv, args_hash, query, query_param.mode, cache_type="query"
+        hashing_kv,
+        args_hash,
+        query,
+        query_param.mode,
+        cache_type="query",
+        data_version=data_version,
     )
     if cached_response is not None:
+        if query_param.stream:  # TNC
+            return replay_cached_stream(cached_response)
         return cached_response
 
     # ---------------------------
@@ -1946,6 +2303,7 @@ async def kg_query_with_keywords(
         relationships_vdb,
         text_chunks_db,
         query_param,
+        hashing_kv,  # TNC
     )
     if not context:
         return PROMPTS["fail_response"]
@@ -1979,11 +2337,12 @@ async def kg_query_with_keywords(
     logger.debug(f"[kg_query_with_keywords]Prompt Tokens: {len_of_prompts}")
 
     # 6. Generate response
-    response = await use_model_func(
-        query,
-        system_prompt=sys_prompt,
-        stream=query_param.stream,
-    )
+    with llm_prompt_tokens(len_of_prompts):  # TNC
+        response = await use_model_func(
+            query,
+            system_prompt=sys_prompt,
+            stream=query_param.stream,
+        )
 
     # Clean up response content
     if isinstance(response, str) and len(response) > len(sys_prompt):
@@ -2009,6 +2368,23 @@ async def kg_query_with_keywords(
                 max_val=max_val,
                 mode=query_param.mode,
                 cache_type="query",
+                data_version=data_version,
+            ),
+        )
+    elif hasattr(response, "__aiter__"):
+        # TNC: cache the streamed text once the client has received all of it
+        response = tee_stream_to_cache(
+            hashing_kv,
+            CacheData(
+                args_hash=args_hash,
+                content=response,
+                prompt=query,
+                quantized=quantized,
+                min_val=min_val,
+                max_val=max_val,
+                mode=query_param.mode,
+                cache_type="query",
+                data_version=data_version,
             ),
         )
 
@@ -2055,6 +2431,7 @@ async def query_with_keywords(
         query_param=param,
         global_config=global_config,
         hashing_kv=hashing_kv,
+        knowledge_graph_inst=knowledge_graph_inst,
     )
 
     # Create a new string with the prompt and the keywords
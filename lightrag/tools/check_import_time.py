@@ -0,0 +1,116 @@
+"""
+ * ┌─────────────────────────────────────────────┐
+ * │ TechNexusClarity Custom Module              │
+ * │ Not part of upstream open source repo       │
+ * └─────────────────────────────────────────────┘
+ *
+ * Description: Import-time budget check for lightrag and the API server.
+ * Owner: TechNexusClarity
+
+Imports each module in a fresh interpreter with ``python -X importtime`` and
+fails when its cumulative import time exceeds the budget, or when a module
+that should only load on first use (pandas, pipmaster, storage backends, LLM
+SDKs) was imported. The best of ``--runs`` runs is used to damp noise.
+
+    python -m lightrag.tools.check_import_time
+    python -m lightrag.tools.check_import_time --module lightrag.api.lightrag_server --budget-ms 4000
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+DEFAULT_FORBIDDEN = (
+    "pandas",
+    "pipmaster",
+    "torch",
+    "transformers",
+    "openai",
+    "ollama",
+    "asyncpg",
+    "neo4j",
+    "pymongo",
+    "redis",
+    "lightrag.kg.postgres_impl",
+    "lightrag.kg.mongo_impl",
+    "lightrag.kg.redis_impl",
+    "lightrag.kg.neo4j_impl",
+    "lightrag.kg.milvus_impl",
+    "lightrag.kg.qdrant_impl",
+    "lightrag.kg.faiss_impl",
+    "lightrag.kg.chroma_impl",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> list[tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) of every import of one run"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return imports
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--module", default="lightrag")
+    parser.add_argument("--budget-ms", type=float, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--forbid",
+        nargs="*",
+        default=list(DEFAULT_FORBIDDEN),
+        help="Modules that must not be imported",
+    )
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(1, args.runs))]
+    totals = [
+        max((cum for name, _, cum, _ in imports if name == args.module), default=0)
+        for imports in runs
+    ]
+    best = min(range(len(runs)), key=lambda i: totals[i])
+    imports, total_ms = runs[best], totals[best] / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"Slowest direct imports of the best of {len(runs)} runs:")
+    # importtime prints a module's imports before the module itself
+    children, direct = [], []
+    for item in imports:
+        if item[3] == 1:
+            children.append(item)
+        elif item[3] == 0:
+            if item[0] == args.module:
+                direct = children
+            children = []
+    direct.sort(key=lambda item: item[2], reverse=True)
+    for name, _, cumulative_us, _ in direct[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {total_ms - args.budget_ms:.0f} ms")
+        failed = True
+    loaded = {name for name, *_ in imports}
+    eager = [name for name in args.forbid if name in loaded]
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import contextvars
 import html
 import io
 import csv
@@ -9,14 +11,19 @@ import logging
 import logging.handlers
 import os
 import re
-from dataclasses import dataclass
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, replace
 from functools import wraps
 from hashlib import md5
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
 import xml.etree.ElementTree as ET
 import numpy as np
 import tiktoken
 from lightrag.prompt import PROMPTS
+from lightrag.kg.cache_policy_tnc import get_cache_janitor
 from dotenv import load_dotenv
 
 # use the .env that is inside the current folder
@@ -285,6 +292,351 @@ def limit_async_func_call(max_size: int):
     return final_decro
 
 
+# LLM call classes, highest priority first
+LLM_PRIORITIES = ("interactive", "summary", "extraction")
+
+_llm_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "llm_priority", default="interactive"
+)
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Run the LLM calls made in this context (and tasks it spawns) in a priority class"""
+    if priority not in LLM_PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _llm_priority.set(priority)
+    try:
+        yield
+    finally:
+        _llm_priority.reset(token)
+
+
+def current_llm_priority() -> str:
+    return _llm_priority.get()
+
+
+_llm_prompt_tokens: contextvars.ContextVar[int | None] = contextvars.ContextVar(
+    "llm_prompt_tokens", default=None
+)
+
+
+@contextmanager
+def llm_prompt_tokens(count: int):
+    """Pass the prompt token count already computed by the caller to the LLM binding"""
+    token = _llm_prompt_tokens.set(count)
+    try:
+        yield
+    finally:
+        _llm_prompt_tokens.reset(token)
+
+
+def current_llm_prompt_tokens() -> int | None:
+    return _llm_prompt_tokens.get()
+
+
+class LLMScheduler:
+    """Concurrency limit for LLM calls with priority classes.
+
+    Replaces a plain semaphore: at most ``max_concurrent`` calls run at once.
+    When a slot frees up, waiting interactive calls go first, then summaries,
+    then extraction. ``reserved`` slots of a class are held back from the other
+    classes even while idle, so queries find a free slot during a bulk ingest
+    without waiting for extraction calls to finish. Within a class, waiting
+    calls are admitted round-robin across workspaces, so one workspace's upload
+    does not delay another's.
+    """
+
+    def __init__(self, max_concurrent: int, reserved: dict[str, int] | None = None):
+        self.max_concurrent = max(1, max_concurrent)
+        reserved = reserved or {}
+        self.reserved = {p: max(0, reserved.get(p, 0)) for p in LLM_PRIORITIES}
+        # A class can only start while the other classes' reservations leave
+        # a slot over, so each class needs one slot nobody else reserves
+        for priority in LLM_PRIORITIES:
+            others = sum(n for p, n in self.reserved.items() if p != priority)
+            if others >= self.max_concurrent:
+                raise ValueError(
+                    f"Reserved LLM slots {self.reserved} leave no slot for "
+                    f"{priority} calls with max_concurrent={self.max_concurrent}"
+                )
+        self._running = dict.fromkeys(LLM_PRIORITIES, 0)
+        # priority -> workspace -> (enqueued_at, waiter), workspaces in
+        # round-robin order
+        self._waiting: dict[str, dict[str, deque[tuple[float, asyncio.Future]]]] = {
+            p: {} for p in LLM_PRIORITIES
+        }
+        self._stats = {
+            p: {"admitted": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for p in LLM_PRIORITIES
+        }
+
+    def _can_start(self, priority: str) -> bool:
+        free = self.max_concurrent - sum(self._running.values())
+        held_back = sum(
+            max(0, self.reserved[p] - self._running[p])
+            for p in LLM_PRIORITIES
+            if p != priority
+        )
+        return free > held_back
+
+    def _queued(self, priority: str) -> int:
+        return sum(len(waiters) for waiters in self._waiting[priority].values())
+
+    def _admit(self, priority: str, waited: float) -> None:
+        self._running[priority] += 1
+        stats = self._stats[priority]
+        stats["admitted"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting calls, by priority then workspace round-robin"""
+        for priority in LLM_PRIORITIES:
+            queues = self._waiting[priority]
+            while queues and self._can_start(priority):
+                workspace = next(iter(queues))
+                waiters = queues.pop(workspace)
+                enqueued_at, waiter = waiters.popleft()
+                if waiters:
+                    queues[workspace] = waiters  # back of the rotation
+                if waiter.done():
+                    continue
+                self._admit(priority, time.monotonic() - enqueued_at)
+                waiter.set_result(None)
+
+    def _release(self, priority: str) -> None:
+        self._running[priority] -= 1
+        self._dispatch()
+
+    async def acquire(self, priority: str, workspace: str | None = None) -> None:
+        if not self._queued(priority) and self._can_start(priority):
+            self._admit(priority, 0.0)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (time.monotonic(), waiter)
+        self._waiting[priority].setdefault(workspace or "", deque()).append(entry)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted as the caller went away: pass it on
+                self._release(priority)
+            else:
+                queues = self._waiting[priority]
+                waiters = queues.get(workspace or "")
+                if waiters and entry in waiters:
+                    waiters.remove(entry)
+                    if not waiters:
+                        del queues[workspace or ""]
+            raise
+
+    @asynccontextmanager
+    async def slot(self, priority: str | None = None, workspace: str | None = None):
+        priority = priority or current_llm_priority()
+        await self.acquire(priority, workspace)
+        try:
+            yield
+        finally:
+            self._release(priority)
+
+    def wrap(self, func: Callable[..., Any], workspace: str | None = None):
+        """Limit ``func`` by this scheduler, in the caller's priority class"""
+
+        @wraps(func)
+        async def wait_func(*args, **kwargs):
+            async with self.slot(current_llm_priority(), workspace):
+                return await func(*args, **kwargs)
+
+        return wait_func
+
+    def get_metrics(self) -> dict[str, Any]:
+        classes = {}
+        for priority in LLM_PRIORITIES:
+            stats = self._stats[priority]
+            admitted = stats["admitted"]
+            classes[priority] = {
+                "reserved": self.reserved[priority],
+                "running": self._running[priority],
+                "queued": self._queued(priority),
+                "queued_by_workspace": {
+                    workspace: len(waiters)
+                    for workspace, waiters in self._waiting[priority].items()
+                },
+                "admitted": admitted,
+                "avg_wait": stats["total_wait"] / admitted if admitted else 0.0,
+                "max_wait": stats["max_wait"],
+            }
+        return {"max_concurrent": self.max_concurrent, "classes": classes}
+
+
+_llm_schedulers: dict[str, LLMScheduler] = {}
+
+
+def get_llm_scheduler(name: str, max_concurrent: int) -> LLMScheduler:
+    """Return the process-wide scheduler of an LLM, creating it on first use
+
+    LightRAG instances using the same model share its scheduler, so the model's
+    concurrency limit and the fairness between workspaces span all of them.
+    Reserved slots come from LLM_RESERVED_<CLASS>; by default interactive
+    calls get a quarter of the slots once there are at least 4, none below.
+    """
+    scheduler = _llm_schedulers.get(name)
+    if scheduler is None:
+        default_reserved = {"interactive": max_concurrent // 4}
+        reserved = {
+            p: int(os.getenv(f"LLM_RESERVED_{p.upper()}", default_reserved.get(p, 0)))
+            for p in LLM_PRIORITIES
+        }
+        scheduler = LLMScheduler(max_concurrent, reserved)
+        _llm_schedulers[name] = scheduler
+    return scheduler
+
+
+def get_llm_scheduler_metrics() -> dict[str, Any]:
+    return {name: s.get_metrics() for name, s in _llm_schedulers.items()}
+
+
+def _timed_call(
+    func: Callable[..., Any], args: tuple, kwargs: dict
+) -> tuple[float, Any]:
+    """Run ``func`` and report the wall-clock time it started (picklable for process pools)."""
+    started = time.time()
+    return started, func(*args, **kwargs)
+
+
+class BlockingExecutor:
+    """Bounded pool for running blocking calls without stalling the event loop.
+
+    Local model inference and synchronous database clients are submitted here
+    instead of being called inside ``async def`` bodies. ``max_pending`` bounds
+    how many calls may be queued or running at once; further callers wait on
+    the event loop, not in the pool's unbounded work queue.
+
+    A thread pool suits calls that release the GIL (torch, network clients).
+    A process pool suits pure-Python CPU work, but then ``func`` and its
+    arguments must be picklable.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        kind: str = "thread",
+        max_pending: int | None = None,
+        name: str = "lightrag",
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported executor kind: {kind}")
+        self.kind = kind
+        self.name = name
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 4
+        self._executor: concurrent.futures.Executor | None = None
+        self._slots: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+        self._metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "in_flight": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "total_run_seconds": 0.0,
+        }
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers
+                )
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(self.max_pending)
+            self._slots[loop] = slots
+        return slots
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``func(*args, **kwargs)`` in the pool and await its result."""
+        loop = asyncio.get_running_loop()
+        queued = time.time()
+        async with self._get_slots():
+            self._metrics["submitted"] += 1
+            self._metrics["in_flight"] += 1
+            try:
+                started, result = await loop.run_in_executor(
+                    self._get_executor(), _timed_call, func, args, kwargs
+                )
+            except BaseException:
+                self._metrics["failed"] += 1
+                raise
+            finally:
+                self._metrics["in_flight"] -= 1
+            finished = time.time()
+            wait = max(0.0, started - queued)
+            self._metrics["completed"] += 1
+            self._metrics["total_wait_seconds"] += wait
+            self._metrics["max_wait_seconds"] = max(
+                self._metrics["max_wait_seconds"], wait
+            )
+            self._metrics["total_run_seconds"] += max(0.0, finished - started)
+            if wait > 1.0:
+                logger.debug(
+                    f"{self.name} executor: call to {getattr(func, '__name__', func)} waited {wait:.2f}s in queue"
+                )
+            return result
+
+    def get_metrics(self) -> dict[str, Any]:
+        completed = self._metrics["completed"] or 1
+        return {
+            **self._metrics,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "avg_wait_seconds": self._metrics["total_wait_seconds"] / completed,
+            "avg_run_seconds": self._metrics["total_run_seconds"] / completed,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_blocking_executor: BlockingExecutor | None = None
+
+
+def get_blocking_executor() -> BlockingExecutor:
+    """Return the process-wide executor for blocking calls.
+
+    Sized by ``BLOCKING_EXECUTOR_WORKERS`` and ``BLOCKING_EXECUTOR_MAX_PENDING``.
+    """
+    global _blocking_executor
+    if _blocking_executor is None:
+        workers = os.getenv("BLOCKING_EXECUTOR_WORKERS")
+        pending = os.getenv("BLOCKING_EXECUTOR_MAX_PENDING")
+        _blocking_executor = BlockingExecutor(
+            max_workers=int(workers) if workers else None,
+            max_pending=int(pending) if pending else None,
+            name="lightrag-blocking",
+        )
+    return _blocking_executor
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable on the shared executor."""
+    return await get_blocking_executor().run(func, *args, **kwargs)
+
+
 def wrap_embedding_func_with_attrs(**kwargs):
     """Wrap a function with attributes"""
 
@@ -513,11 +865,12 @@ async def get_best_cached_response(
     llm_func=None,
     original_prompt=None,
     cache_type=None,
+    data_version=None,
 ) -> str | None:
     logger.debug(
         f"get_best_cached_response:  mode={mode} cache_type={cache_type} use_llm_check={use_llm_check}"
     )
-    mode_cache = await hashing_kv.get_by_id(mode)
+    mode_cache = await hashing_kv.get_cache_entries(mode)
     if not mode_cache:
         return None
 
@@ -531,8 +884,10 @@ async def get_best_cached_response(
         # Skip if cache_type doesn't match
         if cache_type and cache_data.get("cache_type") != cache_type:
             continue
+        if data_version is not None and cache_data.get("data_version") != data_version:
+            continue
 
-        if cache_data["embedding"] is None:
+        if cache_data.get("embedding") is None:
             continue
 
         # Convert cached embedding list to ndarray
@@ -605,6 +960,7 @@ async def get_best_cached_response(
             "original_prompt": prompt_display,
         }
         logger.debug(json.dumps(log_data, ensure_ascii=False))
+        get_cache_janitor(hashing_kv).record_hit(mode, best_cache_id)
         return best_response
     return None
 
@@ -648,8 +1004,13 @@ async def handle_cache(
     prompt,
     mode="default",
     cache_type=None,
+    data_version=None,
 ):
-    """Generic cache handling function"""
+    """Generic cache handling function
+
+    With a data_version, similarity matches are limited to entries cached at
+    that version (exact matches already have it in their args_hash).
+    """
     if hashing_kv is None:
         return None, None, None, None
 
@@ -679,6 +1040,7 @@ async def handle_cache(
                 llm_func=llm_model_func if use_llm_check else None,
                 original_prompt=prompt,
                 cache_type=cache_type,
+                data_version=data_version,
             )
             if best_cached_response is not None:
                 logger.debug(f"Embedding cached hit(mode:{mode} type:{cache_type})")
@@ -695,13 +1057,11 @@ async def handle_cache(
     # Here is the conditions of code reaching this point:
     #     1. All query mode: enable_llm_cache is True and embedding simularity is not enabled
     #     2. Entity extract: enable_llm_cache_for_entity_extract is True
-    if exists_func(hashing_kv, "get_by_mode_and_id"):
-        mode_cache = await hashing_kv.get_by_mode_and_id(mode, args_hash) or {}
-    else:
-        mode_cache = await hashing_kv.get_by_id(mode) or {}
-    if args_hash in mode_cache:
+    entry = await hashing_kv.get_cache_entry(mode, args_hash)
+    if entry is not None:
         logger.debug(f"Non-embedding cached hit(mode:{mode} type:{cache_type})")
-        return mode_cache[args_hash]["return"], None, None, None
+        get_cache_janitor(hashing_kv).record_hit(mode, args_hash)
+        return entry["return"], None, None, None
 
     logger.debug(f"Non-embedding cached missed(mode:{mode} type:{cache_type})")
     return None, None, None, None
@@ -717,6 +1077,8 @@ class CacheData:
     max_val: float | None = None
     mode: str = "default"
     cache_type: str = "query"
+    # TNC: version of the data the answer was built from
+    data_version: int | None = None
 
 
 async def save_to_cache(hashing_kv, cache_data: CacheData):
@@ -730,31 +1092,21 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
     if hashing_kv is None or not cache_data.content:
         return
 
-    # If content is a streaming response, don't cache it
+    # Streams are cached by tee_stream_to_cache once they complete
     if hasattr(cache_data.content, "__aiter__"):
         logger.debug("Streaming response detected, skipping cache")
         return
 
-    # Get existing cache data
-    if exists_func(hashing_kv, "get_by_mode_and_id"):
-        mode_cache = (
-            await hashing_kv.get_by_mode_and_id(cache_data.mode, cache_data.args_hash)
-            or {}
-        )
-    else:
-        mode_cache = await hashing_kv.get_by_id(cache_data.mode) or {}
-
     # Check if we already have identical content cached
-    if cache_data.args_hash in mode_cache:
-        existing_content = mode_cache[cache_data.args_hash].get("return")
-        if existing_content == cache_data.content:
-            logger.info(
-                f"Cache content unchanged for {cache_data.args_hash}, skipping update"
-            )
-            return
+    existing = await hashing_kv.get_cache_entry(cache_data.mode, cache_data.args_hash)
+    if existing is not None and existing.get("return") == cache_data.content:
+        logger.info(
+            f"Cache content unchanged for {cache_data.args_hash}, skipping update"
+        )
+        return
 
-    # Update cache with new content
-    mode_cache[cache_data.args_hash] = {
+    # Write only this entry, not the whole mode
+    entry = {
         "return": cache_data.content,
         "cache_type": cache_data.cache_type,
         "embedding": cache_data.quantized.tobytes().hex()
@@ -766,10 +1118,104 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
         "embedding_min": cache_data.min_val,
         "embedding_max": cache_data.max_val,
         "original_prompt": cache_data.prompt,
+        "create_time": int(time.time()),
     }
+    if cache_data.data_version is not None:
+        entry["data_version"] = cache_data.data_version
+    await hashing_kv.upsert_cache_entry(cache_data.mode, cache_data.args_hash, entry)
+    get_cache_janitor(hashing_kv).record_write(cache_data.cache_type, entry)
 
-    # Only upsert if there's actual new content
-    await hashing_kv.upsert({cache_data.mode: mode_cache})
+
+async def tee_stream_to_cache(hashing_kv, cache_data: CacheData) -> AsyncIterator[str]:
+    """Yield the chunks of a streaming response while collecting them
+
+    cache_data.content is the stream; the complete text is saved to the cache
+    only if the stream is consumed to its end without error. The query has
+    already returned by then, so the cache is flushed here rather than by
+    LightRAG._query_done.
+    """
+    chunks = []
+    async for chunk in cache_data.content:
+        chunks.append(chunk)
+        yield chunk
+    if hashing_kv is not None:
+        await save_to_cache(hashing_kv, replace(cache_data, content="".join(chunks)))
+        await hashing_kv.index_done_callback()
+
+
+async def replay_cached_stream(text: str, chunk_size: int = 256) -> AsyncIterator[str]:
+    """Serve a cached response to a streaming caller, in chunks"""
+    for start in range(0, len(text), chunk_size):
+        yield text[start : start + chunk_size]
+
+
+class SingleFlight:
+    """Lets concurrent callers of the same key share one computation.
+
+    The first caller of a key runs it; callers arriving while it is in flight
+    await its result instead of repeating the work. If the computation fails,
+    is cancelled or returns a stream (which cannot be consumed twice), the
+    waiting callers retry, one of them taking over.
+    """
+
+    def __init__(self):
+        self._calls: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Future]
+        ] = weakref.WeakKeyDictionary()
+        self._metrics = {"leaders": 0, "coalesced": 0, "in_flight": 0}
+
+    def _get_calls(self) -> dict[str, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        calls = self._calls.get(loop)
+        if calls is None:
+            calls = {}
+            self._calls[loop] = calls
+        return calls
+
+    async def do(
+        self, key: str, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """Return ``await func(*args, **kwargs)``, shared with concurrent callers of ``key``"""
+        calls = self._get_calls()
+        while (flight := calls.get(key)) is not None:
+            self._metrics["coalesced"] += 1
+            shared, result = await asyncio.shield(flight)
+            if shared:
+                return result
+
+        flight = asyncio.get_running_loop().create_future()
+        calls[key] = flight
+        self._metrics["leaders"] += 1
+        self._metrics["in_flight"] += 1
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException:
+            flight.set_result((False, None))
+            raise
+        finally:
+            self._metrics["in_flight"] -= 1
+            if calls.get(key) is flight:
+                del calls[key]
+        flight.set_result((not hasattr(result, "__aiter__"), result))
+        return result
+
+    def get_metrics(self) -> dict[str, Any]:
+        return dict(self._metrics)
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight registry for LLM and query calls"""
+    return _single_flight
+
+
+def cache_flight_key(hashing_kv, mode: str, args_hash: str) -> str:
+    """Single-flight key of a cache entry, scoped to the cache's workspace"""
+    workspace = hashing_kv.global_config.get("workspace") if hashing_kv else None
+    namespace = hashing_kv.namespace if hashing_kv else ""
+    return f"{workspace or ''}:{namespace}:{mode}:{args_hash}"
 
 
 def safe_unicode_decode(content):
@@ -907,6 +1353,27 @@ def lazy_external_import(module_name: str, class_name: str) -> Callable[..., Any
     return import_class
 
 
+def ensure_package(
+    package: str, module: str | None = None, install: str | list[str] | None = None
+) -> None:
+    """Install a missing optional dependency with pipmaster
+
+    ``module`` (default: ``package`` with dashes as underscores) is looked up
+    with importlib.util.find_spec, which checks the import path without
+    importing anything, so pipmaster is only loaded and run when the package
+    is actually missing. ``install`` overrides the pip requirement(s).
+    """
+    import importlib.util
+
+    if importlib.util.find_spec(module or package.replace("-", "_")) is not None:
+        return
+    import pipmaster as pm
+
+    for requirement in install if isinstance(install, list) else [install or package]:
+        logger.info(f"Installing missing package {requirement}")
+        pm.install(requirement)
+
+
 def get_content_summary(content: str, max_length: int = 250) -> str:
     """Get summary of document content
 